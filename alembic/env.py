@@ -20,6 +20,16 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names):
+    """
+    Autogenerate solo gestiona las tablas del modelo: las particiones de
+    articles y article_keys se crean con SQL en las migraciones.
+    """
+    if type_ == "table":
+        return name in target_metadata.tables
+    return True
+
+
 # ===== URL de conexión dinámica ===== #
 def get_url():
     """
@@ -47,7 +57,8 @@ def run_migrations_offline():
         target_metadata=target_metadata,
         literal_binds=True,
         compare_type=True,
-        compare_server_default=True
+        compare_server_default=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -69,6 +80,7 @@ def run_migrations_online():
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,82 @@
+# archive partitions with tombstones
+"""Make archive_article_partitions() clean up after the rows it archives.
+
+DETACH PARTITION fires no DELETE trigger, so archived rows kept their
+(title, author) reserved in article_keys and never reached the change feed.
+The function now releases those keys and writes a tombstone per archived
+row, and returns the archived ids per partition so the caller can drop them
+from the Redis cache and indexes.
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2c5e71a4f8'
+down_revision = '4a7d2e9c1b36'
+branch_labels = None
+depends_on = None
+
+_PARTITIONS_TO_ARCHIVE = """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'articles'::regclass
+                  AND c.relname ~ '^articles_y[0-9]{4}m[0-9]{2}$'
+                  AND to_date(substr(c.relname, 11), 'YYYY"m"MM') + interval '1 month' <= older_than
+"""
+
+
+def upgrade():
+    op.execute("DROP FUNCTION archive_article_partitions(date)")
+    op.execute(f"""
+        CREATE FUNCTION archive_article_partitions(older_than date)
+        RETURNS TABLE (partition_name text, article_ids integer[]) AS $$
+        DECLARE
+            part record;
+            ids integer[];
+        BEGIN
+            FOR part IN {_PARTITIONS_TO_ARCHIVE}
+            LOOP
+                EXECUTE format('SELECT coalesce(array_agg(id), ''{{}}'') FROM %I', part.relname)
+                    INTO ids;
+                EXECUTE format('DELETE FROM article_keys k USING %I a'
+                               ' WHERE k.title = a.title AND k.author = a.author', part.relname);
+                INSERT INTO article_tombstones (article_id)
+                SELECT unnest(ids)
+                ON CONFLICT (article_id) DO UPDATE SET deleted_at = excluded.deleted_at;
+                EXECUTE format('ALTER TABLE articles DETACH PARTITION %I', part.relname);
+                EXECUTE format('ALTER TABLE %I SET SCHEMA articles_archive', part.relname);
+                partition_name := part.relname;
+                article_ids := ids;
+                RETURN NEXT;
+            END LOOP;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        COMMENT ON FUNCTION archive_article_partitions(date) IS
+        'Archives monthly partitions ending on or before older_than, treating their rows as deleted.'
+        ' Redis is not touched: callers must drop the returned ids from the cache and indexes'
+        ' (services.articles.maintain_partitions does), or rebuild them afterwards.'
+    """)
+
+
+def downgrade():
+    op.execute("DROP FUNCTION archive_article_partitions(date)")
+    op.execute(f"""
+        CREATE FUNCTION archive_article_partitions(older_than date) RETURNS integer AS $$
+        DECLARE
+            part record;
+            archived integer := 0;
+        BEGIN
+            FOR part IN {_PARTITIONS_TO_ARCHIVE}
+            LOOP
+                EXECUTE format('ALTER TABLE articles DETACH PARTITION %I', part.relname);
+                EXECUTE format('ALTER TABLE %I SET SCHEMA articles_archive', part.relname);
+                archived := archived + 1;
+            END LOOP;
+            RETURN archived;
+        END
+        $$ LANGUAGE plpgsql
+    """)
@@ -0,0 +1,193 @@
+# partition articles by published_at
+"""Range-partition articles by month of published_at.
+
+- articles becomes PARTITION BY RANGE (published_at) with monthly partitions
+  (articles_yYYYYmMM) and a default partition holding NULL dates.
+- ensure_article_partitions(from, to) creates missing monthly partitions,
+  moving any matching rows out of the default partition first; the app calls
+  it periodically so future months exist before rows arrive.
+- archive_article_partitions(older_than) detaches partitions that end before
+  the given date into the articles_archive schema.
+- Partitioned tables cannot carry a unique constraint without the partition
+  key, so (title, author) uniqueness moves to article_keys, kept in sync by
+  trigger and still named uq_title_author.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f1a9d27b54'
+down_revision = 'bda249293263'
+branch_labels = None
+depends_on = None
+
+MONTHS_BACK = 1
+MONTHS_AHEAD = 3
+
+
+def upgrade():
+    bind = op.get_bind()
+    has_articles = sa.inspect(bind).has_table("articles")
+
+    op.execute("CREATE SEQUENCE IF NOT EXISTS articles_id_seq")
+    if has_articles:
+        op.execute("ALTER SEQUENCE articles_id_seq OWNED BY NONE")
+        op.execute("ALTER TABLE articles RENAME TO articles_unpartitioned")
+        op.execute("ALTER TABLE articles_unpartitioned DROP CONSTRAINT IF EXISTS uq_title_author")
+        op.execute("DROP INDEX IF EXISTS ix_articles_id, ix_articles_author, ix_articles_published_at")
+
+    op.execute("""
+        CREATE TABLE articles (
+            id integer NOT NULL DEFAULT nextval('articles_id_seq'),
+            title varchar(255) NOT NULL,
+            body text NOT NULL,
+            tags varchar(255) NOT NULL,
+            author varchar(120) NOT NULL,
+            published_at timestamp without time zone,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            updated_at timestamp without time zone NOT NULL DEFAULT now()
+        ) PARTITION BY RANGE (published_at)
+    """)
+    op.execute("CREATE TABLE articles_default PARTITION OF articles DEFAULT")
+    op.execute("CREATE INDEX ix_articles_id ON articles (id)")
+    op.execute("CREATE INDEX ix_articles_author ON articles (author)")
+    op.execute("CREATE INDEX ix_articles_published_at ON articles (published_at)")
+
+    op.execute("""
+        CREATE TABLE article_keys (
+            title varchar(255) NOT NULL,
+            author varchar(120) NOT NULL,
+            CONSTRAINT uq_title_author UNIQUE (title, author)
+        )
+    """)
+    op.execute("""
+        CREATE FUNCTION articles_maintain_keys() RETURNS trigger AS $$
+        BEGIN
+            -- Rows shuffled between partitions by ensure_article_partitions keep their key
+            IF current_setting('app.moving_partitions', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                DELETE FROM article_keys WHERE title = OLD.title AND author = OLD.author;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO article_keys (title, author) VALUES (NEW.title, NEW.author);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER articles_keys
+        AFTER INSERT OR UPDATE OF title, author OR DELETE ON articles
+        FOR EACH ROW EXECUTE FUNCTION articles_maintain_keys()
+    """)
+
+    op.execute("""
+        CREATE FUNCTION ensure_article_partitions(from_month date, to_month date) RETURNS integer AS $$
+        DECLARE
+            m date := date_trunc('month', from_month);
+            part text;
+            created integer := 0;
+        BEGIN
+            WHILE m <= date_trunc('month', to_month) LOOP
+                part := format('articles_y%sm%s', to_char(m, 'YYYY'), to_char(m, 'MM'));
+                IF to_regclass(part) IS NULL THEN
+                    EXECUTE format('CREATE TABLE %I (LIKE articles INCLUDING DEFAULTS)', part);
+                    PERFORM set_config('app.moving_partitions', 'on', true);
+                    EXECUTE format(
+                        'WITH moved AS (DELETE FROM articles_default'
+                        ' WHERE published_at >= %L AND published_at < %L RETURNING *)'
+                        ' INSERT INTO %I SELECT * FROM moved',
+                        m, m + interval '1 month', part);
+                    PERFORM set_config('app.moving_partitions', 'off', true);
+                    EXECUTE format(
+                        'ALTER TABLE articles ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                        part, m, (m + interval '1 month')::date);
+                    created := created + 1;
+                END IF;
+                m := m + interval '1 month';
+            END LOOP;
+            RETURN created;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("CREATE SCHEMA IF NOT EXISTS articles_archive")
+    op.execute("""
+        CREATE FUNCTION archive_article_partitions(older_than date) RETURNS integer AS $$
+        DECLARE
+            part record;
+            archived integer := 0;
+        BEGIN
+            FOR part IN
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'articles'::regclass
+                  AND c.relname ~ '^articles_y[0-9]{4}m[0-9]{2}$'
+                  AND to_date(substr(c.relname, 11), 'YYYY"m"MM') + interval '1 month' <= older_than
+            LOOP
+                EXECUTE format('ALTER TABLE articles DETACH PARTITION %I', part.relname);
+                EXECUTE format('ALTER TABLE %I SET SCHEMA articles_archive', part.relname);
+                archived := archived + 1;
+            END LOOP;
+            RETURN archived;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    if has_articles:
+        op.execute(f"""
+            SELECT ensure_article_partitions(
+                LEAST(COALESCE((SELECT min(published_at) FROM articles_unpartitioned), now()),
+                      now() - interval '{MONTHS_BACK} month')::date,
+                GREATEST(COALESCE((SELECT max(published_at) FROM articles_unpartitioned), now()),
+                         now() + interval '{MONTHS_AHEAD} month')::date)
+        """)
+        op.execute("""
+            INSERT INTO articles (id, title, body, tags, author, published_at, created_at, updated_at)
+            SELECT id, title, body, tags, author, published_at, created_at, updated_at
+            FROM articles_unpartitioned
+        """)
+        op.execute("DROP TABLE articles_unpartitioned")
+    else:
+        op.execute(f"""
+            SELECT ensure_article_partitions(
+                (now() - interval '{MONTHS_BACK} month')::date,
+                (now() + interval '{MONTHS_AHEAD} month')::date)
+        """)
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY articles.id")
+
+
+def downgrade():
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE articles_unpartitioned (
+            id integer NOT NULL DEFAULT nextval('articles_id_seq') PRIMARY KEY,
+            title varchar(255) NOT NULL,
+            body text NOT NULL,
+            tags varchar(255) NOT NULL,
+            author varchar(120) NOT NULL,
+            published_at timestamp without time zone,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            updated_at timestamp without time zone NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO articles_unpartitioned
+        SELECT id, title, body, tags, author, published_at, created_at, updated_at FROM articles
+    """)
+    op.execute("DROP TABLE articles CASCADE")
+    op.execute("DROP TABLE article_keys")
+    op.execute("DROP FUNCTION articles_maintain_keys()")
+    op.execute("DROP FUNCTION ensure_article_partitions(date, date)")
+    op.execute("DROP FUNCTION archive_article_partitions(date)")
+    op.execute("ALTER TABLE articles_unpartitioned RENAME TO articles")
+    op.execute("ALTER INDEX articles_unpartitioned_pkey RENAME TO articles_pkey")
+    op.execute("ALTER TABLE articles ADD CONSTRAINT uq_title_author UNIQUE (title, author)")
+    op.execute("CREATE INDEX ix_articles_id ON articles (id)")
+    op.execute("CREATE INDEX ix_articles_author ON articles (author)")
+    op.execute("CREATE INDEX ix_articles_published_at ON articles (published_at)")
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY articles.id")
@@ -0,0 +1,103 @@
+"""
+Cheap per-article access frequency, used for adaptive TTLs and cache warming.
+
+Reads are sampled (``ACCESS_SAMPLE_RATE``) into the ``article:hot`` sorted set,
+each sample weighted ``1 / rate`` so scores estimate real hit counts; updates
+go to ``article:edits``. ``decay`` halves both sets and is run every
+``ACCESS_HALF_LIFE_SECONDS``, so scores track recent traffic rather than
+all-time totals.
+"""
+import random
+from typing import Dict, List
+
+from .cache import redis_client
+from .config import get_settings
+
+HOT_KEY = "article:hot"
+EDITS_KEY = "article:edits"
+DECAY_LOCK_KEY = "article:hot:decay:lock"
+WARM_LOCK_KEY = "article:warm:lock"
+
+_settings = get_settings()
+_SAMPLE_RATE = _settings.ACCESS_SAMPLE_RATE
+_HOT_THRESHOLD = _settings.ACCESS_HOT_THRESHOLD
+_TTL = _settings.CACHE_TTL_SECONDS
+_TTL_MIN = _settings.CACHE_TTL_MIN_SECONDS
+_TTL_MAX = _settings.CACHE_TTL_MAX_SECONDS
+
+
+def sample_read() -> float:
+    """
+    Score to add for one read: ``1 / rate`` when sampled, 0 otherwise.
+    """
+    if _SAMPLE_RATE > 0 and random.random() < _SAMPLE_RATE:
+        return 1.0 / _SAMPLE_RATE
+    return 0.0
+
+
+def record_read(article_id: int) -> None:
+    weight = sample_read()
+    if weight:
+        redis_client().zincrby(HOT_KEY, weight, str(article_id))
+
+
+def record_edit(article_id: int) -> None:
+    redis_client().zincrby(EDITS_KEY, 1, str(article_id))
+
+
+def forget(article_id: int) -> None:
+    pipe = redis_client().pipeline(transaction=False)
+    pipe.zrem(HOT_KEY, str(article_id))
+    pipe.zrem(EDITS_KEY, str(article_id))
+    pipe.execute()
+
+
+def ttl_for_scores(hits: float, edits: float) -> int:
+    """
+    Long TTL for hot articles nobody edits lately, short for cold or recently
+    edited ones, the configured default in between.
+    """
+    if edits >= 1 or hits < 1:
+        return _TTL_MIN
+    if hits >= _HOT_THRESHOLD:
+        return _TTL_MAX
+    return _TTL
+
+
+def ttls_for(article_ids: List[int]) -> Dict[int, int]:
+    """
+    Adaptive TTL per article, looked up with one pipelined round trip.
+    """
+    if not article_ids:
+        return {}
+    members = [str(aid) for aid in article_ids]
+    pipe = redis_client().pipeline(transaction=False)
+    pipe.zmscore(HOT_KEY, members)
+    pipe.zmscore(EDITS_KEY, members)
+    hits, edits = pipe.execute()
+    return {
+        aid: ttl_for_scores(h or 0.0, e or 0.0)
+        for aid, h, e in zip(article_ids, hits, edits)
+    }
+
+
+def ttl_for(article_id: int) -> int:
+    return ttls_for([article_id])[article_id]
+
+
+def top_articles(limit: int) -> List[int]:
+    """
+    Most accessed article ids, hottest first.
+    """
+    return [int(m) for m in redis_client().zrevrange(HOT_KEY, 0, limit - 1)]
+
+
+def decay(factor: float = 0.5, floor: float = 0.5) -> None:
+    """
+    Scale every score by ``factor`` and drop members that fell below ``floor``.
+    """
+    pipe = redis_client().pipeline(transaction=True)
+    for key in (HOT_KEY, EDITS_KEY):
+        pipe.zunionstore(key, {key: factor})
+        pipe.zremrangebyscore(key, "-inf", f"({floor}")
+    pipe.execute()
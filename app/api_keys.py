@@ -0,0 +1,177 @@
+"""
+In-process cache of API keys stored in Postgres.
+
+Keys look like ``rk_<prefix>_<secret>``. Only the prefix (for lookup) and the
+SHA-256 of the whole key are stored; verification compares hashes with
+``hmac.compare_digest``. Lookups are cached per worker for
+``API_KEY_CACHE_TTL_SECONDS`` and unknown or revoked prefixes for
+``API_KEY_NEGATIVE_TTL_SECONDS``, so a warm worker authenticates without any
+I/O; at most ``API_KEY_CACHE_MAX_ENTRIES`` prefixes are kept, least recently
+used first out, so probing random prefixes cannot grow it. Revocations are
+published on ``api-keys:revoked`` and every worker evicts the prefix as soon
+as it hears it; the TTL bounds staleness if a message is missed.
+
+The static ``Settings.API_KEY`` remains valid as an admin key.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from .cache import redis_client
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "api-keys:revoked"
+KEY_PREFIX = "rk"
+STATIC_PREFIX = "static"
+
+_settings = get_settings()
+_TTL = _settings.API_KEY_CACHE_TTL_SECONDS
+_NEGATIVE_TTL = _settings.API_KEY_NEGATIVE_TTL_SECONDS
+_MAX_ENTRIES = _settings.API_KEY_CACHE_MAX_ENTRIES
+
+# prefix -> (key or None for unknown, monotonic expiry), least recently used first
+_cache: OrderedDict[str, Tuple[Optional[KeyInfo], float]] = OrderedDict()
+# Revocations evict from the listener thread
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class KeyInfo:
+    """
+    What the request pipeline needs to know about an authenticated key.
+    """
+    prefix: str
+    name: str
+    key_hash: str
+    rate_limit: Optional[int] = None
+    is_admin: bool = False
+
+
+def hash_key(raw_key: str) -> str:
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+def generate_key() -> Tuple[str, str]:
+    """
+    Return a new ``(prefix, raw_key)`` pair.
+    """
+    prefix = secrets.token_hex(4)
+    return prefix, f"{KEY_PREFIX}_{prefix}_{secrets.token_urlsafe(32)}"
+
+
+def parse_prefix(raw_key: str) -> Optional[str]:
+    parts = raw_key.split("_", 2)
+    if len(parts) != 3 or parts[0] != KEY_PREFIX or not parts[1]:
+        return None
+    return parts[1]
+
+
+_STATIC = (KeyInfo(prefix=STATIC_PREFIX, name=STATIC_PREFIX,
+                   key_hash=hash_key(_settings.API_KEY), is_admin=True)
+           if _settings.API_KEY else None)
+
+
+def static_key() -> Optional[KeyInfo]:
+    return _STATIC
+
+
+def cached(prefix: str) -> Tuple[bool, Optional[KeyInfo]]:
+    """
+    Return ``(hit, key)``; ``key`` is None on a negative hit.
+    """
+    with _lock:
+        entry = _cache.get(prefix)
+        if entry is None:
+            return False, None
+        if entry[1] <= time.monotonic():
+            del _cache[prefix]
+            return False, None
+        _cache.move_to_end(prefix)
+        return True, entry[0]
+
+
+def remember(prefix: str, key: Optional[KeyInfo]) -> None:
+    expires = time.monotonic() + (_TTL if key is not None else _NEGATIVE_TTL)
+    with _lock:
+        _cache[prefix] = (key, expires)
+        _cache.move_to_end(prefix)
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def evict(prefix: Optional[str] = None) -> None:
+    with _lock:
+        if prefix is None:
+            _cache.clear()
+        else:
+            _cache.pop(prefix, None)
+
+
+def verify(key: Optional[KeyInfo], raw_key: str) -> bool:
+    return key is not None and hmac.compare_digest(key.key_hash, hash_key(raw_key))
+
+
+def lookup_cached(raw_key: str) -> Tuple[bool, Optional[KeyInfo]]:
+    """
+    Resolve a raw key without touching the database.
+
+    Returns:
+        Tuple[bool, Optional[KeyInfo]]: ``(True, key)`` for the static key or a
+        cache hit, ``key`` being None when it does not verify; ``(False, None)``
+        when the key has to be loaded.
+    """
+    if verify(_STATIC, raw_key):
+        return True, _STATIC
+    prefix = parse_prefix(raw_key)
+    if prefix is None:
+        return True, None
+    hit, key = cached(prefix)
+    if not hit:
+        return False, None
+    return True, key if verify(key, raw_key) else None
+
+
+def publish_revoked(prefix: str) -> None:
+    evict(prefix)
+    try:
+        redis_client().publish(CHANNEL, prefix)
+    except RedisError:
+        logger.exception("Could not broadcast revocation of API key %s", prefix)
+
+
+def _on_message(message: Dict[str, Any]) -> None:
+    data = message.get("data")
+    evict(data.decode() if isinstance(data, bytes) else data)
+
+
+def _on_listener_error(exc: BaseException, _pubsub: Any, _thread: Any) -> None:
+    # Revocations may have been missed while disconnected: start cold
+    logger.warning("API key invalidation listener error: %s", exc)
+    evict()
+    time.sleep(1.0)
+
+
+def start_listener() -> Optional[threading.Thread]:
+    """
+    Subscribe to revocations in a daemon thread; None if Redis is unreachable.
+    """
+    try:
+        pubsub = redis_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANNEL: _on_message})
+    except RedisError:
+        logger.exception("API key invalidation listener not started")
+        return None
+    return pubsub.run_in_thread(sleep_time=1.0, daemon=True,
+                                exception_handler=_on_listener_error)
@@ -1,35 +1,193 @@
-from typing import Any, Optional
-import json
+from typing import Any, Dict, List, Optional, Tuple
 import redis
+from redis.client import NEVER_DECODE
 from .config import get_settings
 from .schemas.schemas import ArticleOut
+from .cache_codec import encode, decode
 
 _settings = get_settings()
 _r = redis.Redis(host=_settings.REDIS_HOST, port=_settings.REDIS_PORT, db=_settings.REDIS_DB)
 _TTL = getattr(_settings, "CACHE_TTL_SECONDS", 90)
+# Keep bodies under their own key so metadata-only reads never transfer them
+_SPLIT_BODY = _settings.CACHE_SPLIT_BODY
+_NEGATIVE_TTL = _settings.NEGATIVE_CACHE_TTL_SECONDS
+
+# Returned for ids cached as known-missing; stored as a byte no codec version uses
+MISSING: Any = object()
+_MISSING_MARKER = b"\x00"
+_DATETIME_FIELDS = ("published_at", "created_at", "updated_at")
+# Fields an entry must carry to be served; anything short of that is a miss
+_META_FIELDS = frozenset(ArticleOut.__fields__) - {"body"}
+
+
+def redis_client() -> redis.Redis:
+    """
+    Shared Redis client, also used by the indexes kept next to the article cache.
+    """
+    return _r
 
 
 def cache_key(article_id: int) -> str:
     return f"article:{article_id}"
 
 
+def body_key(article_id: int) -> str:
+    return f"article:{article_id}:body"
+
+
 def _serialize_article(article: Any) -> dict:
     if isinstance(article, dict):
         return article
     return ArticleOut.from_orm(article).dict()
 
 
-def get_cached_article(article_id: int) -> Optional[dict]:
-    raw = _r.get(cache_key(article_id))
-    if not raw:
-        return None
-    return json.loads(raw)
+def _raw_mget(keys: List[str]) -> List[Optional[bytes]]:
+    # Entries are binary: bypass decode_responses whatever the client setting
+    return _r.execute_command("MGET", *keys, **{NEVER_DECODE: True})
 
 
-def set_cached_article(article_id: int, article: Any) -> None:
+def _entries(article_id: int, article: Any) -> List[Tuple[str, bytes]]:
     payload = _serialize_article(article)
-    _r.setex(cache_key(article_id), _TTL, json.dumps(payload, default=str))
+    if not _SPLIT_BODY:
+        return [(cache_key(article_id), encode(payload))]
+    meta = dict(payload)
+    body = meta.pop("body", None)
+    return [(cache_key(article_id), encode(meta)), (body_key(article_id), encode(body))]
+
+
+def _iso_datetimes(article: dict) -> dict:
+    """
+    Entries are written with ``str(datetime)``; responses use ISO 8601, so
+    cache hits and misses must not differ in format.
+    """
+    for name in _DATETIME_FIELDS:
+        value = article.get(name)
+        if isinstance(value, str) and len(value) > 10 and value[10] == " ":
+            article[name] = f"{value[:10]}T{value[11:]}"
+    return article
+
+
+def _assemble(meta_raw: Optional[bytes], body_raw: Optional[bytes],
+              include_body: bool) -> Optional[dict]:
+    """
+    Rebuild an article from its entry, or None when the entry cannot be served:
+    undecodable, or not shaped like an article (e.g. a metadata-only entry
+    written under ``CACHE_SPLIT_BODY`` and read after it was turned off).
+    """
+    meta = decode(meta_raw)
+    if not isinstance(meta, dict) or not _META_FIELDS <= meta.keys():
+        return None
+    _iso_datetimes(meta)
+    if not include_body or "body" in meta:
+        return meta
+    body = decode(body_raw) if _SPLIT_BODY else None
+    if not isinstance(body, str):
+        return None
+    meta["body"] = body
+    return meta
+
+
+def _read_keys(article_ids: List[int], include_body: bool) -> List[str]:
+    if _SPLIT_BODY and include_body:
+        return [k for aid in article_ids for k in (cache_key(aid), body_key(aid))]
+    return [cache_key(aid) for aid in article_ids]
+
+
+def get_cached_article(article_id: int, include_body: bool = True) -> Optional[dict]:
+    """
+    Return the cached article, ``MISSING`` for a cached not-found, or None.
+    """
+    return get_cached_articles([article_id], include_body).get(article_id)
+
+
+def set_cached_article(article_id: int, article: Any, ttl: Optional[int] = None) -> None:
+    set_cached_articles({article_id: article}, {article_id: ttl} if ttl else None)
+
+
+def get_cached_articles(article_ids: List[int], include_body: bool = True) -> Dict[int, dict]:
+    """
+    Fetch several articles with a single MGET; uncached ids are left out and
+    ids cached as not-found map to ``MISSING``.
+    """
+    if not article_ids:
+        return {}
+    raws = _raw_mget(_read_keys(article_ids, include_body))
+    step = len(raws) // len(article_ids)
+    result = {}
+    unusable = []
+    for i, aid in enumerate(article_ids):
+        entry = raws[i * step:(i + 1) * step]
+        article = _parse_entry(entry, include_body)
+        if article is not None:
+            result[aid] = article
+        elif entry[0] is not None:
+            unusable.append(aid)
+    if unusable:
+        # Drop them so the DB read that follows caches a fresh entry
+        _r.delete(*[k for aid in unusable for k in (cache_key(aid), body_key(aid))])
+    return result
+
+
+def _parse_entry(raws: List[Optional[bytes]], include_body: bool) -> Optional[dict]:
+    if raws[0] == _MISSING_MARKER:
+        return MISSING
+    return _assemble(raws[0], raws[1] if len(raws) == 2 else None, include_body)
+
+
+def article_keys(article_id: int) -> List[str]:
+    """
+    Keys holding a full cached article, for lookups through another client.
+    """
+    return _read_keys([article_id], True)
+
+
+def parse_article(raws: List[Optional[bytes]]) -> Optional[dict]:
+    """
+    Decode the values of ``article_keys``: the article, ``MISSING`` or None.
+    """
+    return _parse_entry(raws, True)
+
+
+def set_cached_articles(articles: Dict[int, Any], ttls: Optional[Dict[int, int]] = None) -> None:
+    """
+    Store several articles in one round trip (pipelined when more than one key).
+    """
+    if not articles:
+        return
+    ttls = ttls or {}
+    entries = [
+        (key, ttls.get(article_id) or _TTL, value)
+        for article_id, article in articles.items()
+        for key, value in _entries(article_id, article)
+    ]
+    if len(entries) == 1:
+        _r.setex(*entries[0])
+        return
+    pipe = _r.pipeline(transaction=False)
+    for key, ttl, value in entries:
+        pipe.setex(key, ttl, value)
+    pipe.execute()
+
+
+def set_missing(article_ids: List[int]) -> None:
+    """
+    Cache ids as not-found for ``NEGATIVE_CACHE_TTL_SECONDS``. NX: never
+    overwrites an article cached concurrently by a create.
+    """
+    if not article_ids or _NEGATIVE_TTL <= 0:
+        return
+    pipe = _r.pipeline(transaction=False)
+    for article_id in article_ids:
+        pipe.set(cache_key(article_id), _MISSING_MARKER, ex=_NEGATIVE_TTL, nx=True)
+    pipe.execute()
 
 
 def invalidate_article(article_id: int) -> None:
-    _r.delete(cache_key(article_id))
+    _r.delete(cache_key(article_id), body_key(article_id))
+
+
+def try_lock(key: str, ttl_seconds: int) -> bool:
+    """
+    Best-effort cross-worker lock: True for the first caller until it expires.
+    """
+    return bool(_r.set(key, "1", nx=True, ex=max(ttl_seconds, 1)))
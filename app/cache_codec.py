@@ -0,0 +1,68 @@
+"""
+Compact encoding for cached articles.
+
+Entries are ``[version][flags][payload]``: the payload is msgpack (JSON when
+msgpack is not installed or ``CACHE_CODEC=json``), zlib-compressed once it
+exceeds ``CACHE_COMPRESS_THRESHOLD`` bytes. ``decode`` still reads the plain
+JSON entries written before the header existed, and returns None for versions
+it does not know and for payloads it cannot decode, so they are treated as
+misses and rewritten.
+"""
+from typing import Any, Optional
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from .config import get_settings
+
+VERSION = 1
+FLAG_MSGPACK = 0x01
+FLAG_ZLIB = 0x02
+
+_settings = get_settings()
+_USE_MSGPACK = msgpack is not None and _settings.CACHE_CODEC == "binary"
+_COMPRESS_THRESHOLD = _settings.CACHE_COMPRESS_THRESHOLD
+_COMPRESS_LEVEL = _settings.CACHE_COMPRESS_LEVEL
+
+
+def encode(payload: Any) -> bytes:
+    flags = 0
+    if _USE_MSGPACK:
+        data = msgpack.packb(payload, default=str, use_bin_type=True)
+        flags |= FLAG_MSGPACK
+    else:
+        data = json.dumps(payload, default=str, separators=(",", ":")).encode()
+    if len(data) > _COMPRESS_THRESHOLD:
+        data = zlib.compress(data, _COMPRESS_LEVEL)
+        flags |= FLAG_ZLIB
+    return bytes((VERSION, flags)) + data
+
+
+def decode(raw: bytes | str | None) -> Optional[Any]:
+    if not raw:
+        return None
+    if isinstance(raw, str):
+        raw = raw.encode()
+    try:
+        return _decode(raw)
+    except (zlib.error, ValueError):  # truncated or corrupt payload
+        return None
+
+
+def _decode(raw: bytes) -> Optional[Any]:
+    if raw[:1] == b"{":
+        return json.loads(raw)  # legacy, pre-header entry
+    if raw[0] != VERSION or len(raw) < 2:
+        return None
+    flags, data = raw[1], raw[2:]
+    if flags & FLAG_ZLIB:
+        data = zlib.decompress(data)
+    if flags & FLAG_MSGPACK:
+        if msgpack is None:
+            return None
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
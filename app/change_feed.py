@@ -0,0 +1,88 @@
+"""
+Wake-ups for long-polling ``GET /articles/changes`` consumers.
+
+Writers publish on the ``articles:changes`` Redis channel after committing.
+Each worker runs one subscriber thread that sets an ``asyncio.Event`` on its
+event loop, so any number of waiting requests share a single Redis
+connection. Waiters also re-check the database every
+``CHANGE_FEED_POLL_SECONDS``, which covers missed messages and workers
+without a listener.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from .cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "articles:changes"
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+# Current generation, replaced on every wake-up; tied to the loop it was created on
+_event: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = None
+
+
+def publish() -> None:
+    try:
+        redis_client().publish(CHANNEL, "1")
+    except RedisError:
+        logger.warning("Could not publish an article change notification")
+
+
+def _current_event() -> asyncio.Event:
+    global _event  # pylint: disable=global-statement
+    loop = asyncio.get_running_loop()
+    if _event is None or _event[0] is not loop:
+        _event = (loop, asyncio.Event())
+    return _event[1]
+
+
+def _wake() -> None:
+    global _event  # pylint: disable=global-statement
+    event = _current_event()
+    _event = None
+    event.set()
+
+
+def _on_message(_message: Dict[str, Any]) -> None:
+    if _loop is not None and not _loop.is_closed():
+        _loop.call_soon_threadsafe(_wake)
+
+
+def _on_listener_error(exc: BaseException, _pubsub: Any, _thread: Any) -> None:
+    # Waiters keep polling the database meanwhile
+    logger.warning("Change feed listener error: %s", exc)
+    time.sleep(1.0)
+
+
+async def wait_for_change(timeout: float) -> bool:
+    """
+    Wait up to ``timeout`` seconds for a change notification.
+    """
+    try:
+        await asyncio.wait_for(_current_event().wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+def start_listener(loop: asyncio.AbstractEventLoop) -> Optional[threading.Thread]:
+    """
+    Forward notifications to ``loop`` from a daemon thread; None if Redis is unreachable.
+    """
+    global _loop  # pylint: disable=global-statement
+    _loop = loop
+    try:
+        pubsub = redis_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANNEL: _on_message})
+    except RedisError:
+        logger.exception("Change feed listener not started")
+        return None
+    return pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_on_listener_error)
@@ -0,0 +1,217 @@
+"""
+Per-route concurrency limits, priorities and queue-time load shedding.
+
+Blocking route work runs through ``run_limited(lane, ...)`` instead of going
+straight to the threadpool. Each lane (``CONCURRENCY_LIMITS``, e.g.
+``read=32,write=8,list=8,search=4``) caps how many of its calls run at once,
+and all lanes together run on their own ``THREADPOOL_SIZE -
+THREADPOOL_RESERVED`` threads. The default threadpool keeps the
+``THREADPOOL_RESERVED`` others for dependency setup (sessions, API keys, rate
+limits), middleware, admin routes and background jobs, so requests get as far
+as their lane, to be queued or shed, however busy the lanes are. ``/health``
+runs on threads of its own (``run_probe``).
+
+When a call has to wait, free slots go to the waiting call of the highest
+priority lane first (``read`` before ``write`` before ``list``/``search``), so
+cheap cache-backed reads keep flowing while expensive queries pile up. A
+call is shed with a 503 and ``Retry-After`` as soon as its expected wait,
+estimated from the lane's recent service time, exceeds
+``CONCURRENCY_QUEUE_DEADLINE_MS``, or when it has actually waited that long.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import anyio
+import anyio.to_thread
+from fastapi import HTTPException, status
+
+from .config import Settings, get_settings
+from .profiling import run_in_limiter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Lower runs first when slots free up
+PRIORITIES = {"read": 0, "write": 1, "list": 2, "search": 2}
+_EWMA_WEIGHT = 0.2
+# Threads for /health, outside every other pool
+PROBE_THREADS = 2
+
+_limiter: Optional["ConcurrencyLimiter"] = None
+_lane_threads: Optional[anyio.CapacityLimiter] = None
+_probe_threads: Optional[anyio.CapacityLimiter] = None
+
+
+@dataclass(slots=True)
+class Lane:
+    name: str
+    limit: int
+    priority: int
+    active: int = 0
+    service_time: float = 0.0  # EWMA of seconds per call
+    shed: int = 0
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """
+    Parse ``"read=32,write=8"`` into ``{"read": 32, "write": 8}``.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+class ConcurrencyLimiter:
+    """
+    Event-loop side admission control shared by all lanes of a worker.
+    """
+
+    def __init__(self, limits: Dict[str, int], total: int, deadline: float):
+        self.total = max(total, 1)
+        # Lanes left out of the spec are only bounded by the shared total
+        limits = {**{name: self.total for name in PRIORITIES}, **limits}
+        self.lanes = {name: Lane(name, limit, PRIORITIES.get(name, max(PRIORITIES.values())))
+                      for name, limit in limits.items()}
+        self.deadline = deadline
+        self.active = 0
+        self._seq = itertools.count()
+        # (priority, seq, lane, future), kept sorted
+        self._waiters: List[Tuple[int, int, Lane, asyncio.Future]] = []
+
+    def _has_room(self, lane: Lane) -> bool:
+        return self.active < self.total and lane.active < lane.limit
+
+    def _admit(self, lane: Lane) -> None:
+        self.active += 1
+        lane.active += 1
+
+    def _expected_wait(self, lane: Lane) -> float:
+        ahead = sum(1 for waiter in self._waiters if waiter[0] <= lane.priority)
+        return (ahead + 1) * lane.service_time / max(min(lane.limit, self.total), 1)
+
+    def _overloaded(self, lane: Lane, expected: float) -> HTTPException:
+        lane.shed += 1
+        logger.warning("Shedding %s request: %d running, %d queued",
+                       lane.name, lane.active, len(self._waiters))
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is overloaded, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(expected)))},
+        )
+
+    async def acquire(self, name: str) -> Lane:
+        lane = self.lanes[name]
+        # Only waiters that could take a free slot right now go first; those
+        # held back by their own lane limit must not block other lanes
+        blocked = any(waiter[0] <= lane.priority and waiter[2].active < waiter[2].limit
+                      for waiter in self._waiters)
+        if not blocked and self._has_room(lane):
+            self._admit(lane)
+            return lane
+
+        expected = self._expected_wait(lane)
+        if expected > self.deadline:
+            raise self._overloaded(lane, expected)
+        future = asyncio.get_running_loop().create_future()
+        waiter = (lane.priority, next(self._seq), lane, future)
+        bisect.insort(self._waiters, waiter, key=lambda w: w[:2])
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.deadline)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            if future.done():
+                self.release(lane, None)  # admitted just as the client went away
+            else:
+                self._waiters.remove(waiter)
+            raise
+        if not future.done():
+            self._waiters.remove(waiter)
+            raise self._overloaded(lane, self.deadline)
+        return lane
+
+    def release(self, lane: Lane, elapsed: Optional[float]) -> None:
+        self.active -= 1
+        lane.active -= 1
+        if elapsed is not None:
+            lane.service_time += _EWMA_WEIGHT * (elapsed - lane.service_time)
+        i = 0
+        while i < len(self._waiters) and self.active < self.total:
+            waiting_lane, future = self._waiters[i][2], self._waiters[i][3]
+            if waiting_lane.active < waiting_lane.limit:
+                del self._waiters[i]
+                self._admit(waiting_lane)
+                future.set_result(None)
+            else:
+                i += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            lane.name: {
+                "limit": lane.limit,
+                "active": lane.active,
+                "queued": sum(1 for w in self._waiters if w[2] is lane),
+                "service_ms": round(lane.service_time * 1000, 3),
+                "shed": lane.shed,
+            }
+            for lane in self.lanes.values()
+        }
+
+
+def install(settings: Optional[Settings] = None) -> ConcurrencyLimiter:
+    """
+    Split the worker threads between the lanes and the default threadpool and
+    (re)create the limiter; call from the event loop.
+    """
+    global _limiter, _lane_threads  # pylint: disable=global-statement
+    settings = settings or get_settings()
+    reserved = max(settings.THREADPOOL_RESERVED, 1)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = reserved
+    _limiter = ConcurrencyLimiter(
+        parse_limits(settings.CONCURRENCY_LIMITS),
+        settings.THREADPOOL_SIZE - reserved,
+        settings.CONCURRENCY_QUEUE_DEADLINE_MS / 1000.0,
+    )
+    _lane_threads = anyio.CapacityLimiter(_limiter.total)
+    return _limiter
+
+
+def limiter() -> ConcurrencyLimiter:
+    return _limiter or install()
+
+
+async def run_limited(lane: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run blocking ``func`` on the lane threads within ``lane``'s limits.
+
+    Raises:
+        HTTPException: 503 with ``Retry-After`` when the call is shed.
+    """
+    gate = limiter()
+    acquired = await gate.acquire(lane)
+    started = time.perf_counter()
+    try:
+        return await run_in_limiter(_lane_threads, func, *args, **kwargs)
+    finally:
+        gate.release(acquired, time.perf_counter() - started)
+
+
+async def run_probe(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking health check on threads no request work can take.
+    """
+    global _probe_threads  # pylint: disable=global-statement
+    if _probe_threads is None:
+        _probe_threads = anyio.CapacityLimiter(PROBE_THREADS)
+    return await run_in_limiter(_probe_threads, func, *args, **kwargs)
@@ -11,8 +11,93 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     CACHE_TTL_SECONDS: int = 90
+    # Adaptive TTL bounds and access tracking (see app/access_stats.py)
+    CACHE_TTL_MIN_SECONDS: int = 30
+    CACHE_TTL_MAX_SECONDS: int = 3600
+    ACCESS_SAMPLE_RATE: float = 0.1
+    ACCESS_HOT_THRESHOLD: float = 50.0
+    ACCESS_HALF_LIFE_SECONDS: int = 3600
+    CACHE_WARM_ON_STARTUP: bool = True
+    CACHE_WARM_TOP_N: int = 500
+    CACHE_WARM_BATCH_SIZE: int = 100
     CACHE_PREFIX: str = "article:"
+    # Cache entry encoding (see app/cache_codec.py)
+    CACHE_CODEC: str = "binary"  # "binary" (msgpack) or "json"
+    CACHE_COMPRESS_THRESHOLD: int = 1024
+    CACHE_COMPRESS_LEVEL: int = 6
+    CACHE_SPLIT_BODY: bool = False
+    # Serve cached GET /articles/{id} from the event loop, without a DB session or thread
+    # (see app/fast_path.py)
+    CACHE_FAST_PATH: bool = True
+    # Not-found answers are cached this long; 0 disables
+    NEGATIVE_CACHE_TTL_SECONDS: int = 15
+    # Redis bitmap of existing ids, answering unknown ids without the DB (see app/existence.py)
+    EXISTENCE_FILTER_ENABLED: bool = False
+    # Responses to writes sent with an Idempotency-Key are replayed this long
+    # (see app/idempotency.py)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # A claimed key expires after this long if its request never completes
+    IDEMPOTENCY_LOCK_SECONDS: int = 30
+    # Duplicates wait this long for the in-flight request before a 409
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
     API_KEY: str | None = "47da9ef4-0a22-4625-89f3-ef7025a64192"
+    # Per-worker cache of keys from the api_keys table (see app/api_keys.py)
+    API_KEY_CACHE_TTL_SECONDS: int = 300
+    API_KEY_NEGATIVE_TTL_SECONDS: int = 30
+    # Least recently used prefixes are dropped past this many cached entries
+    API_KEY_CACHE_MAX_ENTRIES: int = 10000
+    # Worker threads; THREADPOOL_RESERVED of them are kept out of the route lanes
+    # for dependency setup, admin routes and background jobs (see app/concurrency.py)
+    THREADPOOL_SIZE: int = 40
+    THREADPOOL_RESERVED: int = 4
+    CONCURRENCY_LIMITS: str = "read=36,write=12,list=8,search=6"
+    # Queued route work is answered with 503 + Retry-After past this wait
+    CONCURRENCY_QUEUE_DEADLINE_MS: float = 1000.0
+    # statement_timeout per route (by endpoint name, 0 = none), default for the rest
+    # (see app/query_guard.py)
+    STATEMENT_TIMEOUT_MS: int = 5000
+    STATEMENT_TIMEOUTS: str = "search_articles=2000,list_articles=3000,warm_cache=0"
+    # Request bodies are buffered before the route runs; larger ones get a 413
+    MAX_REQUEST_BODY_BYTES: int = 1048576
+    # Opt-in request profiling (see app/profiling.py)
+    PROFILING_ENABLED: bool = False
+    PROFILE_HEADER: str = "x-profile"
+    PROFILE_TOKEN: str | None = None
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = 1.0
+    PROFILE_DIR: str = "/tmp/rocket-profiles"
+    SQL_COUNT_THRESHOLD: int = 20
+    REDIS_COUNT_THRESHOLD: int = 20
+    # Fault and latency injection for load tests, never enable in production (see app/faults.py)
+    FAULT_INJECTION_ENABLED: bool = False
+    FAULT_RULES: str = ""
+    # Opt-in tracing with head sampling (see app/tracing.py)
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 0.01
+    TRACE_EXPORTER: str = "stdout"  # stdout | file | none | module:factory
+    TRACE_FILE: str = "/tmp/rocket-traces.jsonl"
+    # Slow-query log (see app/slow_query_log.py); 0 disables it
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_REDACT_PARAMS: bool = True
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_ANALYZE: bool = False
+    SLOW_QUERY_BUFFER_SIZE: int = 200
+    SLOW_QUERY_LOG_PATH: str | None = "/tmp/rocket-slow-queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+    # Facet counters are rebuilt from Postgres this often; 0 disables
+    FACET_RECONCILE_SECONDS: int = 3600
+    # Monthly articles partitions are created this many months ahead, checked
+    # every PARTITION_MAINTENANCE_SECONDS (0 disables)
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_MAINTENANCE_SECONDS: int = 86400
+    # GET /articles/changes: longest long-poll, database re-check interval while
+    # waiting, and how long deletion tombstones (hence cursors) stay valid
+    CHANGE_FEED_MAX_WAIT_SECONDS: int = 30
+    CHANGE_FEED_POLL_SECONDS: float = 1.0
+    CHANGE_FEED_RETENTION_DAYS: int = 30
+    # Partitions older than this many months are detached into articles_archive; 0 keeps all
+    PARTITION_ARCHIVE_AFTER_MONTHS: int = 0
     class Config:
         env_file = ".env"
 
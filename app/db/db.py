@@ -1,6 +1,10 @@
+from typing import Callable
+
+from fastapi import Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 from ..config import get_settings
+from ..query_guard import TIMEOUT_INFO_KEY, statement_timeout_ms
 
 s = get_settings()
 
@@ -15,8 +19,19 @@ SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 class Base(DeclarativeBase):
     pass
 
-def get_db():
+def get_session_factory() -> Callable[[], Session]:
+    """
+    For dependencies that only sometimes need the database: they open (and
+    close) a session themselves instead of taking one through ``get_db``.
+    """
+    return SessionLocal
+
+
+def get_db(request: Request):
     db = SessionLocal()
+    # Applied with SET LOCAL at the start of each transaction (app/query_guard.py)
+    route = request.scope.get("route")
+    db.info[TIMEOUT_INFO_KEY] = statement_timeout_ms(getattr(route, "name", None))
     try:
         yield db
     finally:
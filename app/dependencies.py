@@ -1,9 +1,66 @@
-from fastapi import Header, HTTPException, status
+from typing import Callable, Optional
+
+from fastapi import Depends, Header, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from . import api_keys
 from .config import get_settings
+from .db.db import get_session_factory
+from .profiling import run_in_threadpool
+from .services import api_keys as key_service
 
 s = get_settings()
 
-async def require_api_key(x_api_key: str | None = Header(default=None)):
-    if s.API_KEY and x_api_key != s.API_KEY:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
-                            detail="Invalid or missing API key")
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                         detail="Invalid or missing API key")
+
+
+def _load_key(open_session: Callable[[], Session], prefix: str) -> Optional[api_keys.KeyInfo]:
+    db = open_session()
+    try:
+        return key_service.load_key(db, prefix)
+    finally:
+        db.close()
+
+
+async def require_api_key(
+    request: Request,
+    x_api_key: str | None = Header(default=None),
+    open_session: Callable[[], Session] = Depends(get_session_factory),
+):
+    """
+    Authenticate ``x-api-key`` and expose the key as ``request.state.api_key``.
+
+    Warm lookups are served from the in-process cache; the database is only
+    read, in a session opened just for it, for a prefix not seen within
+    ``API_KEY_CACHE_TTL_SECONDS``. Without a static ``API_KEY`` the API stays
+    open and unknown keys pass anonymously.
+    """
+    key = None
+    if x_api_key:
+        resolved, key = api_keys.lookup_cached(x_api_key)
+        if not resolved:
+            prefix = api_keys.parse_prefix(x_api_key)
+            key = await run_in_threadpool(_load_key, open_session, prefix)
+            api_keys.remember(prefix, key)
+            if not api_keys.verify(key, x_api_key):
+                key = None
+    if key is None:
+        if s.API_KEY:
+            raise _unauthorized()
+        return
+    request.state.api_key = key
+
+
+async def require_admin(request: Request):
+    """
+    Allow only admin keys (the static ``API_KEY`` included); runs after ``require_api_key``.
+    """
+    key = getattr(request.state, "api_key", None)
+    if key is None and not s.API_KEY:
+        return
+    if key is None or not key.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Admin API key required")
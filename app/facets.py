@@ -0,0 +1,83 @@
+"""
+Per-author and per-tag article counts kept in Redis hashes.
+
+The services apply +1/-1 deltas on create/update/delete, so reading every
+facet is a single HGETALL per kind. ``replace`` swaps in counts recomputed
+from Postgres, which the periodic reconciliation uses to repair any drift
+(e.g. a write that landed while Redis was unreachable).
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .cache import redis_client
+from .schemas.schemas import split_tags
+
+KINDS = ("author", "tag")
+RECONCILE_LOCK_KEY = "facets:reconcile:lock"
+
+
+def facet_key(kind: str) -> str:
+    return f"facets:{kind}"
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def apply_change(old: Optional[Tuple[str, str]], new: Optional[Tuple[str, str]]) -> None:
+    """
+    Move one article's contribution from ``old`` to ``new`` ``(author, tags)``.
+
+    Either side may be None (create / delete). Unchanged authors and tags cancel
+    out, so an update touching neither costs no Redis round trip.
+    """
+    deltas: Dict[str, Dict[str, int]] = {kind: defaultdict(int) for kind in KINDS}
+    for side, sign in ((old, -1), (new, 1)):
+        if side is None:
+            continue
+        author, tags = side
+        deltas["author"][author] += sign
+        for tag in set(split_tags(tags)):
+            deltas["tag"][tag] += sign
+
+    changes = [(kind, value, d) for kind in KINDS for value, d in deltas[kind].items() if d]
+    if not changes:
+        return
+    pipe = redis_client().pipeline(transaction=False)
+    for kind, value, delta in changes:
+        pipe.hincrby(facet_key(kind), value, delta)
+    pipe.execute()
+
+
+def counts(limit: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """
+    Return every facet sorted by count (descending), optionally truncated to ``limit``.
+    """
+    pipe = redis_client().pipeline(transaction=False)
+    for kind in KINDS:
+        pipe.hgetall(facet_key(kind))
+
+    result: Dict[str, List[Dict]] = {}
+    for kind, raw in zip(KINDS, pipe.execute()):
+        items = [(_decode(k), int(v)) for k, v in raw.items() if int(v) > 0]
+        items.sort(key=lambda kv: (-kv[1], kv[0]))
+        result[kind] = [{"value": value, "count": count} for value, count in items[:limit]]
+    return result
+
+
+def replace(recomputed: Dict[str, Dict[str, int]]) -> None:
+    """
+    Atomically swap in counts recomputed from the database.
+    """
+    r = redis_client()
+    pipe = r.pipeline(transaction=True)
+    for kind in KINDS:
+        values = recomputed.get(kind) or {}
+        staging = f"{facet_key(kind)}:rebuild"
+        pipe.delete(staging)
+        if values:
+            pipe.hset(staging, mapping=values)
+            pipe.rename(staging, facet_key(kind))
+        else:
+            pipe.delete(facet_key(kind))
+    pipe.execute()
@@ -0,0 +1,156 @@
+"""
+Event-loop fast path for cached ``GET /articles/{id}``.
+
+The regular route opens a DB session, resolves the auth and rate-limit
+dependencies, hops to a worker thread for blocking Redis calls and
+re-validates the cached article as an ``ArticleOut``. ``ArticleFastPath``
+answers cache hits before any of that: the key is checked against the static
+key and the in-process key cache, then the rate-limit counter and the article
+entry go out in a single pipelined round trip on an asyncio Redis client.
+Hits (and cached not-founds) are answered right away; a sampled hit adds to
+the article's access score once the response has been sent, off the client's
+critical path. Everything else (misses, ``fields=`` projections, keys not yet
+in the key cache, Redis errors) falls through to the regular route, which then
+skips the rate-limit count already taken here.
+
+Rate-limit counters are kept in the cache Redis, which is where
+``app.rate_limit`` keeps them too unless it is pointed elsewhere.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Callable, Optional
+
+import redis.asyncio
+from fastapi.responses import JSONResponse, Response
+from redis.exceptions import RedisError
+from starlette.background import BackgroundTask
+
+from . import access_stats, api_keys, cache, rate_limit, tracing
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_PATH = re.compile(r"/articles/(\d+)")
+
+_settings = get_settings()
+# Asyncio clients are bound to the loop they were created on
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_client: Optional[redis.asyncio.Redis] = None
+
+
+def client() -> redis.asyncio.Redis:
+    global _loop, _client  # pylint: disable=global-statement
+    loop = asyncio.get_running_loop()
+    if _client is None or _loop is not loop:
+        _loop, _client = loop, redis.asyncio.Redis(
+            host=_settings.REDIS_HOST, port=_settings.REDIS_PORT, db=_settings.REDIS_DB)
+    return _client
+
+
+async def close() -> None:
+    global _loop, _client  # pylint: disable=global-statement
+    loop, redis_client = _loop, _client
+    _loop, _client = None, None
+    if redis_client is not None and loop is asyncio.get_running_loop():
+        await redis_client.aclose()
+
+
+def render(article: dict) -> bytes:
+    """
+    Serialize a cached article the way the route's ``ArticleOut`` response would.
+    """
+    return json.dumps(article, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _header(scope: dict, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _check_limit(redis_client: redis.asyncio.Redis, counter: str, limit: int,
+                       current: int, ttl: int) -> Optional[Response]:
+    """
+    The 429 response when the counter went over ``limit``, else None.
+    """
+    if ttl < 0:
+        await redis_client.expire(counter, rate_limit.WINDOW)
+        ttl = rate_limit.WINDOW
+    if current > limit:
+        error = rate_limit.exceeded(ttl)
+        return JSONResponse({"detail": error.detail}, status_code=error.status_code)
+    return None
+
+
+async def _record_read(redis_client: redis.asyncio.Redis, article_id: int, weight: float) -> None:
+    try:
+        await redis_client.zincrby(access_stats.HOT_KEY, weight, str(article_id))
+    except RedisError as e:
+        logger.warning("Could not record a fast path read of article %s: %s", article_id, e)
+
+
+class ArticleFastPath:
+    """
+    ASGI middleware answering cached article reads on the event loop.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        match = None
+        if scope["type"] == "http" and scope["method"] == "GET" and not scope["query_string"]:
+            match = ARTICLE_PATH.fullmatch(scope["path"])
+        response = None
+        if match is not None:
+            try:
+                with tracing.span("fast_path.get_article", "cache"):
+                    response = await self._lookup(scope, int(match.group(1)))
+            except RedisError as e:
+                logger.warning("Fast path lookup failed, falling back: %s", e)
+        if response is None:
+            await self.app(scope, receive, send)
+        else:
+            await response(scope, receive, send)
+
+    async def _lookup(self, scope: dict, article_id: int) -> Optional[Response]:
+        raw_key = _header(scope, b"x-api-key")
+        key = None
+        if raw_key:
+            resolved, key = api_keys.lookup_cached(raw_key)
+            if not resolved:
+                return None
+        if key is None and _settings.API_KEY:
+            return None  # the route answers 401
+
+        redis_client = client()
+        pipe = redis_client.pipeline(transaction=False)
+        counter, limit = None, rate_limit.LIMIT
+        if rate_limit.redis_client() is not None:
+            counter, limit = rate_limit.limit_for(key, raw_key, (scope.get("client") or ("",))[0])
+            pipe.incr(counter)
+            pipe.ttl(counter)
+        pipe.mget(cache.article_keys(article_id))
+        results = await pipe.execute()
+
+        if counter is not None:
+            scope.setdefault("state", {})[rate_limit.COUNTED_STATE] = True
+            rejected = await _check_limit(redis_client, counter, limit, results[0], results[1])
+            if rejected is not None:
+                return rejected
+
+        article = cache.parse_article(results[-1])
+        if article is cache.MISSING:
+            return JSONResponse({"detail": "Article not found"}, status_code=404)
+        if article is None:
+            return None
+        weight = access_stats.sample_read()
+        background = None
+        if weight:
+            background = BackgroundTask(_record_read, redis_client, article_id, weight)
+        return Response(render(article), media_type="application/json", background=background)
@@ -0,0 +1,254 @@
+"""
+Fault and latency injection for Redis and Postgres, for load tests and benchmarks.
+
+Off by default: nothing is hooked unless ``FAULT_INJECTION_ENABLED`` is set,
+and the ``/admin/faults`` endpoints answer 404 otherwise. When enabled, every
+Redis command (the cache, rate limiter, index and fast-path clients alike),
+SQL statement and pool checkout goes through ``FAULT_RULES``, a comma-separated
+list of ``target:op=fault[@probability]`` items:
+
+- ``target`` is ``redis`` or ``sql``; ``op`` is a Redis command (``GET``,
+  ``pipeline``), a SQL verb (``select``, ``insert``...), ``connect`` for pool
+  checkouts, or ``*``.
+- ``fault`` is ``delay:<ms>``, ``delay:<lo>-<hi>`` (uniform), ``delay:~<mean>``
+  (exponential, for long tails), ``error``, ``timeout`` or ``drop`` (the
+  connection is closed first, so reconnect costs show up too).
+
+For example ``redis:GET=delay:200@0.05,sql:connect=delay:~300@0.1,sql:*=timeout@0.01``.
+Errors are the ones the real drivers raise, so timeouts, retries and
+fallbacks are exercised exactly as they would be in an incident. Rules can
+be swapped at runtime with ``PUT /admin/faults``; that only affects the
+worker serving the request.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.errors
+import redis
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+
+from . import redis_hooks
+from .config import Settings, get_settings
+from .query_guard import QUERY_CANCELED
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("redis", "sql")
+KINDS = ("delay", "error", "timeout", "drop")
+
+_injector: Optional["FaultInjector"] = None
+
+
+# Looked up by SQLSTATE: psycopg2.errors classes are generated at import time
+_QueryCanceled = psycopg2.errors.lookup(QUERY_CANCELED)
+
+
+class InjectedQueryCanceled(_QueryCanceled):
+    # Server-side errors carry their SQLSTATE; this one is raised client-side
+    pgcode = QUERY_CANCELED
+
+
+@dataclass(slots=True)
+class FaultRule:
+    target: str
+    op: str
+    kind: str
+    low_ms: float = 0.0
+    high_ms: float = 0.0
+    exponential: bool = False
+    probability: float = 1.0
+    hits: int = 0
+
+    def matches(self, target: str, op: str) -> bool:
+        return self.target == target and self.op in ("*", op)
+
+    def delay(self) -> float:
+        if self.exponential:
+            return random.expovariate(1000.0 / self.low_ms) if self.low_ms > 0 else 0.0
+        return random.uniform(self.low_ms, self.high_ms) / 1000.0
+
+    def describe(self) -> str:
+        fault = self.kind
+        if self.kind == "delay":
+            if self.exponential:
+                fault += f":~{self.low_ms:g}"
+            elif self.low_ms == self.high_ms:
+                fault += f":{self.low_ms:g}"
+            else:
+                fault += f":{self.low_ms:g}-{self.high_ms:g}"
+        return f"{self.target}:{self.op}={fault}@{self.probability:g}"
+
+
+def _parse_rule(item: str) -> FaultRule:
+    where, _, fault = item.partition("=")
+    target, _, op = where.strip().partition(":")
+    fault, _, probability = fault.strip().partition("@")
+    kind, _, amount = fault.partition(":")
+    if target not in TARGETS or not op or kind not in KINDS:
+        raise ValueError(f"Invalid fault rule {item!r}")
+    if target == "sql":
+        op = op.lower()
+    elif op not in ("*", "pipeline"):
+        op = op.upper()
+    rule = FaultRule(target, op, kind, probability=float(probability) if probability else 1.0)
+    if kind == "delay":
+        if not amount:
+            raise ValueError(f"Missing delay in fault rule {item!r}")
+        if amount.startswith("~"):
+            rule.exponential, rule.low_ms = True, float(amount[1:])
+        else:
+            low, _, high = amount.partition("-")
+            rule.low_ms, rule.high_ms = float(low), float(high or low)
+    if not 0.0 <= rule.probability <= 1.0:
+        raise ValueError(f"Probability out of range in fault rule {item!r}")
+    return rule
+
+
+def parse_rules(spec: str) -> List[FaultRule]:
+    """
+    Parse a ``FAULT_RULES`` spec.
+
+    Raises:
+        ValueError: On a malformed item.
+    """
+    return [_parse_rule(item) for item in filter(None, (part.strip() for part in spec.split(",")))]
+
+
+class FaultInjector:
+    """
+    Rolls the active rules for each operation; shared by all threads of a worker.
+    """
+
+    def __init__(self, rules: List[FaultRule]):
+        self.rules = rules
+        self.lock = threading.Lock()
+
+    def set_rules(self, rules: List[FaultRule]) -> None:
+        with self.lock:
+            self.rules = rules
+
+    def roll(self, target: str, op: str) -> Tuple[float, Optional[str]]:
+        """
+        Return the total delay of the matching delay rules that fire and the
+        kind of the first failure rule that fires, if any.
+        """
+        delay, failure = 0.0, None
+        for rule in self.rules:
+            if not rule.matches(target, op) or random.random() >= rule.probability:
+                continue
+            rule.hits += 1
+            if rule.kind == "delay":
+                delay += rule.delay()
+            elif failure is None:
+                failure = rule.kind
+        return delay, failure
+
+    def fire(self, target: str, op: str) -> Optional[str]:
+        """
+        Sleep for the rolled delay and return the failure kind, if any.
+        """
+        delay, failure = self.roll(target, op)
+        if delay:
+            time.sleep(delay)
+        return failure
+
+    async def fire_async(self, target: str, op: str) -> Optional[str]:
+        delay, failure = self.roll(target, op)
+        if delay:
+            await asyncio.sleep(delay)
+        return failure
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [{"rule": rule.describe(), "hits": rule.hits} for rule in self.rules]
+
+
+def injector() -> Optional[FaultInjector]:
+    return _injector
+
+
+def _redis_failure(failure: str) -> Exception:
+    if failure == "timeout":
+        return redis.TimeoutError("Timeout reading from socket (injected)")
+    return redis.ConnectionError("Connection reset by peer (injected)")
+
+
+def _redis_fault(proceed: Callable[[], Any], client: Any, op: str, _args: tuple) -> Any:
+    failure = _injector.fire("redis", op) if _injector is not None else None
+    if failure:
+        if op == "pipeline":
+            client.reset()
+        if failure == "drop":
+            client.connection_pool.disconnect()
+        raise _redis_failure(failure)
+    return proceed()
+
+
+async def _async_redis_fault(proceed: Callable[[], Awaitable[Any]], client: Any, op: str,
+                             _args: tuple) -> Any:
+    # The asyncio client of the cached-read fast path (app/fast_path.py)
+    failure = await _injector.fire_async("redis", op) if _injector is not None else None
+    if failure:
+        if op == "pipeline":
+            await client.reset()
+        if failure == "drop":
+            await client.connection_pool.disconnect()
+        raise _redis_failure(failure)
+    return await proceed()
+
+
+def _before_execute(conn, _cursor, statement, parameters, _context, _executemany) -> None:
+    if _injector is None:
+        return
+    verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    failure = _injector.fire("sql", verb)
+    if failure == "timeout":
+        raise exc.OperationalError(statement, parameters, InjectedQueryCanceled(
+            "canceling statement due to statement timeout (injected)"))
+    if failure:
+        orig = psycopg2.OperationalError("server closed the connection unexpectedly (injected)")
+        if failure == "drop":
+            conn.invalidate(orig)
+        raise exc.OperationalError(statement, parameters, orig,
+                                   connection_invalidated=failure == "drop")
+
+
+def _checkout(dbapi_connection, _record, _proxy) -> None:
+    failure = _injector.fire("sql", "connect") if _injector is not None else None
+    if failure == "drop":
+        # Handed out dead, like a connection the server closed while pooled:
+        # the first statement fails and the pool reconnects afterwards
+        dbapi_connection.close()
+    elif failure:
+        raise exc.OperationalError("connect", None, psycopg2.OperationalError(
+            "could not connect to server (injected)"))
+
+
+def install(engine: Engine, settings: Optional[Settings] = None) -> FaultInjector:
+    """
+    Hook the engine and Redis clients and load ``FAULT_RULES``.
+    """
+    global _injector  # pylint: disable=global-statement
+    settings = settings or get_settings()
+    rules = parse_rules(settings.FAULT_RULES)
+    if _injector is None:
+        _injector = FaultInjector(rules)
+    else:
+        _injector.set_rules(rules)
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        # First in line, so other listeners never see a statement that is not sent
+        event.listen(engine, "before_cursor_execute", _before_execute, insert=True)
+        event.listen(engine, "checkout", _checkout)
+    redis_hooks.register(_redis_fault)
+    redis_hooks.register_async(_async_redis_fault)
+    if rules:
+        logger.warning("Fault injection active: %s", ", ".join(rule.describe() for rule in rules))
+    return _injector
@@ -0,0 +1,187 @@
+"""
+``Idempotency-Key`` support for write endpoints.
+
+A POST/PUT/PATCH/DELETE carrying the header claims ``idem:{scope}:{key}`` in
+Redis (SET NX) before it reaches the route; the scope is a hash of the API key,
+method and path. Its response is then stored there for
+``IDEMPOTENCY_TTL_SECONDS`` and replayed to retries (marked with
+``idempotent-replayed: true``) without touching the database. A duplicate
+arriving while the first request is still running polls for its result for up
+to ``IDEMPOTENCY_WAIT_SECONDS``, then gets a 409. Reusing a key with a
+different body is a 422.
+
+Only deterministic outcomes are stored: 5xx, 401, 403 and 429 responses
+release the key so a retry runs again.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from typing import Any, Callable, Optional
+
+from .cache import redis_client
+from .config import Settings, get_settings
+from .profiling import run_in_threadpool
+
+HEADER = b"idempotency-key"
+METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+MAX_KEY_LENGTH = 255
+_POLL_SECONDS = 0.05
+_NOT_STORED = frozenset({401, 403, 429})
+
+
+def storage_key(scope_hash: str, key: str) -> str:
+    return f"idem:{scope_hash}:{key}"
+
+
+def _scope_hash(scope: dict, api_key: bytes) -> str:
+    raw = b"\0".join((api_key, scope["method"].encode(), scope["path"].encode()))
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def _fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def _load(raw: Any) -> Optional[dict]:
+    return json.loads(raw) if raw else None
+
+
+def _json_response(status: int, detail: str, extra_headers: tuple = ()) -> dict:
+    return {
+        "status": status,
+        "headers": [["content-type", "application/json"], *extra_headers],
+        "body": base64.b64encode(json.dumps({"detail": detail}).encode()).decode(),
+    }
+
+
+async def _read_body(receive: Callable) -> bytes:
+    body, more = b"", True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    return body
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware storing and replaying responses by ``Idempotency-Key``.
+    """
+
+    def __init__(self, app: Any, settings: Optional[Settings] = None):
+        self.app = app
+        settings = settings or get_settings()
+        self.ttl = settings.IDEMPOTENCY_TTL_SECONDS
+        self.lock_ttl = settings.IDEMPOTENCY_LOCK_SECONDS
+        self.wait = settings.IDEMPOTENCY_WAIT_SECONDS
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["method"] not in METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers", []))
+        key = headers.get(HEADER, b"").decode("latin-1").strip()
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            error = _json_response(
+                400, f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+            await self._send_stored(send, error, replayed=False)
+            return
+
+        body = await _read_body(receive)
+        fingerprint = _fingerprint(body)
+        rkey = storage_key(_scope_hash(scope, headers.get(b"x-api-key", b"")), key)
+
+        stored = await self._claim_or_wait(rkey, fingerprint)
+        if stored is not None:
+            await self._answer_duplicate(send, stored, fingerprint)
+            return
+
+        replayed_body = False
+
+        async def _receive() -> dict:
+            nonlocal replayed_body
+            if not replayed_body:
+                replayed_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response: dict = {"status": 500, "headers": [], "body": b""}
+
+        async def _send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[k.decode("latin-1"), v.decode("latin-1")]
+                                       for k, v in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, _receive, _send)
+        except Exception:
+            await run_in_threadpool(redis_client().delete, rkey)
+            raise
+        await self._store(rkey, fingerprint, response)
+
+    async def _answer_duplicate(self, send: Callable, stored: dict, fingerprint: str) -> None:
+        if stored["fp"] != fingerprint:
+            error = _json_response(
+                422, "Idempotency-Key was already used with a different request body")
+            await self._send_stored(send, error, replayed=False)
+        elif stored.get("state") == "pending":
+            error = _json_response(409, "A request with this Idempotency-Key is still in progress",
+                                   (["retry-after", "1"],))
+            await self._send_stored(send, error, replayed=False)
+        else:
+            await self._send_stored(send, stored, replayed=True)
+
+    async def _claim_or_wait(self, rkey: str, fingerprint: str) -> Optional[dict]:
+        """
+        Return None once this request owns the key, else the stored entry
+        (still ``pending`` if the wait ran out).
+        """
+        pending = json.dumps({"state": "pending", "fp": fingerprint})
+        deadline = time.monotonic() + self.wait
+        while True:
+            claimed = await run_in_threadpool(
+                redis_client().set, rkey, pending, nx=True, ex=self.lock_ttl)
+            if claimed:
+                return None
+            stored = _load(await run_in_threadpool(redis_client().get, rkey))
+            if stored is None:
+                continue  # released between SET and GET: try to claim again
+            if (stored.get("state") != "pending" or stored["fp"] != fingerprint
+                    or time.monotonic() >= deadline):
+                return stored
+            await asyncio.sleep(_POLL_SECONDS)
+
+    async def _store(self, rkey: str, fingerprint: str, response: dict) -> None:
+        status = response["status"]
+        if status >= 500 or status in _NOT_STORED:
+            await run_in_threadpool(redis_client().delete, rkey)
+            return
+        entry = {
+            "state": "done",
+            "fp": fingerprint,
+            "status": status,
+            "headers": [h for h in response["headers"] if h[0].lower() != "content-length"],
+            "body": base64.b64encode(response["body"]).decode(),
+        }
+        await run_in_threadpool(redis_client().set, rkey, json.dumps(entry), ex=self.ttl)
+
+    @staticmethod
+    async def _send_stored(send: Callable, stored: dict, replayed: bool) -> None:
+        body = base64.b64decode(stored["body"])
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in stored["headers"]]
+        headers.append((b"content-length", str(len(body)).encode()))
+        if replayed:
+            headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": stored["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": body})
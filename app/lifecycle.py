@@ -0,0 +1,44 @@
+"""
+Process lifecycle hooks for the multi-worker server (see gunicorn.conf.py).
+
+The engine and the Redis clients are module-level singletons created at import
+time. Creating them opens no connection, so importing the app in the master
+(``preload_app``) is safe as long as every forked worker drops whatever pooled
+connections it inherited before serving requests.
+"""
+import threading
+
+from .db.db import Base, engine
+from . import cache, rate_limit
+
+# Set in the master once the schema exists; forked workers inherit it
+_schema_ready = threading.Event()
+
+
+def prepare_master() -> None:
+    """
+    One-off setup in the master before forking, so workers don't race on DDL.
+    """
+    from . import models  # noqa: F401  # pylint: disable=import-outside-toplevel, unused-import
+
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    _schema_ready.set()
+
+
+def schema_prepared() -> bool:
+    """
+    Whether the master already created the schema, so workers can skip it.
+    """
+    return _schema_ready.is_set()
+
+
+def after_fork() -> None:
+    """
+    Give a freshly forked worker its own DB and Redis connection pools.
+    """
+    # close=False: the parent's sockets must not be shut down from the child
+    engine.dispose(close=False)
+    for client in (cache.redis_client(), rate_limit.redis_client()):
+        if client is not None:
+            client.connection_pool.reset()
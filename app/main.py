@@ -1,32 +1,158 @@
+import asyncio
+import logging
 import os
+from typing import Any, Callable, Coroutine, List
 
 from fastapi import FastAPI
 from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
 import redis
 from redis.exceptions import RedisError
 
-from .db.db import Base, engine
-from .routers import articles
-from .config import get_settings
+from .db.db import Base, engine, SessionLocal
+from .routers import admin, articles
+from .config import Settings, get_settings
+from . import (
+    access_stats, api_keys, cache, change_feed, concurrency, existence, facets, fast_path, faults,
+    idempotency, lifecycle, profiling, query_guard, slow_query_log, tracing,
+)
+from .services import articles as article_service
+
+logger = logging.getLogger(__name__)
 
 
 def _is_true(v: str | None) -> bool:
     return (v or "").lower() in {"1", "true", "yes", "y"}
 
 
+def _with_session(job: Callable[[Session], Any]) -> Callable[[], Any]:
+    def _run() -> Any:
+        db = SessionLocal()
+        try:
+            return job(db)
+        finally:
+            db.close()
+    return _run
+
+
+async def _run_locked(name: str, lock_key: str, lock_ttl: int, job: Callable[[], Any]) -> None:
+    # One worker per period does the work; the others skip
+    try:
+        if await run_in_threadpool(cache.try_lock, lock_key, lock_ttl):
+            await run_in_threadpool(job)
+    except (SQLAlchemyError, RedisError):
+        logger.exception("%s failed", name)
+
+
+async def _run_periodically(name: str, interval: int, lock_key: str,
+                            job: Callable[[], Any]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await _run_locked(name, lock_key, interval // 2, job)
+
+
+def _background_jobs(settings: Settings) -> List[Coroutine[Any, Any, None]]:
+    """
+    The periodic and one-off startup jobs enabled by ``settings``.
+    """
+    jobs = []
+    if settings.FACET_RECONCILE_SECONDS > 0:
+        jobs.append(_run_periodically(
+            "Facet reconciliation", settings.FACET_RECONCILE_SECONDS,
+            facets.RECONCILE_LOCK_KEY, _with_session(article_service.reconcile_facets)))
+    if settings.PARTITION_MAINTENANCE_SECONDS > 0:
+        maintain_partitions = _with_session(lambda db: article_service.maintain_partitions(
+            db, settings.PARTITION_MONTHS_AHEAD, settings.PARTITION_ARCHIVE_AFTER_MONTHS))
+        jobs.append(_run_locked(
+            "Partition maintenance", article_service.PARTITION_LOCK_KEY, 300,
+            maintain_partitions))
+        jobs.append(_run_periodically(
+            "Partition maintenance", settings.PARTITION_MAINTENANCE_SECONDS,
+            article_service.PARTITION_LOCK_KEY, maintain_partitions))
+    if settings.CHANGE_FEED_RETENTION_DAYS > 0:
+        jobs.append(_run_periodically(
+            "Tombstone pruning", 86400, article_service.TOMBSTONE_PRUNE_LOCK_KEY,
+            _with_session(lambda db: article_service.prune_tombstones(
+                db, settings.CHANGE_FEED_RETENTION_DAYS))))
+    if settings.ACCESS_HALF_LIFE_SECONDS > 0:
+        jobs.append(_run_periodically(
+            "Access stats decay", settings.ACCESS_HALF_LIFE_SECONDS,
+            access_stats.DECAY_LOCK_KEY, access_stats.decay))
+    if settings.CACHE_WARM_ON_STARTUP:
+        jobs.append(_run_locked(
+            "Cache warm-up", access_stats.WARM_LOCK_KEY, 300,
+            _with_session(lambda db: article_service.warm_cache(
+                db, settings.CACHE_WARM_TOP_N, settings.CACHE_WARM_BATCH_SIZE))))
+    if existence.enabled():
+        jobs.append(_run_locked(
+            "Existence filter rebuild", existence.REBUILD_LOCK_KEY, 600,
+            _with_session(lambda db: existence.is_ready()
+                          or article_service.rebuild_existence_filter(db))))
+    return jobs
+
+
+def _install_instrumentation(application: FastAPI) -> None:
+    # Opt-in profiling: nothing is installed unless PROFILING_ENABLED is set
+    if get_settings().PROFILING_ENABLED:
+        profiling.install(application, engine)
+
+    # Opt-in tracing, same deal with TRACING_ENABLED
+    if get_settings().TRACING_ENABLED:
+        tracing.install(application, engine)
+
+    slow_query_log.install(engine)
+
+    # Test/bench only: degrade Redis and Postgres on purpose (FAULT_INJECTION_ENABLED)
+    if get_settings().FAULT_INJECTION_ENABLED:
+        faults.install(engine)
+
+
 def create_app() -> FastAPI:
     application = FastAPI(title="Rocket Article API", version="0.1.0")
 
     @application.on_event("startup")
     async def _create_tables_on_startup() -> None:
+        # Under gunicorn the master did it before forking (lifecycle.prepare_master)
+        if lifecycle.schema_prepared():
+            return
         from . import models  # noqa: F401  # pylint: disable=import-outside-toplevel, unused-import
 
         await run_in_threadpool(Base.metadata.create_all, engine)
 
+    @application.on_event("startup")
+    async def _start_background_jobs() -> None:
+        settings = get_settings()
+        concurrency.install(settings)
+        jobs = _background_jobs(settings)
+        application.state.background_jobs = [asyncio.create_task(job) for job in jobs]
+        application.state.listeners = [
+            api_keys.start_listener(),
+            change_feed.start_listener(asyncio.get_running_loop()),
+        ]
+
+    @application.on_event("shutdown")
+    async def _stop_background_jobs() -> None:
+        for task in getattr(application.state, "background_jobs", []):
+            task.cancel()
+        for listener in getattr(application.state, "listeners", []):
+            if listener is not None:
+                listener.stop()
+        await fast_path.close()
+
+    application.add_middleware(idempotency.IdempotencyMiddleware)
+    application.add_middleware(query_guard.DisconnectMiddleware)
+    if get_settings().CACHE_FAST_PATH:
+        application.add_middleware(fast_path.ArticleFastPath)
+    application.add_exception_handler(OperationalError, query_guard.handle_operational_error)
+    query_guard.install(engine, SessionLocal)
+
+    _install_instrumentation(application)
+
     # Routes
     application.include_router(articles.router)
+    application.include_router(admin.router)
 
     @application.get("/health")
     async def health():
@@ -38,7 +164,7 @@ def create_app() -> FastAPI:
                 with engine.connect() as conn:
                     conn.execute(text("SELECT 1"))
 
-            await run_in_threadpool(_check_db)
+            await concurrency.run_probe(_check_db)
             status["db"] = True
         except SQLAlchemyError:
             status["db"] = False
@@ -62,7 +188,7 @@ def create_app() -> FastAPI:
                     )
                 # Si no hay config de redis, no lo tomamos como fallo
                 if client is not None:
-                    await run_in_threadpool(client.ping)
+                    await concurrency.run_probe(client.ping)
                 redis_ok = True
             except RedisError:
                 redis_ok = False
@@ -1,2 +1,4 @@
 from .article import Article
-__all__ = ["Article"]
+from .api_key import ApiKey
+from .article_tombstone import ArticleTombstone
+__all__ = ["Article", "ApiKey", "ArticleTombstone"]
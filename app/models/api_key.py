@@ -0,0 +1,20 @@
+from sqlalchemy import String, Integer, Boolean, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.db import Base
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    # Public part of the key, used for lookup; only the SHA-256 of the full key is stored
+    prefix: Mapped[str] = mapped_column(String(16), unique=True, index=True)
+    key_hash: Mapped[str] = mapped_column(String(64))
+    name: Mapped[str] = mapped_column(String(120))
+    # Requests per rate-limit window; None uses RL_LIMIT
+    rate_limit: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    is_admin: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    created_at: Mapped[DateTime] = mapped_column(DateTime,
+                                                 server_default=func.now() # pylint: disable=not-callable
+                                                 )
+    revoked_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
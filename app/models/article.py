@@ -1,11 +1,21 @@
-from sqlalchemy import String, Integer, Text, DateTime, func, UniqueConstraint
+from sqlalchemy import String, Integer, Text, DateTime, Index, Sequence, func
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.db import Base
 
+ARTICLE_ID_SEQ = Sequence("articles_id_seq")
+
+
 class Article(Base):
     __tablename__ = "articles"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # The table is range-partitioned by published_at (monthly, NULLs in the
+    # default partition), so Postgres cannot hold a primary key or a unique
+    # constraint without it. `id` is the ORM identity; (title, author)
+    # uniqueness is enforced by the article_keys table maintained by trigger
+    # (see the partitioning migration).
+    id: Mapped[int] = mapped_column(Integer, ARTICLE_ID_SEQ,
+                                    server_default=ARTICLE_ID_SEQ.next_value(),
+                                    index=True)
     title: Mapped[str] = mapped_column(String(255))
     body: Mapped[str] = mapped_column(Text)
     tags: Mapped[str] = mapped_column(String(255), default="")
@@ -22,5 +32,8 @@ class Article(Base):
                                                  )
 
     __table_args__ = (
-        UniqueConstraint("title", "author", name="uq_title_author"),
+        # Change feed scan order (GET /articles/changes)
+        Index("ix_articles_updated_at_id", "updated_at", "id"),
+        {"postgresql_partition_by": "RANGE (published_at)"},
     )
+    __mapper_args__ = {"primary_key": [id]}
@@ -0,0 +1,17 @@
+from sqlalchemy import Integer, DateTime, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.db import Base
+
+
+class ArticleTombstone(Base):
+    """
+    One row per deleted article, read by the change feed (GET /articles/changes).
+    """
+    __tablename__ = "article_tombstones"
+
+    article_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    deleted_at: Mapped[DateTime] = mapped_column(DateTime,
+                                                 server_default=func.now() # pylint: disable=not-callable
+                                                 )
+
+    __table_args__ = (Index("ix_article_tombstones_deleted_at_id", "deleted_at", "article_id"),)
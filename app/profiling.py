@@ -0,0 +1,238 @@
+"""
+Opt-in per-request profiling and query-count guard.
+
+Nothing in this module is wired up unless ``PROFILING_ENABLED`` is set: the
+middleware, the SQLAlchemy listener and the Redis hooks are only installed by
+``install()``, so a disabled deployment pays no per-request cost.
+
+When enabled, every request counts the SQL statements and Redis commands it
+issues (exposed as ``x-sql-count`` / ``x-redis-count`` response headers and
+logged when above ``SQL_COUNT_THRESHOLD`` / ``REDIS_COUNT_THRESHOLD``). Requests
+carrying ``PROFILE_HEADER: <PROFILE_TOKEN>``, or picked by
+``PROFILE_SAMPLE_RATE``, are additionally sampled and written to ``PROFILE_DIR``
+as folded stacks (``*.folded``), ready for ``flamegraph.pl`` or speedscope.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio.to_thread
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool as _run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import redis_hooks
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_stats: ContextVar[Optional["RequestStats"]] = ContextVar("rocket_request_stats", default=None)
+
+
+@dataclass(slots=True)
+class RequestStats:
+    """
+    Per-request counters shared between the event loop and threadpool workers.
+    """
+    sql: int = 0
+    redis: int = 0
+    threads: set[int] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def count_sql(self, n: int = 1) -> None:
+        with self.lock:
+            self.sql += n
+
+    def count_redis(self, n: int = 1) -> None:
+        with self.lock:
+            self.redis += n
+
+
+def current_stats() -> Optional[RequestStats]:
+    """
+    Return the stats of the request being served, or None outside a request.
+    """
+    return _stats.get()
+
+
+def _followed(func: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wrap ``func`` so the sampler follows the current request into the worker
+    thread running it; unchanged outside a profiled request.
+    """
+    stats = _stats.get()
+    if stats is None:
+        return func
+
+    @functools.wraps(func)
+    def _tracked(*args: Any, **kwargs: Any) -> T:
+        tid = threading.get_ident()
+        stats.threads.add(tid)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.threads.discard(tid)
+
+    return _tracked
+
+
+async def run_in_threadpool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Drop-in for ``fastapi.concurrency.run_in_threadpool`` that lets the sampler
+    follow the request into the worker thread.
+    """
+    return await _run_in_threadpool(_followed(func), *args, **kwargs)
+
+
+async def run_in_limiter(limiter: anyio.CapacityLimiter, func: Callable[..., T],
+                         *args: Any, **kwargs: Any) -> T:
+    """
+    ``run_in_threadpool`` on the threads of ``limiter`` instead of the default ones.
+    """
+    call = functools.partial(_followed(func), *args, **kwargs)
+    return await anyio.to_thread.run_sync(call, limiter=limiter)
+
+
+class _Sampler(threading.Thread):
+    """
+    Wall-clock stack sampler for the threads listed in ``stats.threads``.
+
+    Only threadpool workers running this request's work are sampled: the
+    event-loop thread interleaves every in-flight request, so its stacks
+    cannot be attributed to one of them.
+    """
+
+    def __init__(self, stats: RequestStats, interval: float):
+        super().__init__(name="rocket-profiler", daemon=True)
+        self.stats = stats
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for tid in list(self.stats.threads):
+                frame = frames.get(tid)
+                if frame is not None:
+                    self.samples[_fold(frame)] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _fold(frame: Any) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        parts.append(f"{module}:{code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def _write_profile(directory: str, method: str, path: str, samples: Counter) -> str:
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    filename = os.path.join(directory, f"{int(time.time() * 1000)}-{method}-{slug}.folded")
+    with open(filename, "w", encoding="utf-8") as fh:
+        for stack, count in samples.items():
+            fh.write(f"{stack} {count}\n")
+    return filename
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that counts SQL/Redis calls and optionally samples the request.
+    """
+
+    def __init__(self, app: Any, settings: Settings):
+        self.app = app
+        self.settings = settings
+        self.header = settings.PROFILE_HEADER.lower().encode("latin-1")
+
+    def _should_profile(self, scope: dict) -> bool:
+        token = self.settings.PROFILE_TOKEN
+        if token:
+            for name, value in scope.get("headers", []):
+                if name == self.header and value.decode("latin-1") == token:
+                    return True
+        rate = self.settings.PROFILE_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _stats.set(stats)
+        sampler = None
+        if self._should_profile(scope):
+            sampler = _Sampler(stats, self.settings.PROFILE_INTERVAL_MS / 1000.0)
+            sampler.start()
+
+        async def _send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-count", str(stats.sql).encode()))
+                headers.append((b"x-redis-count", str(stats.redis).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _stats.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                filename = await _run_in_threadpool(
+                    _write_profile, self.settings.PROFILE_DIR,
+                    scope["method"], scope["path"], sampler.samples,
+                )
+                logger.info("Profile written to %s", filename)
+            if (stats.sql > self.settings.SQL_COUNT_THRESHOLD
+                    or stats.redis > self.settings.REDIS_COUNT_THRESHOLD):
+                logger.warning(
+                    "Possible N+1 on %s %s: %d SQL statements, %d Redis commands",
+                    scope["method"], scope["path"], stats.sql, stats.redis,
+                )
+
+
+def _count_sql(*_args: Any) -> None:
+    stats = _stats.get()
+    if stats is not None:
+        stats.count_sql()
+
+
+def _count_redis(proceed: Callable[[], Any], client: Any, op: str, _args: tuple) -> Any:
+    stats = _stats.get()
+    if stats is not None:
+        stats.count_redis(len(client.command_stack) if op == "pipeline" else 1)
+    return proceed()
+
+
+def install(application: FastAPI, engine: Engine, settings: Optional[Settings] = None) -> None:
+    """
+    Wire the profiling middleware and the SQL/Redis counters into the app.
+    """
+    settings = settings or get_settings()
+    if not event.contains(engine, "before_cursor_execute", _count_sql):
+        event.listen(engine, "before_cursor_execute", _count_sql)
+    redis_hooks.register(_count_redis)
+    application.add_middleware(ProfilingMiddleware, settings=settings)
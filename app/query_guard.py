@@ -0,0 +1,211 @@
+"""
+Per-route statement timeouts and query cancellation on client disconnect.
+
+``get_db`` stores the route's budget (``STATEMENT_TIMEOUTS`` by route name,
+``STATEMENT_TIMEOUT_MS`` otherwise) in ``session.info``; every transaction the
+session begins then starts with ``SET LOCAL statement_timeout``.
+
+``DisconnectMiddleware`` buffers the request body (up to
+``MAX_REQUEST_BODY_BYTES``, larger ones get a 413) and keeps listening for
+``http.disconnect`` while the route runs. Statements are tracked per request
+through engine events, so when the client goes away before its response is
+complete, the ones still running are cancelled with the driver's ``cancel()``
+instead of holding a pooled connection and a thread until they finish. The
+cancel opens a connection to the server, so it runs in the loop's executor
+rather than on the event loop.
+
+Cancelled and timed-out statements surface as ``OperationalError``;
+``handle_operational_error`` turns them into a 504, and other operational
+errors (lost connections, failover) into a 503 with ``Retry-After``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_CANCELED = "57014"
+TIMEOUT_INFO_KEY = "statement_timeout_ms"
+
+_settings = get_settings()
+_current: ContextVar[Optional["RequestQueries"]] = ContextVar("rocket_request_queries",
+                                                               default=None)
+
+
+def _parse_budgets(spec: str) -> dict[str, int]:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        budgets[name.strip()] = int(value)
+    return budgets
+
+
+_BUDGETS = _parse_budgets(_settings.STATEMENT_TIMEOUTS)
+
+
+def statement_timeout_ms(route_name: Optional[str]) -> int:
+    """
+    Budget in milliseconds for the named route; 0 means no timeout.
+    """
+    return _BUDGETS.get(route_name or "", _settings.STATEMENT_TIMEOUT_MS)
+
+
+@dataclass(slots=True)
+class RequestQueries:
+    """
+    DBAPI connections currently executing on behalf of one request.
+    """
+    running: set = field(default_factory=set)
+    disconnected: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def cancel_all(self) -> int:
+        # Held throughout: a connection untracked meanwhile goes back to the
+        # pool, and cancelling it there would hit another request's statement
+        with self.lock:
+            self.disconnected = True
+            for dbapi_connection in self.running:
+                try:
+                    dbapi_connection.cancel()
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Could not cancel a running statement")
+            return len(self.running)
+
+
+def _set_timeout(session: Any, _transaction: Any, connection: Any) -> None:
+    timeout = session.info.get(TIMEOUT_INFO_KEY)
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def _track(conn: Any, *_args: Any) -> None:
+    queries = _current.get()
+    if queries is not None:
+        with queries.lock:
+            queries.running.add(conn.connection.dbapi_connection)
+
+
+def _untrack(conn: Any, *_args: Any) -> None:
+    queries = _current.get()
+    if queries is not None:
+        with queries.lock:
+            queries.running.discard(conn.connection.dbapi_connection)
+
+
+def _untrack_on_error(exception_context: Any) -> None:
+    if exception_context.connection is not None:
+        _untrack(exception_context.connection)
+
+
+def install(engine: Engine, session_factory: Any) -> None:
+    if not event.contains(session_factory, "after_begin", _set_timeout):
+        event.listen(session_factory, "after_begin", _set_timeout)
+        event.listen(engine, "before_cursor_execute", _track)
+        event.listen(engine, "after_cursor_execute", _untrack)
+        event.listen(engine, "handle_error", _untrack_on_error)
+
+
+class DisconnectMiddleware:
+    """
+    ASGI middleware cancelling a request's running statements when its client disconnects.
+    """
+
+    def __init__(self, app: Any, settings: Optional[Settings] = None):
+        self.app = app
+        self.max_body = (settings or get_settings()).MAX_REQUEST_BODY_BYTES
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        body = await self._read_body(scope, receive, send)
+        if body is None:
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+        disconnected = asyncio.Event()
+
+        responded = False
+
+        async def _send(message: dict) -> None:
+            nonlocal responded
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded = True
+
+        async def _watch() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            if responded:
+                return
+            cancelled = await asyncio.get_running_loop().run_in_executor(None, queries.cancel_all)
+            if cancelled:
+                logger.info("Client left %s %s: cancelled %d statement(s)",
+                            scope["method"], scope["path"], cancelled)
+
+        replayed = False
+
+        async def _receive() -> dict:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        watcher = asyncio.create_task(_watch())
+        try:
+            await self.app(scope, _receive, _send)
+        finally:
+            watcher.cancel()
+            _current.reset(token)
+
+    async def _read_body(self, scope: dict, receive: Callable, send: Callable) -> Optional[bytes]:
+        """
+        Buffer the request body; None when the client left or got a 413 instead.
+        """
+        chunks, size, more = [], 0, True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body:
+                response = JSONResponse({"detail": f"Request body exceeds {self.max_body} bytes"},
+                                        status_code=413)
+                await response(scope, receive, send)
+                return None
+            chunks.append(chunk)
+            more = message.get("more_body", False)
+        return b"".join(chunks)
+
+
+async def handle_operational_error(request: Request, exc: OperationalError) -> JSONResponse:
+    """
+    504 for statements cancelled by their time budget, 503 for other database failures.
+    """
+    if getattr(exc.orig, "pgcode", None) == QUERY_CANCELED:
+        queries = _current.get()
+        if queries is not None and queries.disconnected:
+            logger.info("Dropped %s %s after client disconnect", request.method, request.url.path)
+        return JSONResponse({"detail": "Query exceeded its time budget"}, status_code=504)
+    logger.warning("Database error on %s %s: %s", request.method, request.url.path, exc.orig)
+    return JSONResponse({"detail": "Database unavailable, retry later"}, status_code=503,
+                        headers={"Retry-After": "1"})
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import os
-from typing import Optional, Any
+from typing import Optional, Any, Tuple
 
 from fastapi import Request, HTTPException, status
 from fastapi.concurrency import run_in_threadpool
@@ -18,6 +18,7 @@ from .config import get_settings
 
 WINDOW = int(os.getenv("RL_WINDOW_SECONDS", "60"))
 LIMIT = int(os.getenv("RL_LIMIT", "60"))
+COUNTED_STATE = "rate_limit_counted"
 
 
 def _is_true(v: Optional[str]) -> bool:
@@ -55,21 +56,41 @@ def _make_client() -> Optional[Any]:
 _r = _make_client()
 
 
+def redis_client() -> Optional[Any]:
+    return _r
+
+
+def limit_for(api_key: Optional[Any], raw_key: Optional[str],
+              client_host: Optional[str]) -> Tuple[str, int]:
+    """
+    Counter key and limit for a request.
+    """
+    # Authenticated keys (see dependencies.require_api_key) carry their own limit
+    if api_key is not None:
+        return f"rl:{api_key.prefix}", api_key.rate_limit or LIMIT
+    return f"rl:{raw_key or client_host}", LIMIT
+
+
+def exceeded(ttl: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Rate limit exceeded. Try again in {ttl}s",
+    )
+
+
 async def rate_limiter(request: Request):
-    if _r is None:
+    # Already counted by the cached-read fast path before it fell through (app/fast_path.py)
+    if _r is None or getattr(request.state, COUNTED_STATE, False):
         return
 
-    api_key = request.headers.get("x-api-key") or request.client.host
-    key = f"rl:{api_key}"
+    key, limit = limit_for(getattr(request.state, "api_key", None),
+                           request.headers.get("x-api-key"), request.client.host)
 
     # INCR y TTL en la ventana
     current = await run_in_threadpool(_r.incr, key)
     if current == 1:
         await run_in_threadpool(_r.expire, key, WINDOW)
 
-    if current > LIMIT:
+    if current > limit:
         ttl = await run_in_threadpool(_r.ttl, key)
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Rate limit exceeded. Try again in {ttl}s",
-        )
+        raise exceeded(ttl)
@@ -0,0 +1,88 @@
+"""
+Shared interception point for redis-py commands.
+
+Profiling, tracing and fault injection all need to see every Redis command
+and pipeline. Instead of each patching ``execute_command`` and
+``Pipeline.execute`` on its own, they register a hook here; the methods are
+patched once, on the first registration, and run the hooks around the real
+call. A hook is called as ``hook(proceed, client, op, args)`` and must return
+``proceed()`` (awaited, for async hooks) unless it raises instead. ``op`` is
+the upper-cased command name, or ``pipeline`` with the queued commands in
+``client.command_stack``. The hook registered last runs outermost.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+from typing import Any, Awaitable, Callable, List
+
+import redis
+import redis.asyncio
+
+Hook = Callable[[Callable[[], Any], Any, str, tuple], Any]
+AsyncHook = Callable[[Callable[[], Awaitable[Any]], Any, str, tuple], Awaitable[Any]]
+
+_hooks: List[Hook] = []
+_async_hooks: List[AsyncHook] = []
+_lock = threading.Lock()
+
+
+def _chain(hooks: list, call: Callable[[], Any], client: Any, op: str, args: tuple) -> Any:
+    for hook in hooks:
+        call = functools.partial(hook, call, client, op, args)
+    return call()
+
+
+def _patch_sync() -> None:
+    execute_command = redis.Redis.execute_command
+    pipeline_execute = redis.client.Pipeline.execute
+
+    def _execute_command(self, *args, **options):
+        return _chain(_hooks, lambda: execute_command(self, *args, **options),
+                      self, str(args[0]).upper(), args)
+
+    def _pipeline_execute(self, *args, **kwargs):
+        return _chain(_hooks, lambda: pipeline_execute(self, *args, **kwargs), self, "pipeline", ())
+
+    redis.Redis.execute_command = _execute_command
+    redis.client.Pipeline.execute = _pipeline_execute
+
+
+def _patch_async() -> None:
+    execute_command = redis.asyncio.Redis.execute_command
+    pipeline_execute = redis.asyncio.client.Pipeline.execute
+
+    async def _execute_command(self, *args, **options):
+        return await _chain(_async_hooks, lambda: execute_command(self, *args, **options),
+                            self, str(args[0]).upper(), args)
+
+    async def _pipeline_execute(self, *args, **kwargs):
+        return await _chain(_async_hooks, lambda: pipeline_execute(self, *args, **kwargs),
+                            self, "pipeline", ())
+
+    redis.asyncio.Redis.execute_command = _execute_command
+    redis.asyncio.client.Pipeline.execute = _pipeline_execute
+
+
+def register(hook: Hook) -> None:
+    """
+    Run ``hook`` around every command of the synchronous clients; idempotent.
+    """
+    with _lock:
+        if hook in _hooks:
+            return
+        if not _hooks:
+            _patch_sync()
+        _hooks.append(hook)
+
+
+def register_async(hook: AsyncHook) -> None:
+    """
+    Run ``hook`` around every command of the asyncio clients; idempotent.
+    """
+    with _lock:
+        if hook in _async_hooks:
+            return
+        if not _async_hooks:
+            _patch_async()
+        _async_hooks.append(hook)
@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..models.api_key import ApiKey
+from ..schemas.schemas import ApiKeyCreate
+
+
+def create_api_key(db: Session, prefix: str, key_hash: str, payload: ApiKeyCreate) -> ApiKey:
+    """
+    Persist a new API key.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        prefix (str): Public lookup part of the key.
+        key_hash (str): Hex SHA-256 of the full key.
+        payload (ApiKeyCreate): Owner name, rate limit and admin flag.
+
+    Returns:
+        ApiKey: The created ORM instance.
+    """
+    api_key = ApiKey(prefix=prefix, key_hash=key_hash, **payload.dict())
+    db.add(api_key)
+    db.commit()
+    db.refresh(api_key)
+    return api_key
+
+
+def get_active_by_prefix(db: Session, prefix: str) -> Optional[ApiKey]:
+    """
+    Retrieve a non-revoked API key by its prefix.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        prefix (str): Public lookup part of the key.
+
+    Returns:
+        Optional[ApiKey]: The key, or None if unknown or revoked.
+    """
+    stmt = select(ApiKey).where(ApiKey.prefix == prefix, ApiKey.revoked_at.is_(None))
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def list_api_keys(db: Session) -> List[ApiKey]:
+    """
+    List all API keys, revoked ones included.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+
+    Returns:
+        List[ApiKey]: Keys ordered by creation.
+    """
+    return list(db.execute(select(ApiKey).order_by(ApiKey.id)).scalars().all())
+
+
+def revoke_api_key(db: Session, prefix: str) -> bool:
+    """
+    Mark an API key as revoked.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        prefix (str): Public lookup part of the key.
+
+    Returns:
+        bool: True if an active key was revoked.
+    """
+    stmt = (
+        update(ApiKey)
+        .where(ApiKey.prefix == prefix, ApiKey.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    revoked = db.execute(stmt).rowcount > 0
+    db.commit()
+    return revoked
@@ -1,12 +1,35 @@
-from typing import Optional, Tuple, List
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, List
 from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import select, or_, func
+from sqlalchemy import select, or_, func, true, literal, case, tuple_, union_all, delete, text
 from sqlalchemy.orm import Session
 
 from ..models.article import Article
+from ..models.article_tombstone import ArticleTombstone
 from ..schemas.schemas import ArticleCreate, ArticleUpdate
 
+# Columns selectable through ``fields=``; ``summary`` is the body truncated in SQL
+PROJECTABLE_FIELDS = (
+    "id", "title", "body", "tags", "author",
+    "published_at", "created_at", "updated_at", "summary",
+)
+SUMMARY_LENGTH = 200
+
+
+def _projection(fields: Sequence[str]) -> list:
+    """
+    Map requested field names to the columns to select, so unrequested ones
+    (notably ``body``) never leave the database.
+    """
+    columns = []
+    for name in fields:
+        if name == "summary":
+            columns.append(func.substr(Article.body, 1, SUMMARY_LENGTH).label("summary"))
+        else:
+            columns.append(getattr(Article, name))
+    return columns
+
 
 def create_article(db: Session, payload: ArticleCreate) -> Article:
     """
@@ -40,6 +63,41 @@ def get_article(db: Session, article_id: int) -> Optional[Article]:
     return db.get(Article, article_id)
 
 
+def get_article_fields(db: Session, article_id: int,
+                       fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve only the requested fields of an Article.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        article_id (int): Unique identifier of the Article.
+        fields (Sequence[str]): Names from ``PROJECTABLE_FIELDS``.
+
+    Returns:
+        Optional[Dict[str, Any]]: The projected row or None if not found.
+    """
+    stmt = select(*_projection(fields)).where(Article.id == article_id)
+    row = db.execute(stmt).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def get_articles_by_ids(db: Session, article_ids: List[int]) -> List[Article]:
+    """
+    Retrieve several Articles with a single ``WHERE id IN (...)`` query.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        article_ids (List[int]): Identifiers to load; unknown ids are ignored.
+
+    Returns:
+        List[Article]: The found Articles, in no particular order.
+    """
+    if not article_ids:
+        return []
+    stmt = select(Article).where(Article.id.in_(article_ids))
+    return list(db.execute(stmt).scalars().all())
+
+
 def update_article(db: Session, article: Article, payload: ArticleUpdate) -> Article:
     """
     Apply partial updates to an existing Article record.
@@ -69,6 +127,7 @@ def delete_article(db: Session, article: Article) -> None:
         article (Article): The ORM instance to be deleted.
     """
     db.delete(article)
+    db.add(ArticleTombstone(article_id=article.id))
     db.commit()
 
 
@@ -81,10 +140,14 @@ class ListFilters:
     page_size: int = 10
     author: Optional[str] = None
     tag: Optional[str] = None
+    # Inclusive bounds on published_at; recent ranges only scan their monthly partitions
+    published_from: Optional[datetime] = None
+    published_to: Optional[datetime] = None
     order: str = "desc"  # Accepts "asc" or "desc"
+    fields: Optional[List[str]] = None  # Projection; None selects full rows
 
 
-def list_articles(db: Session, filters: Optional[ListFilters] = None) -> Tuple[List[Article], int]:
+def list_articles(db: Session, filters: Optional[ListFilters] = None) -> Tuple[List[Any], int]:
     """
     Retrieve a paginated list of articles with optional filtering and sorting.
 
@@ -93,12 +156,13 @@ def list_articles(db: Session, filters: Optional[ListFilters] = None) -> Tuple[L
         filters (Optional[ListFilters]): Filtering and pagination parameters.
 
     Returns:
-        Tuple[List[Article], int]: (Paginated list of ORM Articles, total count)
+        Tuple[List[Any], int]: (Paginated list of ORM Articles, or of dicts
+        when ``filters.fields`` is set, total count)
     """
     if filters is None:
         filters = ListFilters()
 
-    stmt = select(Article)
+    stmt = select(*_projection(filters.fields)) if filters.fields else select(Article)
     count_stmt = select(func.count()).select_from(Article)  # pylint: disable=not-callable
 
     if filters.author:
@@ -109,6 +173,14 @@ def list_articles(db: Session, filters: Optional[ListFilters] = None) -> Tuple[L
         stmt = stmt.where(Article.tags.ilike(f"%{filters.tag}%"))
         count_stmt = count_stmt.where(Article.tags.ilike(f"%{filters.tag}%"))
 
+    if filters.published_from:
+        stmt = stmt.where(Article.published_at >= filters.published_from)
+        count_stmt = count_stmt.where(Article.published_at >= filters.published_from)
+
+    if filters.published_to:
+        stmt = stmt.where(Article.published_at <= filters.published_to)
+        count_stmt = count_stmt.where(Article.published_at <= filters.published_to)
+
     # Sort by publication date, default to descending order
     if filters.order == "asc":
         stmt = stmt.order_by(Article.published_at.asc().nullslast())
@@ -119,13 +191,17 @@ def list_articles(db: Session, filters: Optional[ListFilters] = None) -> Tuple[L
     offset = (filters.page - 1) * filters.page_size
     stmt = stmt.offset(offset).limit(filters.page_size)
 
-    items = list(db.execute(stmt).scalars().all())
+    if filters.fields:
+        items: List[Any] = [dict(row) for row in db.execute(stmt).mappings()]
+    else:
+        items = list(db.execute(stmt).scalars().all())
     total = db.execute(count_stmt).scalar_one()
 
     return items, total
 
 
-def search_articles(db: Session, q: str, limit: int = 20) -> List[Article]:
+def search_articles(db: Session, q: str, limit: int = 20,
+                    fields: Optional[Sequence[str]] = None) -> List[Any]:
     """
     Perform a simple text search on article title or body.
 
@@ -133,13 +209,245 @@ def search_articles(db: Session, q: str, limit: int = 20) -> List[Article]:
         db (Session): Active SQLAlchemy session.
         q (str): Search query string.
         limit (int): Maximum number of results to return.
+        fields (Optional[Sequence[str]]): Projection; None selects full rows.
 
     Returns:
-        List[Article]: Matching Article ORM objects.
+        List[Any]: Matching Article ORM objects, or dicts when ``fields`` is set.
     """
     stmt = (
-        select(Article)
+        (select(*_projection(fields)) if fields else select(Article))
         .where(or_(Article.title.ilike(f"%{q}%"), Article.body.ilike(f"%{q}%")))
         .limit(limit)
     )
+    if fields:
+        return [dict(row) for row in db.execute(stmt).mappings()]
     return list(db.execute(stmt).scalars().all())
+
+
+def iter_titles_authors(db: Session, batch_size: int = 1000) -> Iterator[Tuple[int, str, str]]:
+    """
+    Stream ``(id, title, author)`` for every article without loading bodies.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        batch_size (int): Rows fetched per round trip.
+
+    Returns:
+        Iterator[Tuple[int, str, str]]: One tuple per article.
+    """
+    stmt = (
+        select(Article.id, Article.title, Article.author)
+        .order_by(Article.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.execute(stmt):
+        yield row.id, row.title, row.author
+
+
+def count_by_author(db: Session) -> Dict[str, int]:
+    """
+    Count articles per author.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+
+    Returns:
+        Dict[str, int]: Article count keyed by author.
+    """
+    stmt = select(Article.author, func.count()).group_by(Article.author)  # pylint: disable=not-callable
+    return dict(db.execute(stmt).all())
+
+
+def count_by_tag(db: Session) -> Dict[str, int]:
+    """
+    Count articles per tag, splitting the ``;``-joined ``tags`` column in SQL.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+
+    Returns:
+        Dict[str, int]: Article count keyed by tag.
+    """
+    tag = func.unnest(func.string_to_array(Article.tags, ";")).table_valued("tag").render_derived()
+    stmt = (
+        select(tag.c.tag, func.count(Article.id.distinct()))  # pylint: disable=not-callable
+        .select_from(Article)
+        .join(tag, true())
+        .where(tag.c.tag != "")
+        .group_by(tag.c.tag)
+    )
+    return dict(db.execute(stmt).all())
+
+
+def iter_ids(db: Session, min_id: int = 0, changed_since: Optional[datetime] = None,
+             batch_size: int = 10000) -> Iterator[int]:
+    """
+    Stream the ids of all articles above ``min_id``, in ascending order.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        min_id (int): Only ids strictly greater than this are returned.
+        changed_since (Optional[datetime]): Only articles created or updated
+            at or after this database time.
+        batch_size (int): Rows fetched per round trip.
+
+    Returns:
+        Iterator[int]: Article ids.
+    """
+    stmt = (
+        select(Article.id)
+        .where(Article.id > min_id)
+        .order_by(Article.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if changed_since is not None:
+        stmt = stmt.where(Article.updated_at >= changed_since)
+    for (article_id,) in db.execute(stmt):
+        yield article_id
+
+
+def list_deleted_ids(db: Session, since: datetime) -> List[int]:
+    """
+    Ids of the articles deleted at or after ``since`` (database time).
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        since (datetime): Earliest deletion time.
+
+    Returns:
+        List[int]: Deleted article ids, from their tombstones.
+    """
+    stmt = select(ArticleTombstone.article_id).where(ArticleTombstone.deleted_at >= since)
+    return list(db.execute(stmt).scalars().all())
+
+
+def ensure_partitions(db: Session, from_month: date, to_month: date) -> int:
+    """
+    Create the missing monthly ``articles`` partitions between two months.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        from_month (date): First month to cover (any day within it).
+        to_month (date): Last month to cover (any day within it).
+
+    Returns:
+        int: Number of partitions created.
+    """
+    stmt = select(func.ensure_article_partitions(from_month, to_month))
+    created = db.execute(stmt).scalar_one()
+    db.commit()
+    return created
+
+
+def archive_partitions(db: Session, older_than: date) -> Tuple[int, List[int]]:
+    """
+    Detach monthly partitions ending on or before ``older_than`` into the
+    ``articles_archive`` schema; their rows stop being served.
+
+    Archived rows are treated as deleted: their ``(title, author)`` pair is
+    released and each gets a change feed tombstone. Their Redis entries are
+    left to the caller.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        older_than (date): Cut-off date.
+
+    Returns:
+        Tuple[int, List[int]]: Number of partitions archived and the ids of
+        the articles they held.
+    """
+    stmt = select(text("article_ids")).select_from(func.archive_article_partitions(older_than))
+    archived = db.execute(stmt).scalars().all()
+    db.commit()
+    return len(archived), [article_id for ids in archived for article_id in ids]
+
+
+# Transactions open longer than this (a forgotten psql session, a stuck
+# migration) no longer hold the horizon back; should one still write articles
+# when it commits, the change feed may skip those rows
+HORIZON_MAX_TRANSACTION_AGE = timedelta(minutes=5)
+
+# Oldest transaction start among other sessions: rows they have yet to commit
+# carry an updated_at at or after it (now() is the transaction start)
+_WRITE_HORIZON = text("""
+    SELECT LEAST(
+        now() + interval '1 microsecond',
+        (SELECT min(xact_start) FROM pg_stat_activity
+         WHERE datname = current_database() AND backend_type = 'client backend'
+           AND pid <> pg_backend_pid() AND xact_start > clock_timestamp() - :max_age)
+    )::timestamp
+""")
+
+
+def write_horizon(db: Session) -> datetime:
+    """
+    Database time before which every write is committed: rows still to be
+    committed by other sessions carry a ``created_at``/``updated_at`` at or
+    after it. Transactions older than ``HORIZON_MAX_TRANSACTION_AGE`` are
+    ignored.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+
+    Returns:
+        datetime: The oldest recent transaction start among other sessions,
+        or now.
+    """
+    return db.execute(_WRITE_HORIZON, {"max_age": HORIZON_MAX_TRANSACTION_AGE}).scalar_one()
+
+
+def list_changes(db: Session, after: Optional[Tuple[datetime, int]] = None,
+                 limit: int = 100) -> Tuple[List[Tuple[datetime, int, str]], datetime]:
+    """
+    Return created/updated articles and deletions after a ``(timestamp, id)``
+    position, oldest first.
+
+    Only changes older than every transaction still open elsewhere are
+    returned, so a later call never yields one that sorts before its cursor.
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        after (Optional[Tuple[datetime, int]]): Exclusive start position; None
+            starts from the beginning.
+        limit (int): Maximum number of changes.
+
+    Returns:
+        Tuple[List[Tuple[datetime, int, str]], datetime]: ``(at, article_id, op)``
+        rows, op being ``created``, ``updated`` or ``deleted``, and the database
+        time up to which the feed is complete.
+    """
+    horizon = write_horizon(db)
+    tombstone = ArticleTombstone
+    op = case((Article.created_at == Article.updated_at, literal("created")),
+              else_=literal("updated"))
+    upserts = select(Article.updated_at.label("at"), Article.id.label("id"),
+                     op.label("op")).where(Article.updated_at < horizon)
+    deletes = select(tombstone.deleted_at.label("at"), tombstone.article_id.label("id"),
+                     literal("deleted").label("op")).where(tombstone.deleted_at < horizon)
+    if after is not None:
+        upserts = upserts.where(tuple_(Article.updated_at, Article.id) > tuple_(*after))
+        deletes = deletes.where(tuple_(tombstone.deleted_at, tombstone.article_id) > tuple_(*after))
+    # Each branch is bounded by its own index scan before the merge
+    upserts = upserts.order_by(Article.updated_at, Article.id).limit(limit)
+    deletes = deletes.order_by(tombstone.deleted_at, tombstone.article_id).limit(limit)
+    merged = union_all(upserts, deletes).subquery()
+    stmt = (select(merged.c.at, merged.c.id, merged.c.op)
+            .order_by(merged.c.at, merged.c.id).limit(limit))
+    return [tuple(row) for row in db.execute(stmt)], horizon
+
+
+def prune_tombstones(db: Session, retention: timedelta) -> int:
+    """
+    Delete tombstones older than ``retention`` (measured in database time).
+
+    Args:
+        db (Session): Active SQLAlchemy session.
+        retention (timedelta): How long tombstones are kept.
+
+    Returns:
+        int: Number of tombstones removed.
+    """
+    stmt = delete(ArticleTombstone).where(ArticleTombstone.deleted_at < func.now() - retention)  # pylint: disable=not-callable
+    pruned = db.execute(stmt).rowcount
+    db.commit()
+    return pruned
@@ -0,0 +1,109 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from .. import concurrency, faults, slow_query_log
+from ..config import get_settings
+from ..db.db import get_db
+from ..dependencies import require_admin, require_api_key
+from ..profiling import run_in_threadpool
+from ..schemas.schemas import ApiKeyCreate, ApiKeyCreated, ApiKeyOut, FaultRulesIn
+from ..services import articles as svc
+from ..services import api_keys as key_service
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_api_key), Depends(require_admin)],
+)
+
+
+@router.get("/slow-queries", summary="Recent slow queries")
+async def slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """
+    Return the most recent entries of the slow-query ring buffer, newest first.
+    """
+    return slow_query_log.recent(limit)
+
+
+@router.get("/concurrency", summary="Route lane usage and shed counts")
+async def concurrency_stats():
+    """
+    Return each lane's limit, running and queued calls, recent service time
+    and number of shed requests for this worker.
+    """
+    return concurrency.limiter().stats()
+
+
+def _fault_injector() -> faults.FaultInjector:
+    injector = faults.injector()
+    if injector is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Fault injection is disabled")
+    return injector
+
+
+@router.get("/faults", summary="Active fault injection rules")
+async def list_faults(injector: faults.FaultInjector = Depends(_fault_injector)):
+    """
+    Return this worker's fault rules and how often each has fired.
+    """
+    return injector.stats()
+
+
+@router.put("/faults", summary="Replace the fault injection rules")
+async def set_faults(payload: FaultRulesIn,
+                     injector: faults.FaultInjector = Depends(_fault_injector)):
+    """
+    Replace this worker's fault rules with a ``FAULT_RULES`` spec; an empty spec clears them.
+    """
+    try:
+        rules = faults.parse_rules(payload.rules)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)) from e
+    injector.set_rules(rules)
+    return injector.stats()
+
+
+@router.post("/cache/warm", summary="Preload the most accessed articles")
+async def warm_cache(
+    top: Optional[int] = Query(None, ge=1, le=100_000),
+    db: Session = Depends(get_db),
+):
+    """
+    Load the ``top`` most accessed articles (default ``CACHE_WARM_TOP_N``) into the cache.
+    """
+    settings = get_settings()
+    warmed = await run_in_threadpool(
+        svc.warm_cache, db, top or settings.CACHE_WARM_TOP_N, settings.CACHE_WARM_BATCH_SIZE)
+    return {"warmed": warmed}
+
+
+@router.post("/api-keys", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED,
+             summary="Create an API key")
+async def create_api_key(payload: ApiKeyCreate, db: Session = Depends(get_db)):
+    """
+    Create a key; the raw ``key`` is only returned in this response.
+    """
+    row, raw_key = await run_in_threadpool(key_service.create_key, db, payload)
+    return {**ApiKeyOut.from_orm(row).dict(), "key": raw_key}
+
+
+@router.get("/api-keys", response_model=List[ApiKeyOut], summary="List API keys")
+async def list_api_keys(db: Session = Depends(get_db)):
+    """
+    List all keys, revoked ones included; raw keys are never returned.
+    """
+    return await run_in_threadpool(key_service.list_keys, db)
+
+
+@router.delete("/api-keys/{prefix}", status_code=status.HTTP_204_NO_CONTENT,
+               summary="Revoke an API key")
+async def revoke_api_key(prefix: str, db: Session = Depends(get_db)):
+    """
+    Revoke a key; every worker drops it from its auth cache.
+    """
+    if not await run_in_threadpool(key_service.revoke_key, db, prefix):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API key not found")
@@ -1,15 +1,31 @@
+from datetime import datetime, timezone
+import time
 from typing import Optional, Literal, List
 
-from fastapi import APIRouter, Depends, Query, status
-from fastapi.concurrency import run_in_threadpool
-from pydantic import BaseModel, Field # pylint: disable=no-name-in-module
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, validator # pylint: disable=no-name-in-module
 from sqlalchemy.orm import Session
 
+from .. import change_feed
+from ..config import get_settings
 from ..db.db import get_db
-from ..schemas.schemas import ArticleCreate, ArticleUpdate, ArticleOut
+from ..schemas.schemas import (
+    ArticleCreate,
+    ArticleUpdate,
+    ArticleOut,
+    ArticleBatchRequest,
+    ArticleBatchItem,
+    Suggestion,
+    FacetsOut,
+    ChangesOut,
+)
 from ..services import articles as svc
+from ..repositories.articles import PROJECTABLE_FIELDS
 from ..dependencies import require_api_key
 from ..rate_limit import rate_limiter
+from ..concurrency import run_limited
 
 
 router = APIRouter(
@@ -19,6 +35,33 @@ router = APIRouter(
 )
 
 
+MAX_BATCH_IDS = 100
+_settings = get_settings()
+
+
+def parse_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, e.g. "
+                    "`id,title,author,published_at,summary`. "
+                    "`summary` is the body truncated in SQL; `id` is always included.",
+    ),
+) -> Optional[List[str]]:
+    """
+    Parse the ``fields=`` projection parameter.
+    """
+    if not fields:
+        return None
+    names = list(dict.fromkeys(["id", *(f.strip() for f in fields.split(",") if f.strip())]))
+    unknown = [name for name in names if name not in PROJECTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return names
+
+
 class ListQuery(BaseModel):
     """
     Query parameters for paginated article listing.
@@ -27,8 +70,18 @@ class ListQuery(BaseModel):
     page_size: int = Field(10, ge=1, le=100)
     author: Optional[str] = None
     tag: Optional[str] = None
+    published_from: Optional[datetime] = None
+    published_to: Optional[datetime] = None
     order: Literal["asc", "desc"] = "desc"
 
+    @validator("published_from", "published_to")  # pylint: disable=no-self-argument
+    @classmethod
+    def to_naive_utc(cls, v):
+        # published_at is stored as naive UTC; aware bounds are converted to match
+        if v is not None and v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
 
 @router.post("", response_model=ArticleOut, status_code=status.HTTP_201_CREATED)
 async def create_article(
@@ -38,7 +91,7 @@ async def create_article(
     """
     Create a new article record.
     """
-    return await run_in_threadpool(svc.create_article, db, payload)
+    return await run_limited("write", svc.create_article, db, payload)
 
 
 @router.put("/{article_id}", response_model=ArticleOut)
@@ -50,7 +103,7 @@ async def update_article(
     """
     Update an existing article record by its ID.
     """
-    return await run_in_threadpool(svc.update_article, db, article_id, payload)
+    return await run_limited("write", svc.update_article, db, article_id, payload)
 
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -61,20 +114,29 @@ async def delete_article(
     """
     Delete an article by ID.
     """
-    await run_in_threadpool(svc.delete_article, db, article_id)
+    await run_limited("write", svc.delete_article, db, article_id)
     return
 
 
 @router.get("", response_model=List[ArticleOut], summary="List articles")
 async def list_articles(
     params: ListQuery = Depends(),
+    fields: Optional[List[str]] = Depends(parse_fields),
     db: Session = Depends(get_db),
 ):
     """
     Retrieve a paginated list of articles.
     """
+    if (params.published_from and params.published_to
+            and params.published_from > params.published_to):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="published_from must not be after published_to",
+        )
     filters = params.dict()
-    items, _ = await run_in_threadpool(svc.list_articles, db, **filters)
+    items, _ = await run_limited("list", svc.list_articles, db, fields=fields, **filters)
+    if fields:
+        return JSONResponse(jsonable_encoder(items))
     return items
 
 
@@ -82,20 +144,102 @@ async def list_articles(
 async def search_articles(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=100),
+    fields: Optional[List[str]] = Depends(parse_fields),
     db: Session = Depends(get_db),
 ):
     """
     Search for articles containing the query text.
     """
-    return await run_in_threadpool(svc.search_articles, db, q=q, limit=limit)
+    items = await run_limited("search", svc.search_articles, db, q=q, limit=limit, fields=fields)
+    if fields:
+        return JSONResponse(jsonable_encoder(items))
+    return items
+
+
+@router.get("/changes", response_model=ChangesOut, summary="Incremental change feed")
+async def list_changes(
+    since: Optional[str] = Query(
+        None, description="`cursor` of the previous response; omit to start from the beginning."),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(
+        0, ge=0, le=_settings.CHANGE_FEED_MAX_WAIT_SECONDS,
+        description="Long-poll: seconds to hold the request open until changes arrive."),
+    db: Session = Depends(get_db),
+):
+    """
+    Return created, updated and deleted article ids after ``since``, oldest first.
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        feed = await run_limited(
+            "read", svc.list_changes, db, since, limit, _settings.CHANGE_FEED_RETENTION_DAYS)
+        remaining = deadline - time.monotonic()
+        if feed["changes"] or remaining <= 0:
+            return feed
+        await change_feed.wait_for_change(min(remaining, _settings.CHANGE_FEED_POLL_SECONDS))
+
+
+@router.get("/suggest", response_model=List[Suggestion], summary="Autocomplete titles and authors")
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Prefix autocomplete served from the Redis typeahead index; never touches the database.
+    """
+    return await run_limited("read", svc.suggest, prefix, limit)
+
+
+@router.get("/facets", response_model=FacetsOut, summary="Article counts per author and tag")
+async def get_facets(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+):
+    """
+    Article counts per author and per tag, most frequent first, from
+    incrementally maintained counters.
+    """
+    return await run_limited("read", svc.get_facets, limit)
+
+
+@router.get("/batch", response_model=List[ArticleBatchItem], summary="Get articles by IDs")
+async def get_articles_batch(
+    ids: str = Query(..., pattern=r"^\d+(,\d+)*$", description="Comma-separated article IDs"),
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve several articles in request order; unknown IDs come back with ``found=false``.
+    """
+    article_ids = [int(i) for i in ids.split(",")]
+    if len(article_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_BATCH_IDS} ids per request; use POST /articles/batch",
+        )
+    return await run_limited("read", svc.get_articles_batch, db, article_ids)
+
+
+@router.post("/batch", response_model=List[ArticleBatchItem],
+             summary="Get articles by IDs (long lists)")
+async def post_articles_batch(
+    payload: ArticleBatchRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Same as ``GET /articles/batch`` with the IDs in the request body.
+    """
+    return await run_limited("read", svc.get_articles_batch, db, payload.ids)
 
 
 @router.get("/{article_id}", response_model=ArticleOut, summary="Get article by ID")
 async def get_article(
     article_id: int,
+    fields: Optional[List[str]] = Depends(parse_fields),
     db: Session = Depends(get_db),
 ):
     """
     Retrieve a single article by its unique identifier.
     """
-    return await run_in_threadpool(svc.get_article, db, article_id=article_id)
+    if fields:
+        item = await run_limited("read", svc.get_article_fields, db, article_id, fields)
+        return JSONResponse(jsonable_encoder(item))
+    return await run_limited("read", svc.get_article, db, article_id=article_id)
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 
 from pydantic import BaseModel, Field, validator  # pylint: disable=no-name-in-module
@@ -12,6 +12,10 @@ def normalize_tags(value: str | List[str] | None) -> str:
     return value
 
 
+def split_tags(value: str | List[str] | None) -> List[str]:
+    return [t for t in normalize_tags(value).split(";") if t]
+
+
 class ArticleBase(BaseModel):
     title: str = Field(..., max_length=255)
     body: str
@@ -50,3 +54,67 @@ class ArticleOut(ArticleBase):
 
     class Config:
         orm_mode = True
+
+
+class ArticleBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_items=1, max_items=500)
+
+
+class ArticleBatchItem(BaseModel):
+    id: int
+    found: bool
+    article: Optional[ArticleOut] = None
+
+
+class Suggestion(BaseModel):
+    kind: Literal["title", "author"]
+    text: str
+    ids: List[int]
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class FacetsOut(BaseModel):
+    author: List[FacetCount]
+    tag: List[FacetCount]
+
+
+class ArticleChange(BaseModel):
+    id: int
+    op: Literal["created", "updated", "deleted"]
+    at: datetime
+
+
+class ChangesOut(BaseModel):
+    changes: List[ArticleChange]
+    cursor: Optional[str]
+    has_more: bool
+
+
+class ApiKeyCreate(BaseModel):
+    name: str = Field(..., max_length=120)
+    rate_limit: Optional[int] = Field(None, ge=1)
+    is_admin: bool = False
+
+
+class ApiKeyOut(BaseModel):
+    prefix: str
+    name: str
+    rate_limit: Optional[int]
+    is_admin: bool
+    created_at: datetime
+    revoked_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class ApiKeyCreated(ApiKeyOut):
+    key: str
+
+
+class FaultRulesIn(BaseModel):
+    rules: str = Field("", description="FAULT_RULES spec, e.g. redis:GET=delay:200@0.05")
@@ -0,0 +1,23 @@
+"""
+Create an API key and print it (it cannot be retrieved later).
+
+Usage: python -m app.scripts.create_api_key <name> [rate_limit] [--admin]
+"""
+import sys
+
+from app.db.db import SessionLocal
+from app.schemas.schemas import ApiKeyCreate
+from app.services import api_keys as svc
+
+
+args = [a for a in sys.argv[1:] if a != "--admin"]
+if not args:
+    sys.exit(__doc__)
+db = SessionLocal()
+try:
+    payload = ApiKeyCreate(name=args[0], rate_limit=int(args[1]) if len(args) > 1 else None,
+                           is_admin="--admin" in sys.argv)
+    row, raw_key = svc.create_key(db, payload)
+    print(f"API key for {row.name} (prefix {row.prefix}): {raw_key}")
+finally:
+    db.close()
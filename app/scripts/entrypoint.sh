@@ -41,6 +41,11 @@ fi
 echo "🛠️  Applying migrations (upgrade head)..."
 alembic -c /app/alembic.ini upgrade head
 
+if [ "${SERVER_MODE:-development}" = "production" ]; then
+  echo "🚀 Starting Gunicorn + Uvicorn workers (production)..."
+  exec gunicorn -c /app/gunicorn.conf.py app.main:app
+fi
+
 echo "🚀 Starting Uvicorn (reload enabled)..."
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 \
   --reload --reload-dir /app/app --reload-include '*.py' --reload-exclude '*.pyc'
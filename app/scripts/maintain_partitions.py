@@ -0,0 +1,20 @@
+"""
+Create upcoming monthly articles partitions and archive expired ones.
+
+Usage: python -m app.scripts.maintain_partitions [archive_after_months]
+"""
+import sys
+
+from app.config import get_settings
+from app.db.db import SessionLocal
+from app.services import articles as svc
+
+
+settings = get_settings()
+archive_after = int(sys.argv[1]) if len(sys.argv) > 1 else settings.PARTITION_ARCHIVE_AFTER_MONTHS
+db = SessionLocal()
+try:
+    result = svc.maintain_partitions(db, settings.PARTITION_MONTHS_AHEAD, archive_after)
+    print(f"Partitions created: {result['created']}, archived: {result['archived']}.")
+finally:
+    db.close()
@@ -0,0 +1,14 @@
+"""
+Rebuild the Redis existence filter of article ids from Postgres.
+
+Usage: python -m app.scripts.rebuild_existence
+"""
+from app.db.db import SessionLocal
+from app.services import articles as svc
+
+
+db = SessionLocal()
+try:
+    print(f"Existence filter rebuilt (max id {svc.rebuild_existence_filter(db)}).")
+finally:
+    db.close()
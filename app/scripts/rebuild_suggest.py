@@ -0,0 +1,14 @@
+"""
+Regenerate the Redis typeahead index from Postgres.
+
+Usage: python -m app.scripts.rebuild_suggest
+"""
+from app.db.db import SessionLocal
+from app.services import articles as svc
+
+
+db = SessionLocal()
+try:
+    print(f"Indexed {svc.rebuild_suggest_index(db)} articles for /articles/suggest.")
+finally:
+    db.close()
@@ -0,0 +1,15 @@
+"""
+Recompute the per-author and per-tag counters from Postgres.
+
+Usage: python -m app.scripts.reconcile_facets
+"""
+from app.db.db import SessionLocal
+from app.services import articles as svc
+
+
+db = SessionLocal()
+try:
+    counts = svc.reconcile_facets(db)
+    print(f"Facets reconciled: {len(counts['author'])} authors, {len(counts['tag'])} tags.")
+finally:
+    db.close()
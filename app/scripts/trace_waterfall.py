@@ -0,0 +1,47 @@
+"""
+Print the spans of one trace recorded by the file exporter as a waterfall.
+
+Usage: python -m app.scripts.trace_waterfall <trace_id> [trace_file]
+"""
+import json
+import sys
+
+from app.config import get_settings
+
+WIDTH = 50
+
+
+def render(spans: list) -> str:
+    children: dict = {}
+    ids = {span["span_id"] for span in spans}
+    for span in sorted(spans, key=lambda s: s["start_ns"]):
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        children.setdefault(parent, []).append(span)
+
+    start = min(span["start_ns"] for span in spans)
+    total = max(max(span["end_ns"] for span in spans) - start, 1)
+    lines = []
+
+    def _walk(parent, depth):
+        for span in children.get(parent, []):
+            offset = int((span["start_ns"] - start) * WIDTH / total)
+            length = max(1, int((span["end_ns"] - span["start_ns"]) * WIDTH / total))
+            timeline = " " * offset + "█" * length
+            label = ("  " * depth + f"[{span['layer']}] {span['name']}")[:60]
+            error = "  !" if span.get("error") else ""
+            duration = f"{span['duration_ms']:>9.3f} ms"
+            lines.append(f"{label:<60} {timeline:<{WIDTH + 1}} {duration}{error}")
+            _walk(span["span_id"], depth + 1)
+
+    _walk(None, 0)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    trace_id = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) > 2 else get_settings().TRACE_FILE
+    with open(path, encoding="utf-8") as fh:
+        trace = [span for span in map(json.loads, fh) if span["trace_id"] == trace_id]
+    if not trace:
+        sys.exit(f"No spans for trace {trace_id} in {path}")
+    print(render(trace))
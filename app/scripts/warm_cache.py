@@ -0,0 +1,20 @@
+"""
+Preload the most accessed articles into the Redis cache.
+
+Usage: python -m app.scripts.warm_cache [top_n]
+"""
+import sys
+
+from app.config import get_settings
+from app.db.db import SessionLocal
+from app.services import articles as svc
+
+
+settings = get_settings()
+top_n = int(sys.argv[1]) if len(sys.argv) > 1 else settings.CACHE_WARM_TOP_N
+
+db = SessionLocal()
+try:
+    print(f"Warmed {svc.warm_cache(db, top_n, settings.CACHE_WARM_BATCH_SIZE)} articles.")
+finally:
+    db.close()
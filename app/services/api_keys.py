@@ -0,0 +1,45 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+
+from ..repositories import api_keys as repo
+from ..models.api_key import ApiKey
+from ..schemas.schemas import ApiKeyCreate
+from .. import api_keys
+
+
+def load_key(db: Session, prefix: str) -> Optional[api_keys.KeyInfo]:
+    """
+    Load an active key for the auth cache; None when unknown or revoked.
+    """
+    row = repo.get_active_by_prefix(db, prefix)
+    if row is None:
+        return None
+    return api_keys.KeyInfo(prefix=row.prefix, name=row.name, key_hash=row.key_hash,
+                            rate_limit=row.rate_limit, is_admin=row.is_admin)
+
+
+def create_key(db: Session, payload: ApiKeyCreate) -> Tuple[ApiKey, str]:
+    """
+    Create a key; the raw key is only ever returned here.
+
+    Returns:
+        Tuple[ApiKey, str]: The stored key and its raw value.
+    """
+    prefix, raw_key = api_keys.generate_key()
+    row = repo.create_api_key(db, prefix, api_keys.hash_key(raw_key), payload)
+    api_keys.evict(prefix)  # drop a negative entry a probe may have left
+    return row, raw_key
+
+
+def list_keys(db: Session) -> List[ApiKey]:
+    return repo.list_api_keys(db)
+
+
+def revoke_key(db: Session, prefix: str) -> bool:
+    """
+    Revoke a key and tell every worker to drop it from its cache.
+    """
+    revoked = repo.revoke_api_key(db, prefix)
+    if revoked:
+        api_keys.publish_revoked(prefix)
+    return revoked
@@ -1,12 +1,31 @@
-from typing import Tuple, List, Dict, Any
+import base64
+import logging
+from datetime import date, datetime, timedelta
+from typing import Tuple, List, Dict, Any, Callable, Optional, Sequence
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from redis.exceptions import RedisError
 
-from ..schemas.schemas import ArticleCreate, ArticleUpdate, ArticleOut
+from ..schemas.schemas import ArticleCreate, ArticleUpdate, ArticleOut, ArticleBatchItem
 from ..repositories import articles as repo
 from ..repositories.articles import ListFilters
-from ..cache import get_cached_article, set_cached_article, invalidate_article
+from ..cache import (
+    MISSING,
+    get_cached_article,
+    set_cached_article,
+    get_cached_articles,
+    set_cached_articles,
+    set_missing,
+    invalidate_article,
+)
 from ..models.article import Article
+from .. import access_stats, change_feed, existence, facets, typeahead
+
+logger = logging.getLogger(__name__)
+
+PARTITION_LOCK_KEY = "articles:partitions:lock"
+TOMBSTONE_PRUNE_LOCK_KEY = "articles:tombstones:prune:lock"
 
 
 def _serialize_for_cache(article: Article) -> Dict[str, Any]:
@@ -23,6 +42,23 @@ def _hydrate_from_cache(data: Dict[str, Any]) -> ArticleOut:
     return ArticleOut(**data)
 
 
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+
+
+def _missing_without_db(article_id: int, cached: Any) -> bool:
+    """
+    True when the article is known not to exist: cached as not-found, or
+    absent from the existence filter.
+    """
+    if cached is MISSING:
+        return True
+    if cached is None and not existence.might_exist([article_id])[article_id]:
+        set_missing([article_id])
+        return True
+    return False
+
+
 def create_article(db: Session, payload: ArticleCreate) -> Article:
     """
     Create a new Article and store it in the cache.
@@ -34,14 +70,85 @@ def create_article(db: Session, payload: ArticleCreate) -> Article:
     """
     try:
         article = repo.create_article(db, payload)
-        if getattr(article, "id", None):
-            set_cached_article(article.id, _serialize_for_cache(article))
-        return article
+    except OperationalError:
+        raise  # timeouts and outages are mapped to 503/504 by app.query_guard
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         ) from e
+    if getattr(article, "id", None):
+        _index_created(article)
+    return article
+
+
+def _run_index_steps(article_id: int, change: str,
+                     steps: Sequence[Tuple[str, Callable[[], Any]]]) -> None:
+    """
+    Run the Redis steps following a committed write, in order.
+
+    The write is committed by now, so a Redis failure is logged instead of
+    being reported to the client (whose retry would apply it twice); each step
+    runs on its own so one failure does not skip the others, and the periodic
+    rebuilds repair what was missed.
+    """
+    for name, step in steps:
+        try:
+            step()
+        except RedisError:
+            logger.exception("Could not update the %s for %s article %s", name, change, article_id)
+
+
+def _index_created(article: Article) -> None:
+    """
+    Bring the cache and the Redis indexes up to date with a committed create.
+    """
+    _run_index_steps(article.id, "new", (
+        ("cache", lambda: set_cached_article(article.id, _serialize_for_cache(article),
+                                             ttl=access_stats.ttl_for(article.id))),
+        ("existence filter", lambda: existence.add(article.id)),
+        ("typeahead", lambda: typeahead.index_article(article.id, article.title, article.author)),
+        ("facets", lambda: facets.apply_change(None, (article.author, article.tags))),
+        ("change feed", change_feed.publish),
+    ))
+
+
+def _index_updated(updated: Article, old_title: str, old_author: str, old_tags: str) -> None:
+    """
+    Bring the cache and the Redis indexes up to date with a committed update.
+    """
+    article_id = updated.id
+
+    def _reindex_typeahead() -> None:
+        if (old_title, old_author) != (updated.title, updated.author):
+            typeahead.unindex_article(article_id, old_title, old_author)
+            typeahead.index_article(article_id, updated.title, updated.author)
+
+    _run_index_steps(article_id, "updated", (
+        ("cache", lambda: invalidate_article(article_id)),
+        ("access stats", lambda: access_stats.record_edit(article_id)),
+        ("cache", lambda: set_cached_article(article_id, _serialize_for_cache(updated),
+                                             ttl=access_stats.ttl_for(article_id))),
+        ("typeahead", _reindex_typeahead),
+        ("facets", lambda: facets.apply_change((old_author, old_tags),
+                                               (updated.author, updated.tags))),
+        ("change feed", change_feed.publish),
+    ))
+
+
+def _index_deleted(article_id: int, title: str, author: str, tags: str) -> None:
+    """
+    Bring the cache and the Redis indexes up to date with a committed delete.
+    """
+    _run_index_steps(article_id, "deleted", (
+        ("cache", lambda: invalidate_article(article_id)),
+        ("typeahead", lambda: typeahead.unindex_article(article_id, title, author)),
+        ("facets", lambda: facets.apply_change((author, tags), None)),
+        ("access stats", lambda: access_stats.forget(article_id)),
+        ("existence filter", lambda: existence.remove(article_id)),
+        ("negative cache", lambda: set_missing([article_id])),
+        ("change feed", change_feed.publish),
+    ))
 
 
 def get_article(db: Session, article_id: int) -> Article | ArticleOut:
@@ -54,17 +161,86 @@ def get_article(db: Session, article_id: int) -> Article | ArticleOut:
         HTTPException: If not found.
     """
     cached = get_cached_article(article_id)
+    if _missing_without_db(article_id, cached):
+        raise _not_found()
     if cached is not None:
+        access_stats.record_read(article_id)
         return _hydrate_from_cache(cached)
 
     article = repo.get_article(db, article_id)
     if article is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+        set_missing([article_id])
+        raise _not_found()
 
-    set_cached_article(article_id, _serialize_for_cache(article))
+    access_stats.record_read(article_id)
+    set_cached_article(article_id, _serialize_for_cache(article),
+                       ttl=access_stats.ttl_for(article_id))
     return article
 
 
+def _project(data: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Apply a ``fields=`` projection to a full cached article.
+    """
+    return {
+        name: data["body"][:repo.SUMMARY_LENGTH] if name == "summary" else data[name]
+        for name in fields
+    }
+
+
+def get_article_fields(db: Session, article_id: int, fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Retrieve only the requested fields of an article. Cache hits are projected
+    in memory; misses select just those columns and are not cached.
+
+    Raises:
+        HTTPException: If not found.
+    """
+    cached = get_cached_article(article_id, include_body="body" in fields or "summary" in fields)
+    if _missing_without_db(article_id, cached):
+        raise _not_found()
+    if cached is not None:
+        access_stats.record_read(article_id)
+        return _project(cached, fields)
+
+    row = repo.get_article_fields(db, article_id, fields)
+    if row is None:
+        set_missing([article_id])
+        raise _not_found()
+    access_stats.record_read(article_id)
+    return row
+
+
+def get_articles_batch(db: Session, article_ids: List[int]) -> List[ArticleBatchItem]:
+    """
+    Retrieve several articles at once: one MGET for the cache, one IN query
+    for the misses and one pipeline to cache them.
+
+    Returns:
+        List[ArticleBatchItem]: One item per requested id, in request order,
+        with ``found=False`` for unknown ids.
+    """
+    unique_ids = list(dict.fromkeys(article_ids))
+    cached = get_cached_articles(unique_ids)
+    found: Dict[int, ArticleOut] = {
+        aid: _hydrate_from_cache(data) for aid, data in cached.items() if data is not MISSING
+    }
+
+    uncached = [aid for aid in unique_ids if aid not in cached]
+    candidates = [aid for aid, maybe in existence.might_exist(uncached).items() if maybe]
+    if candidates:
+        loaded = {a.id: ArticleOut.from_orm(a) for a in repo.get_articles_by_ids(db, candidates)}
+        set_cached_articles({aid: out.dict() for aid, out in loaded.items()},
+                            ttls=access_stats.ttls_for(list(loaded)))
+        found.update(loaded)
+    set_missing([aid for aid in uncached if aid not in found])
+
+    return [
+        ArticleBatchItem(id=aid, found=aid in found, article=found.get(aid))
+        for aid in article_ids
+    ]
+
+
 def update_article(db: Session, article_id: int, payload: ArticleUpdate) -> Article:
     """
     Update an existing article and refresh its cache.
@@ -78,9 +254,9 @@ def update_article(db: Session, article_id: int, payload: ArticleUpdate) -> Arti
     if article is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
 
+    old_title, old_author, old_tags = article.title, article.author, article.tags
     updated = repo.update_article(db, article, payload)
-    invalidate_article(article_id)
-    set_cached_article(article_id, _serialize_for_cache(updated))
+    _index_updated(updated, old_title, old_author, old_tags)
     return updated
 
 
@@ -95,26 +271,233 @@ def delete_article(db: Session, article_id: int) -> None:
     if article is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
 
+    title, author, tags = article.title, article.author, article.tags
     repo.delete_article(db, article)
-    invalidate_article(article_id)
+    _index_deleted(article_id, title, author, tags)
 
 
-def list_articles(db: Session, **kwargs) -> Tuple[List[Article], int]:
+def list_articles(db: Session, **kwargs) -> Tuple[List[Any], int]:
     """
     Retrieve a paginated list of articles through the repository layer.
 
     Returns:
-        Tuple[List[Article], int]: List of ORM Articles and total count.
+        Tuple[List[Any], int]: List of ORM Articles (dicts when ``fields`` is
+        given) and total count.
     """
     filters = ListFilters(**kwargs)
     return repo.list_articles(db, filters)
 
 
-def search_articles(db: Session, q: str, limit: int = 20) -> List[Article]:
+def search_articles(db: Session, q: str, limit: int = 20,
+                    fields: Optional[Sequence[str]] = None) -> List[Any]:
     """
     Perform a full-text search across article titles and bodies.
 
     Returns:
-        List[Article]: Matching ORM instances.
+        List[Any]: Matching ORM instances (dicts when ``fields`` is given).
+    """
+    return repo.search_articles(db, q, limit, fields)
+
+
+def suggest(prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Prefix autocomplete over titles and authors, served from Redis only.
+
+    Returns:
+        List[Dict[str, Any]]: Matches with their kind and article ids.
+    """
+    return typeahead.suggest(prefix, limit)
+
+
+def rebuild_suggest_index(db: Session) -> int:
+    """
+    Regenerate the typeahead index from Postgres, then redo the articles
+    written while the scan was running.
+
+    The final RENAME discards the index updates made during the scan, and
+    the scan itself may miss late commits or index rows deleted after it read
+    them. All of these belong to transactions that started at or after the
+    write horizon taken before the scan, so their articles are re-indexed from
+    the current rows, or dropped when a tombstone says they are gone.
+
+    Returns:
+        int: Number of articles indexed.
+    """
+    horizon = repo.write_horizon(db)
+    total = typeahead.rebuild(repo.iter_titles_authors(db))
+    changed = set(repo.iter_ids(db, changed_since=horizon))
+    changed.update(repo.list_deleted_ids(db, horizon))
+    rows = [(a.id, a.title, a.author) for a in repo.get_articles_by_ids(db, sorted(changed))]
+    typeahead.reindex(changed, rows)
+    return total
+
+
+def get_facets(limit: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Article counts per author and per tag, read from the Redis counters.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: ``{"author": [...], "tag": [...]}``.
+    """
+    return facets.counts(limit)
+
+
+def reconcile_facets(db: Session) -> Dict[str, Dict[str, int]]:
+    """
+    Recompute the facet counters from Postgres and swap them in.
+
+    Returns:
+        Dict[str, Dict[str, int]]: The recomputed counts.
+    """
+    recomputed = {"author": repo.count_by_author(db), "tag": repo.count_by_tag(db)}
+    facets.replace(recomputed)
+    return recomputed
+
+
+def warm_cache(db: Session, top_n: int, batch_size: int = 100) -> int:
+    """
+    Preload the ``top_n`` most accessed articles into the cache, in batches,
+    skipping those already cached.
+
+    Returns:
+        int: Number of articles loaded from the database.
+    """
+    article_ids = access_stats.top_articles(top_n)
+    warmed = 0
+    for start in range(0, len(article_ids), batch_size):
+        chunk = article_ids[start:start + batch_size]
+        cached = get_cached_articles(chunk)
+        misses = [aid for aid in chunk if aid not in cached]
+        if not misses:
+            continue
+        loaded = {a.id: _serialize_for_cache(a) for a in repo.get_articles_by_ids(db, misses)}
+        set_cached_articles(loaded, ttls=access_stats.ttls_for(list(loaded)))
+        warmed += len(loaded)
+    return warmed
+
+
+def rebuild_existence_filter(db: Session) -> int:
+    """
+    Rebuild the existence filter from Postgres, then re-add ids written while
+    the scan was running.
+
+    Rows committed during the scan (below its highest id too) and the ``add()``
+    calls the final RENAME overwrote all belong to transactions that started at
+    or after the write horizon taken before the scan, so re-scanning from there
+    catches them.
+
+    Returns:
+        int: Highest article id in the filter.
+    """
+    horizon = repo.write_horizon(db)
+    max_id = existence.rebuild(repo.iter_ids(db))
+    for article_id in repo.iter_ids(db, changed_since=horizon):
+        existence.add(article_id)
+        max_id = max(max_id, article_id)
+    return max_id
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.year * 12 + day.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def maintain_partitions(db: Session, months_ahead: int, archive_after_months: int = 0,
+                        today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Create monthly partitions through ``months_ahead`` and, when
+    ``archive_after_months`` is set, archive the ones older than that and drop
+    their articles from Redis.
+
+    Returns:
+        Dict[str, int]: Number of partitions ``created`` and ``archived``.
+    """
+    today = today or date.today()
+    created = repo.ensure_partitions(db, today, _add_months(today, months_ahead))
+    archived = 0
+    if archive_after_months > 0:
+        cutoff = _add_months(today, -archive_after_months)
+        archived, article_ids = repo.archive_partitions(db, cutoff)
+        _forget_archived(db, article_ids)
+    return {"created": created, "archived": archived}
+
+
+def _forget_archived(db: Session, article_ids: List[int]) -> None:
+    """
+    Drop archived articles from the cache and the Redis indexes, as deletes
+    would. Archiving is committed by now, so a Redis failure is logged and left
+    to the periodic rebuilds and to cache expiry.
+    """
+    if not article_ids:
+        return
+
+    def _forget_each() -> None:
+        for article_id in article_ids:
+            invalidate_article(article_id)
+            access_stats.forget(article_id)
+            existence.remove(article_id)
+
+    steps = (
+        ("cache, access stats and existence filter", _forget_each),
+        ("negative cache", lambda: set_missing(article_ids)),
+        ("typeahead", lambda: typeahead.reindex(article_ids, [])),
+        ("facets", lambda: reconcile_facets(db)),
+        ("change feed", change_feed.publish),
+    )
+    for name, step in steps:
+        try:
+            step()
+        except RedisError:
+            logger.exception("Could not update the %s for %d archived articles",
+                             name, len(article_ids))
+
+
+def encode_cursor(at: datetime, article_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{at.isoformat()}|{article_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        at, article_id = raw.split("|")
+        return datetime.fromisoformat(at), int(article_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from e
+
+
+def _cursor_expired(after: Tuple[datetime, int], horizon: datetime, retention_days: int) -> bool:
+    """
+    True when deletions after the cursor may already have been pruned.
+    """
+    return after[0] < horizon - timedelta(days=retention_days)
+
+
+def list_changes(db: Session, since: Optional[str] = None, limit: int = 100,
+                 retention_days: int = 0) -> Dict[str, Any]:
+    """
+    Return the changes after ``since`` and the cursor to resume from.
+
+    Raises:
+        HTTPException: 400 for a malformed cursor, 410 for one older than the
+            tombstone retention (deletions may have been pruned; resync).
+    """
+    after = decode_cursor(since) if since else None
+    rows, horizon = repo.list_changes(db, after, limit)
+    # End the transaction: long-polls must not hold a connection between checks
+    db.commit()
+    if after is not None and retention_days > 0 and _cursor_expired(after, horizon, retention_days):
+        raise HTTPException(status_code=status.HTTP_410_GONE,
+                            detail="Cursor is older than the change feed retention; resync")
+    cursor = encode_cursor(*rows[-1][:2]) if rows else since
+    return {
+        "changes": [{"id": article_id, "op": op, "at": at} for at, article_id, op in rows],
+        "cursor": cursor,
+        "has_more": len(rows) == limit,
+    }
+
+
+def prune_tombstones(db: Session, retention_days: int) -> int:
+    """
+    Drop deletion tombstones older than the change feed retention.
     """
-    return repo.search_articles(db, q, limit)
+    return repo.prune_tombstones(db, timedelta(days=retention_days))
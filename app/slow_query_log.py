@@ -0,0 +1,186 @@
+"""
+Slow-query log with automatic EXPLAIN capture.
+
+Statements slower than ``SLOW_QUERY_MS`` are recorded with their normalized
+SQL, (optionally redacted) parameters and the service function that issued
+them. A ``SLOW_QUERY_EXPLAIN_SAMPLE_RATE`` share of them also get their plan
+captured: ``EXPLAIN (ANALYZE, BUFFERS)`` for plain SELECTs when
+``SLOW_QUERY_EXPLAIN_ANALYZE`` is set, plain ``EXPLAIN`` otherwise, since
+ANALYZE executes the statement again.
+
+Entries go to a rotating JSON-lines file and to an in-memory ring buffer that
+``GET /admin/slow-queries`` exposes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import Settings, get_settings
+
+_WS = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \([^()]*\)", re.IGNORECASE)
+
+_active: Optional["SlowQueryLog"] = None
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Collapse whitespace, literals and IN-lists so equivalent statements group together.
+    """
+    sql = _WS.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+def _redact(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {k: "?" for k in parameters}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(p) if isinstance(p, (dict, list, tuple)) else "?" for p in parameters]
+    return parameters
+
+
+def _find_caller() -> Optional[str]:
+    """
+    Return ``module:function`` of the innermost service frame (repository as fallback).
+    """
+    fallback = None
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.services."):
+            return f"{module}:{frame.f_code.co_name}"
+        if fallback is None and module.startswith("app.repositories."):
+            fallback = f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback
+
+
+class SlowQueryLog:
+    """
+    SQLAlchemy engine listener recording slow statements.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.threshold = settings.SLOW_QUERY_MS / 1000.0
+        self.buffer: deque[dict] = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+        self.logger = logging.getLogger("app.slow_query_log.entries")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if settings.SLOW_QUERY_LOG_PATH and not self.logger.handlers:
+            handler = RotatingFileHandler(
+                settings.SLOW_QUERY_LOG_PATH,
+                maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+                delay=True,
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def detach(self, engine: Engine) -> None:
+        event.remove(engine, "before_cursor_execute", self._before)
+        event.remove(engine, "after_cursor_execute", self._after)
+        event.remove(engine, "handle_error", self._error)
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        """
+        Return up to ``limit`` entries, newest first.
+        """
+        return list(reversed(self.buffer))[:limit]
+
+    def _before(self, conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _error(self, exception_context) -> None:
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_start"):
+            conn.info["slow_query_start"].pop()
+
+    def _after(self, conn, _cursor, statement, parameters, _context, executemany) -> None:
+        stack = conn.info.get("slow_query_start")
+        if not stack:
+            return  # attached while the statement was in flight
+        elapsed = time.perf_counter() - stack.pop()
+        if elapsed < self.threshold:
+            return
+
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql": normalize_sql(statement),
+            "parameters": (_redact(parameters) if self.settings.SLOW_QUERY_REDACT_PARAMS
+                           else parameters),
+            "caller": _find_caller(),
+            "plan": None,
+        }
+        if (not executemany and conn.dialect.name == "postgresql"
+                and random.random() < self.settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE):
+            entry["plan"] = self._explain(conn, statement, parameters)
+
+        self.buffer.append(entry)
+        self.logger.info(json.dumps(entry, default=str))
+
+    def _explain(self, conn, statement: str, parameters: Any) -> Optional[list[str]]:
+        analyze = (self.settings.SLOW_QUERY_EXPLAIN_ANALYZE
+                   and statement.lstrip().upper().startswith("SELECT")
+                   and " FOR UPDATE" not in statement.upper())
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        # Raw DBAPI cursor: bypasses engine events so EXPLAIN is not itself logged
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception:  # pylint: disable=broad-except
+            return None
+        finally:
+            cursor.close()
+
+
+def install(engine: Engine, settings: Optional[Settings] = None) -> Optional[SlowQueryLog]:
+    """
+    Attach the slow-query log to ``engine`` unless ``SLOW_QUERY_MS`` is 0.
+    """
+    global _active  # pylint: disable=global-statement
+    settings = settings or get_settings()
+    if settings.SLOW_QUERY_MS <= 0:
+        return None
+    if _active is not None:
+        _active.detach(engine)
+    _active = SlowQueryLog(settings)
+    _active.attach(engine)
+    return _active
+
+
+def recent(limit: int = 50) -> list[dict]:
+    """
+    Return the latest entries of the installed slow-query log.
+    """
+    if _active is None:
+        return []
+    return _active.recent(limit)
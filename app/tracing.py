@@ -0,0 +1,369 @@
+"""
+Opt-in lightweight tracing: one span per layer call, SQL statement and
+Redis command.
+
+Nothing is wired up unless ``TRACING_ENABLED`` is set. ``install()`` then adds
+``TracingMiddleware``, which opens a server span per request, continuing the
+trace of an incoming W3C ``traceparent`` header. It also wraps the public
+functions of the service, repository and cache modules in place, and hooks
+SQLAlchemy and redis-py. Sampling is decided once at the head of the trace:
+an incoming sampled flag is honoured, otherwise ``TRACE_SAMPLE_RATE`` applies.
+Unsampled requests only pay a ContextVar lookup per instrumented call.
+
+Finished traces are handed to a background thread and sent to the
+configured exporter (``TRACE_EXPORTER``): ``stdout``, ``file`` (JSON lines in
+``TRACE_FILE``), ``none``, or ``module:factory`` for a custom one.
+``python -m app.scripts.trace_waterfall <trace_id>`` renders a trace from the
+file exporter as a waterfall.
+"""
+from __future__ import annotations
+
+import functools
+import importlib
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import redis_hooks
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Modules whose public functions get a span, with the layer they belong to
+LAYERS = {
+    "app.services.articles": "service",
+    "app.repositories.articles": "repository",
+    "app.cache": "cache",
+}
+
+_current: ContextVar[Optional["Span"]] = ContextVar("rocket_current_span", default=None)
+_exporter: Optional["_BackgroundExporter"] = None
+
+
+@dataclass(slots=True)
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    layer: str
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    # Spans of the trace finished so far, shared by every span of the request
+    finished: List["Span"] = field(default_factory=list, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in _SPAN_FIELDS}
+        data["duration_ms"] = round((self.end_ns - self.start_ns) / 1e6, 3)
+        return data
+
+
+_SPAN_FIELDS = [f.name for f in fields(Span) if f.name != "finished"]
+
+
+class Exporter(Protocol):
+    def export(self, spans: List[Dict[str, Any]]) -> None: ...
+
+
+class StdoutExporter:
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        for record in spans:
+            sys.stdout.write(json.dumps(record, default=str) + "\n")
+        sys.stdout.flush()
+
+
+class FileExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for record in spans:
+                fh.write(json.dumps(record, default=str) + "\n")
+
+
+class NoopExporter:
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        pass
+
+
+def make_exporter(settings: Settings) -> Exporter:
+    """
+    Build the exporter named by ``TRACE_EXPORTER``; ``module:factory`` plugs in
+    a custom one, called with the settings.
+    """
+    name = settings.TRACE_EXPORTER
+    if name == "stdout":
+        return StdoutExporter()
+    if name == "file":
+        return FileExporter(settings.TRACE_FILE)
+    if name == "none":
+        return NoopExporter()
+    module, _, factory = name.partition(":")
+    return getattr(importlib.import_module(module), factory)(settings)
+
+
+class _BackgroundExporter:
+    """
+    Exports finished traces off the request path; drops them when the queue is full.
+
+    The thread is started by the first trace each process submits: the app may
+    be created in the gunicorn master, and forked workers do not inherit its
+    threads.
+    """
+
+    def __init__(self, exporter: Exporter, max_queue: int = 1000):
+        self.exporter = exporter
+        self.max_queue = max_queue
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Traces queued in the parent are not this process's to export
+                self.queue = queue.Queue(maxsize=self.max_queue)
+                threading.Thread(target=self._run, args=(self.queue,), name="trace-exporter",
+                                 daemon=True).start()
+                self._pid = os.getpid()
+
+    def submit(self, spans: List[Span]) -> None:
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("Trace export queue full, dropping a trace")
+
+    def _run(self, pending: queue.Queue) -> None:
+        while True:
+            spans = pending.get()
+            try:
+                self.exporter.export([finished.to_dict() for finished in spans])
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Trace export failed")
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _start(name: str, layer: str, attributes: Dict[str, Any]) -> Tuple[Optional[Span], Any]:
+    parent = _current.get()
+    if parent is None:
+        return None, None
+    child = Span(parent.trace_id, _new_id(8), parent.span_id, name, layer,
+                 attributes=attributes, finished=parent.finished)
+    return child, _current.set(child)
+
+
+def _finish(ended: Span, token: Any, error: Optional[BaseException] = None) -> None:
+    ended.end_ns = time.time_ns()
+    if error is not None:
+        ended.error = repr(error)
+    ended.finished.append(ended)
+    _current.reset(token)
+
+
+@dataclass(slots=True)
+class _SpanScope:
+    name: str
+    layer: str
+    attributes: Dict[str, Any]
+    span: Optional[Span] = None
+    token: Any = None
+
+    def __enter__(self) -> Optional[Span]:
+        self.span, self.token = _start(self.name, self.layer, self.attributes)
+        return self.span
+
+    def __exit__(self, _exc_type, exc, _tb) -> None:
+        if self.span is not None:
+            _finish(self.span, self.token, exc)
+
+
+def span(name: str, layer: str = "app", **attributes: Any) -> _SpanScope:
+    """
+    Context manager opening a child span when the request is sampled.
+    """
+    return _SpanScope(name, layer, attributes)
+
+
+def traced(func: Callable, layer: str) -> Callable:
+    """
+    Wrap ``func`` (sync or async) in a span named after it.
+    """
+    name = f"{func.__module__.removeprefix('app.')}.{func.__name__}"
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def _async(*args, **kwargs):
+            if _current.get() is None:
+                return await func(*args, **kwargs)
+            with span(name, layer):
+                return await func(*args, **kwargs)
+        wrapper: Callable = _async
+    else:
+        @functools.wraps(func)
+        def _sync(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(name, layer):
+                return func(*args, **kwargs)
+        wrapper = _sync
+    wrapper.__traced__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _instrument_layers() -> None:
+    """
+    Replace each layer function everywhere it is referenced under ``app.``,
+    including names imported with ``from ... import``. Generators are left
+    alone: they stream batch jobs, not request work.
+    """
+    replacements: Dict[int, Callable] = {}
+    for module_name, layer in LAYERS.items():
+        module = importlib.import_module(module_name)
+        for attr, value in list(vars(module).items()):
+            if (inspect.isfunction(value) and value.__module__ == module_name
+                    and not attr.startswith("_") and not inspect.isgeneratorfunction(value)
+                    and not getattr(value, "__traced__", False)):
+                replacements[id(value)] = traced(value, layer)
+    for module in list(sys.modules.values()):
+        if module is None or not getattr(module, "__name__", "").startswith("app."):
+            continue
+        for attr, value in list(vars(module).items()):
+            if id(value) in replacements and callable(value):
+                setattr(module, attr, replacements[id(value)])
+
+
+def _sql_start(conn, _cursor, statement, _parameters, _context, executemany) -> None:
+    attributes = {"db.statement": statement[:500], "executemany": executemany}
+    child, token = _start("sql", "sql", attributes)
+    conn.info.setdefault("trace_spans", []).append((child, token))
+
+
+def _sql_end(conn, *_args) -> None:
+    stack = conn.info.get("trace_spans")
+    if stack:
+        child, token = stack.pop()
+        if child is not None:
+            _finish(child, token)
+
+
+def _sql_error(exception_context) -> None:
+    conn = exception_context.connection
+    stack = conn.info.get("trace_spans") if conn is not None else None
+    if stack:
+        child, token = stack.pop()
+        if child is not None:
+            _finish(child, token, exception_context.original_exception)
+
+
+def _redis_span(proceed: Callable[[], Any], client: Any, op: str, args: tuple) -> Any:
+    if _current.get() is None:
+        return proceed()
+    if op == "pipeline":
+        with span("redis pipeline", "redis", commands=len(client.command_stack)):
+            return proceed()
+    with span(f"redis {op}", "redis", key=str(args[1])[:200] if len(args) > 1 else None):
+        return proceed()
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of sampled requests.
+    """
+
+    def __init__(self, app: Any, settings: Settings):
+        self.app = app
+        self.rate = settings.TRACE_SAMPLE_RATE
+
+    def _head(self, scope: dict) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Return ``(trace_id, parent_span_id)`` when the request is sampled.
+        """
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                match = TRACEPARENT.match(value.decode("latin-1").strip())
+                if match and match.group(1) != "0" * 32:
+                    sampled = int(match.group(3), 16) & 0x01
+                    return (match.group(1), match.group(2)) if sampled else None
+        if self.rate > 0 and random.random() < self.rate:
+            return _new_id(16), None
+        return None
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        head = self._head(scope) if scope["type"] == "http" else None
+        if head is None:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(head[0], _new_id(8), head[1], f"{scope['method']} {scope['path']}", "router",
+                    attributes={"http.method": scope["method"], "http.target": scope["path"]})
+        token = _current.set(root)
+
+        async def _send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-trace-id", root.trace_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except Exception as e:
+            root.error = repr(e)
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            root.end_ns = time.time_ns()
+            root.finished.append(root)
+            _current.reset(token)
+            if _exporter is not None:
+                _exporter.submit(root.finished)
+
+
+def install(application: FastAPI, engine: Engine, settings: Optional[Settings] = None) -> None:
+    """
+    Wire the tracing middleware, layer wrappers and SQL/Redis hooks into the app.
+    """
+    global _exporter  # pylint: disable=global-statement
+    settings = settings or get_settings()
+    if _exporter is None:
+        _exporter = _BackgroundExporter(make_exporter(settings))
+    _instrument_layers()
+    if not event.contains(engine, "before_cursor_execute", _sql_start):
+        event.listen(engine, "before_cursor_execute", _sql_start)
+        event.listen(engine, "after_cursor_execute", _sql_end)
+        event.listen(engine, "handle_error", _sql_error)
+    redis_hooks.register(_redis_span)
+    application.add_middleware(TracingMiddleware, settings=settings)
@@ -0,0 +1,118 @@
+"""
+Prefix autocomplete over titles and authors, kept in Redis sorted sets.
+
+Every article contributes one member per kind, ``"{lowercased}\\0{text}\\0{id}"``,
+all with score 0, so ``ZRANGEBYLEX`` answers a prefix query with a single
+O(log n + N) range read. The services keep the sets in sync on
+create/update/delete; ``rebuild`` regenerates them from Postgres and
+``reindex`` then replaces the articles written while it ran.
+"""
+from typing import Collection, Dict, Iterable, List, Tuple
+
+from .cache import redis_client
+
+KINDS = ("title", "author")
+_SEP = "\x00"
+
+
+def index_key(kind: str) -> str:
+    return f"suggest:{kind}"
+
+
+def _member(text: str, article_id: int) -> str:
+    return f"{text.lower()}{_SEP}{text}{_SEP}{article_id}"
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def index_article(article_id: int, title: str, author: str) -> None:
+    pipe = redis_client().pipeline(transaction=False)
+    pipe.zadd(index_key("title"), {_member(title, article_id): 0})
+    pipe.zadd(index_key("author"), {_member(author, article_id): 0})
+    pipe.execute()
+
+
+def unindex_article(article_id: int, title: str, author: str) -> None:
+    pipe = redis_client().pipeline(transaction=False)
+    pipe.zrem(index_key("title"), _member(title, article_id))
+    pipe.zrem(index_key("author"), _member(author, article_id))
+    pipe.execute()
+
+
+def suggest(prefix: str, limit: int = 10) -> List[Dict]:
+    """
+    Return up to ``limit`` titles and ``limit`` authors starting with ``prefix``
+    (case-insensitive), each with the ids of the articles it belongs to.
+    """
+    low = prefix.lower().encode()
+    pipe = redis_client().pipeline(transaction=False)
+    for kind in KINDS:
+        # Authors repeat across articles: over-fetch so grouping still yields `limit` names
+        count = limit if kind == "title" else limit * 5
+        pipe.zrangebylex(index_key(kind), b"[" + low, b"[" + low + b"\xff", start=0, num=count)
+
+    results: List[Dict] = []
+    for kind, members in zip(KINDS, pipe.execute()):
+        grouped: Dict[str, List[int]] = {}
+        for member in members:
+            _, text, article_id = _decode(member).split(_SEP)
+            if text not in grouped and len(grouped) == limit:
+                break
+            grouped.setdefault(text, []).append(int(article_id))
+        results.extend({"kind": kind, "text": text, "ids": ids} for text, ids in grouped.items())
+    return results
+
+
+def rebuild(rows: Iterable[Tuple[int, str, str]], batch_size: int = 1000) -> int:
+    """
+    Regenerate both sets from ``(id, title, author)`` rows, swapping them in atomically.
+
+    Returns:
+        int: Number of articles indexed.
+    """
+    r = redis_client()
+    staging = {kind: f"{index_key(kind)}:rebuild" for kind in KINDS}
+    r.delete(*staging.values())
+
+    total = 0
+    pipe = r.pipeline(transaction=False)
+    for article_id, title, author in rows:
+        pipe.zadd(staging["title"], {_member(title, article_id): 0})
+        pipe.zadd(staging["author"], {_member(author, article_id): 0})
+        total += 1
+        if total % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+
+    pipe = r.pipeline(transaction=True)
+    for kind in KINDS:
+        if total:
+            pipe.rename(staging[kind], index_key(kind))
+        else:
+            pipe.delete(index_key(kind))
+    pipe.execute()
+    return total
+
+
+def reindex(article_ids: Collection[int], rows: Iterable[Tuple[int, str, str]]) -> None:
+    """
+    Replace every member of ``article_ids`` with the ``(id, title, author)``
+    rows given for them; ids without a row (deleted articles) are only removed.
+
+    Members are found by scanning the sets, as their text is not known here.
+    """
+    if not article_ids:
+        return
+    wanted = {str(article_id) for article_id in article_ids}
+    r = redis_client()
+    pipe = r.pipeline(transaction=False)
+    for kind in KINDS:
+        for member, _ in r.zscan_iter(index_key(kind)):
+            if _decode(member).rsplit(_SEP, 1)[-1] in wanted:
+                pipe.zrem(index_key(kind), member)
+    for article_id, title, author in rows:
+        pipe.zadd(index_key("title"), {_member(title, article_id): 0})
+        pipe.zadd(index_key("author"), {_member(author, article_id): 0})
+    pipe.execute()
@@ -0,0 +1,43 @@
+# ===== rocket-code API — production server (SERVER_MODE=production) =====
+# gunicorn manages uvicorn workers: one per available CPU, recycled after
+# MAX_REQUESTS, drained gracefully on SIGTERM.
+import os
+
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", _cpu_count()))
+
+# Import the app once in the master; workers fork from it (see app/lifecycle.py)
+preload_app = True
+
+# Recycle workers to cap memory growth; jitter avoids restarting all at once
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# SIGTERM: stop accepting, let in-flight requests finish within graceful_timeout
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):  # pylint: disable=unused-argument
+    from app.lifecycle import prepare_master  # pylint: disable=import-outside-toplevel
+
+    prepare_master()
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    from app.lifecycle import after_fork  # pylint: disable=import-outside-toplevel
+
+    after_fork()
@@ -76,6 +76,11 @@ def _override_get_db(db_session, monkeypatch):
     if get_db_target is not None:
         app.dependency_overrides[get_db_target] = _test_get_db
 
+    from app.db import db as app_db_mod
+    # Sessions opened on demand join the test transaction too
+    app.dependency_overrides[app_db_mod.get_session_factory] = (
+        lambda: lambda: SessionLocal(bind=db_session.get_bind()))
+
 
 import fakeredis
 
@@ -97,6 +102,15 @@ def _fake_redis(monkeypatch):
     except Exception:
         pass
 
+    try:
+        from app import fast_path as app_fast_path
+        # Same fake server (shared by host/port), seen through an asyncio client on whichever loop asks
+        kwargs = fr.connection_pool.connection_kwargs
+        monkeypatch.setattr(app_fast_path, "client",
+                            lambda: fakeredis.FakeAsyncRedis(host=kwargs["host"], port=kwargs["port"]))
+    except Exception:
+        pass
+
     yield
     try:
         fr.flushall()
@@ -8,3 +8,183 @@ def test_crud_flow(client):
     r = client.get("/articles", headers=headers); assert r.status_code == 200
     r = client.get("/articles/search", headers=headers, params={"q":"Big"}); assert r.status_code == 200
     r = client.delete(f"/articles/{aid}", headers=headers); assert r.status_code == 204
+
+
+def test_batch_fetch_keeps_order_and_marks_missing(client):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    a = client.post("/articles", headers=headers, json={"title":"B1","body":"x","author":"Batch"}).json()["id"]
+    b = client.post("/articles", headers=headers, json={"title":"B2","body":"y","author":"Batch"}).json()["id"]
+    from app import cache
+    cache.invalidate_article(b)
+    r = client.get("/articles/batch", headers=headers, params={"ids": f"{b},999999,{a}"})
+    assert r.status_code == 200, r.text
+    assert [(it["id"], it["found"]) for it in r.json()] == [(b, True), (999999, False), (a, True)]
+    assert r.json()[0]["article"]["title"] == "B2"
+    assert cache.get_cached_article(b) is not None
+    r = client.post("/articles/batch", headers=headers, json={"ids": [a, a]})
+    assert r.status_code == 200 and [it["id"] for it in r.json()] == [a, a]
+
+
+def test_sparse_fieldsets_and_summary(client):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    aid = client.post("/articles", headers=headers, json={"title":"Sparse","body":"z" * 500,"author":"Proj"}).json()["id"]
+    r = client.get("/articles", headers=headers, params={"author": "Proj", "fields": "title,summary"})
+    assert r.status_code == 200, r.text
+    assert r.json() == [{"id": aid, "title": "Sparse", "summary": "z" * 200}]
+    r = client.get(f"/articles/{aid}", headers=headers, params={"fields": "author"})
+    assert r.json() == {"id": aid, "author": "Proj"}
+    r = client.get("/articles/search", headers=headers, params={"q": "Sparse", "fields": "title"})
+    assert r.json() == [{"id": aid, "title": "Sparse"}]
+    r = client.get("/articles", headers=headers, params={"fields": "nope"})
+    assert r.status_code == 422
+
+
+def test_projected_datetimes_do_not_depend_on_cache_state(client):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    aid = client.post("/articles", headers=headers, json={"title":"When","body":"b","author":"Clock","published_at":"2024-05-01T10:00:00"}).json()["id"]
+    params = {"fields": "published_at,created_at"}
+    hit = client.get(f"/articles/{aid}", headers=headers, params=params).json()
+    from app import cache
+    cache.invalidate_article(aid)
+    miss = client.get(f"/articles/{aid}", headers=headers, params=params).json()
+    assert hit == miss and hit["published_at"] == "2024-05-01T10:00:00"
+
+
+def test_suggest_follows_writes_and_rebuild(client, db_session):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    aid = client.post("/articles", headers=headers, json={"title":"Typeahead Tips","body":"b","author":"Zelda"}).json()["id"]
+    r = client.get("/articles/suggest", headers=headers, params={"prefix": "typea"})
+    assert r.status_code == 200, r.text
+    assert r.json() == [{"kind": "title", "text": "Typeahead Tips", "ids": [aid]}]
+    assert client.get("/articles/suggest", headers=headers, params={"prefix": "zel"}).json()[0]["ids"] == [aid]
+    client.put(f"/articles/{aid}", headers=headers, json={"title": "Renamed"})
+    assert client.get("/articles/suggest", headers=headers, params={"prefix": "typea"}).json() == []
+    from app import cache
+    from app.services import articles as svc
+    cache.redis_client().flushall()
+    assert svc.rebuild_suggest_index(db_session) >= 1
+    assert client.get("/articles/suggest", headers=headers, params={"prefix": "renamed"}).json()[0]["ids"] == [aid]
+    client.delete(f"/articles/{aid}", headers=headers)
+    assert client.get("/articles/suggest", headers=headers, params={"prefix": "renamed"}).json() == []
+
+
+def test_facets_follow_writes_and_reconcile(client, db_session):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    a = client.post("/articles", headers=headers, json={"title":"F1","body":"b","tags":["x","y"],"author":"Fa"}).json()["id"]
+    client.post("/articles", headers=headers, json={"title":"F2","body":"b","tags":["x"],"author":"Fa"})
+    client.put(f"/articles/{a}", headers=headers, json={"tags": ["y", "z"], "author": "Fb"})
+    r = client.get("/articles/facets", headers=headers)
+    assert r.status_code == 200, r.text
+    incremental = r.json()
+    assert {f["value"]: f["count"] for f in incremental["author"]} == {"Fa": 1, "Fb": 1}
+    assert {f["value"]: f["count"] for f in incremental["tag"]} == {"x": 1, "y": 1, "z": 1}
+    from app.services import articles as svc
+    svc.reconcile_facets(db_session)
+    assert client.get("/articles/facets", headers=headers).json() == incremental
+    client.delete(f"/articles/{a}", headers=headers)
+    assert client.get("/articles/facets", headers=headers, params={"limit": 1}).json() == {
+        "author": [{"value": "Fa", "count": 1}], "tag": [{"value": "x", "count": 1}]}
+
+
+def test_published_range_filter_and_partition_maintenance(client, db_session):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    from datetime import date
+    from sqlalchemy import text
+    from app.services import articles as svc
+    assert svc.maintain_partitions(db_session, 1, today=date(2031, 5, 10)) == {"created": 2, "archived": 0}
+    for title, day in (("P1", "2031-05-02"), ("P2", "2031-05-20"), ("P3", "2031-06-01")):
+        client.post("/articles", headers=headers, json={"title":title,"body":"b","author":"Part","published_at":f"{day}T12:00:00"})
+    client.post("/articles", headers=headers, json={"title":"P4","body":"b","author":"Part"})
+    r = client.get("/articles", headers=headers, params={
+        "author": "Part", "published_from": "2031-05-02T12:00:00", "published_to": "2031-05-31T00:00:00", "fields": "title"})
+    assert r.status_code == 200, r.text
+    assert [it["title"] for it in r.json()] == ["P2", "P1"]
+    partitions = dict(db_session.execute(text(
+        "SELECT title, tableoid::regclass::text FROM articles WHERE author = 'Part'")).all())
+    assert partitions == {"P1": "articles_y2031m05", "P2": "articles_y2031m05",
+                          "P3": "articles_y2031m06", "P4": "articles_default"}
+    r = client.get("/articles", headers=headers, params={"published_from": "2031-06-01T00:00:00", "published_to": "2031-05-01T00:00:00"})
+    assert r.status_code == 422
+
+
+def test_change_feed_returns_changes_after_the_cursor(client):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    start = client.get("/articles/changes", headers=headers, params={"limit": 1000}).json()
+    while start["has_more"]:
+        start = client.get("/articles/changes", headers=headers, params={"since": start["cursor"], "limit": 1000}).json()
+    a = client.post("/articles", headers=headers, json={"title":"C1","body":"b","author":"Feed"}).json()["id"]
+    b = client.post("/articles", headers=headers, json={"title":"C2","body":"b","author":"Feed"}).json()["id"]
+    client.delete(f"/articles/{b}", headers=headers)
+    params = {"since": start["cursor"]} if start["cursor"] else {}
+    r = client.get("/articles/changes", headers=headers, params=params)
+    assert r.status_code == 200, r.text
+    assert [(c["id"], c["op"]) for c in r.json()["changes"]][-2:] == [(a, "created"), (b, "deleted")]
+    r = client.get("/articles/changes", headers=headers, params={"since": r.json()["cursor"], "wait": 0.2})
+    assert r.json()["changes"] == [] and r.json()["has_more"] is False
+    assert client.get("/articles/changes", headers=headers, params={"since": "garbage!"}).status_code == 400
+
+
+def test_published_range_accepts_mixed_timezone_bounds(client):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    client.post("/articles", headers=headers, json={"title":"Tz","body":"b","author":"Zone","published_at":"2031-05-10T12:00:00"})
+    params = {"author": "Zone", "fields": "title"}
+    r = client.get("/articles", headers=headers, params={**params, "published_from": "2031-05-10T13:00:00+02:00", "published_to": "2031-05-10T12:00:00"})
+    assert r.status_code == 200, r.text
+    assert [it["title"] for it in r.json()] == ["Tz"]
+    r = client.get("/articles", headers=headers, params={**params, "published_from": "2031-05-10T12:00:00", "published_to": "2031-05-10T13:00:00+02:00"})
+    assert r.status_code == 422
+
+
+def test_committed_writes_survive_a_redis_outage(client, monkeypatch):
+    import fakeredis
+    from app import cache
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    aid = client.post("/articles", headers=headers, json={"title":"Outage","body":"b","author":"Down"}).json()["id"]
+    server = fakeredis.FakeServer()
+    server.connected = False
+    monkeypatch.setattr(cache, "_r", fakeredis.FakeRedis(server=server))  # rate limits keep their own client
+    r = client.put(f"/articles/{aid}", headers=headers, json={"title":"Outage 2"}); assert r.status_code == 200, r.text
+    assert r.json()["title"] == "Outage 2"
+    r = client.delete(f"/articles/{aid}", headers=headers); assert r.status_code == 204, r.text
+
+
+def test_suggest_rebuild_keeps_writes_made_during_the_scan(client, db_session, monkeypatch):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    late = client.post("/articles", headers=headers, json={"title":"Latecomer","body":"b","author":"Scan"}).json()["id"]
+    gone = client.post("/articles", headers=headers, json={"title":"Goner","body":"b","author":"Scan"}).json()["id"]
+    from sqlalchemy import text
+    from app.services import articles as svc
+    real_iter = svc.repo.iter_titles_authors
+    # Writes of transactions that started after the rebuild's horizon
+    db_session.execute(text("UPDATE articles SET updated_at = now() + interval '1 second' WHERE id = :id"),
+                       {"id": late})
+
+    def _iter_titles_authors(db):
+        # The scan misses a late commit and reads a row deleted before the swap
+        yield from [row for row in real_iter(db) if row[0] != late]
+        assert client.delete(f"/articles/{gone}", headers=headers).status_code == 204
+        db.execute(text("UPDATE article_tombstones SET deleted_at = now() + interval '1 second' "
+                        "WHERE article_id = :id"), {"id": gone})
+
+    monkeypatch.setattr(svc.repo, "iter_titles_authors", _iter_titles_authors)
+    svc.rebuild_suggest_index(db_session)
+    assert client.get("/articles/suggest", headers=headers, params={"prefix": "latecomer"}).json()[0]["ids"] == [late]
+    assert client.get("/articles/suggest", headers=headers, params={"prefix": "goner"}).json() == []
+
+
+def test_archived_partitions_are_dropped_from_redis_and_the_change_feed(client, db_session):
+    headers = {"x-api-key":"47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    from datetime import date
+    from sqlalchemy import text
+    from app.services import articles as svc
+    svc.maintain_partitions(db_session, 1, today=date(2032, 3, 10))
+    article = {"title":"Archivable","body":"b","author":"Archivist","published_at":"2032-03-02T12:00:00"}
+    aid = client.post("/articles", headers=headers, json=article).json()["id"]
+    assert client.get(f"/articles/{aid}", headers=headers).status_code == 200  # now cached
+    assert svc.maintain_partitions(db_session, 0, 1, today=date(2032, 5, 1))["archived"] >= 1
+    assert client.get(f"/articles/{aid}", headers=headers).status_code == 404
+    assert client.get("/articles/suggest", headers=headers, params={"prefix": "archivable"}).json() == []
+    assert "Archivist" not in {f["value"] for f in client.get("/articles/facets", headers=headers).json()["author"]}
+    assert db_session.execute(text("SELECT count(*) FROM article_tombstones WHERE article_id = :id"),
+                              {"id": aid}).scalar_one() == 1
+    assert client.post("/articles", headers=headers, json=article).status_code == 201
@@ -0,0 +1,69 @@
+import pytest
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+@pytest.fixture
+def always_sample(monkeypatch):
+    from app import access_stats
+    monkeypatch.setattr(access_stats, "_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(access_stats, "_HOT_THRESHOLD", 3)
+    return access_stats
+
+
+def test_ttl_adapts_to_reads_and_edits(always_sample):
+    # ---------- Arrange ----------
+    stats = always_sample
+
+    # ---------- Act ----------
+    for _ in range(3):
+        stats.record_read(1)
+    stats.record_read(2)
+    for _ in range(3):
+        stats.record_read(3)
+    stats.record_edit(3)
+
+    # ---------- Assert ----------
+    assert stats.ttls_for([1, 2, 3, 4]) == {
+        1: stats._TTL_MAX, 2: stats._TTL, 3: stats._TTL_MIN, 4: stats._TTL_MIN,
+    }
+    stats.decay()
+    assert stats.ttl_for(1) == stats._TTL
+    assert set(stats.top_articles(2)) == {1, 3}
+
+
+def test_warm_cache_preloads_hot_articles(always_sample, client, db_session):
+    # ---------- Arrange ----------
+    from app import cache
+    from app.services import articles as svc
+
+    ids = [client.post("/articles", headers=HEADERS,
+                       json={"title": f"W{i}", "body": "b", "author": "warm"}).json()["id"]
+           for i in range(3)]
+    for aid in ids[:2]:
+        client.get(f"/articles/{aid}", headers=HEADERS)
+    for aid in ids:
+        cache.invalidate_article(aid)
+
+    # ---------- Act ----------
+    warmed = svc.warm_cache(db_session, top_n=10, batch_size=1)
+
+    # ---------- Assert ----------
+    assert warmed == 2
+    assert set(cache.get_cached_articles(ids)) == set(ids[:2])
+
+
+def test_reads_of_missing_articles_are_not_scored(always_sample, client):
+    # ---------- Arrange ----------
+    from app.cache import redis_client
+
+    aid = client.post("/articles", headers=HEADERS, json={"title": "S", "body": "b", "author": "a"}).json()["id"]
+
+    # ---------- Act ----------
+    for path in (f"/articles/{aid}", f"/articles/{aid + 1000}", f"/articles/{aid + 1000}?fields=title"):
+        client.get(path, headers=HEADERS)
+
+    # ---------- Assert ----------
+    assert redis_client().zrange(always_sample.HOT_KEY, 0, -1) == [str(aid)]
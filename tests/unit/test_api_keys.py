@@ -0,0 +1,108 @@
+import pytest
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+@pytest.fixture
+def key_loads(monkeypatch):
+    from app import api_keys
+    from app.services import api_keys as key_service
+
+    api_keys.evict()
+    calls = []
+    real_load = key_service.load_key
+
+    def _load(db, prefix):
+        calls.append(prefix)
+        return real_load(db, prefix)
+
+    monkeypatch.setattr(key_service, "load_key", _load)
+    yield calls
+    api_keys.evict()
+
+
+def _create_key(client, **payload):
+    r = client.post("/admin/api-keys", headers=HEADERS, json={"name": "tenant", **payload})
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+def test_key_is_loaded_once_then_served_from_cache(client, key_loads):
+    # ---------- Arrange ----------
+    created = _create_key(client)
+    headers = {"x-api-key": created["key"]}
+
+    # ---------- Act ----------
+    statuses = [client.get("/articles", headers=headers).status_code for _ in range(3)]
+    wrong = client.get("/articles", headers={"x-api-key": created["key"] + "x"})
+
+    # ---------- Assert ----------
+    assert statuses == [200, 200, 200]
+    assert wrong.status_code == 401
+    assert key_loads == [created["prefix"]]
+
+
+def test_unknown_prefix_is_negatively_cached(client, key_loads):
+    for _ in range(3):
+        assert client.get("/articles", headers={"x-api-key": "rk_deadbeef_nope"}).status_code == 401
+
+    assert key_loads == ["deadbeef"]
+
+
+def test_per_key_rate_limit(client, key_loads):
+    # ---------- Arrange ----------
+    headers = {"x-api-key": _create_key(client, rate_limit=2)["key"]}
+
+    # ---------- Act ----------
+    statuses = [client.get("/articles", headers=headers).status_code for _ in range(3)]
+
+    # ---------- Assert ----------
+    assert statuses == [200, 200, 429]
+
+
+def test_revocation_evicts_the_cached_key(client, key_loads):
+    # ---------- Arrange ----------
+    from app import api_keys
+    created = _create_key(client)
+    headers = {"x-api-key": created["key"]}
+    assert client.get("/articles", headers=headers).status_code == 200
+    _, cached_key = api_keys.cached(created["prefix"])
+
+    # ---------- Act ----------
+    r = client.delete(f"/admin/api-keys/{created['prefix']}", headers=HEADERS)
+    # Another worker still holding the key hears the revocation
+    api_keys.remember(created["prefix"], cached_key)
+    api_keys._on_message({"data": created["prefix"].encode()})  # pylint: disable=protected-access
+
+    # ---------- Assert ----------
+    assert r.status_code == 204
+    assert client.get("/articles", headers=headers).status_code == 401
+    assert client.get("/admin/api-keys", headers=HEADERS).json()[0]["revoked_at"] is not None
+
+
+def test_admin_routes_need_an_admin_key(client, key_loads):
+    headers = {"x-api-key": _create_key(client)["key"]}
+
+    assert client.get("/admin/api-keys", headers=headers).status_code == 403
+    assert client.get("/admin/api-keys", headers={"x-api-key": _create_key(client, is_admin=True)["key"]}).status_code == 200
+
+
+def test_cache_keeps_the_most_recently_used_prefixes(key_loads, monkeypatch):
+    # ---------- Arrange ----------
+    from app import api_keys
+    monkeypatch.setattr(api_keys, "_MAX_ENTRIES", 2)
+    api_keys.remember("a", None)
+    api_keys.remember("b", None)
+
+    # ---------- Act ----------
+    api_keys.cached("a")
+    api_keys.remember("c", None)
+    monkeypatch.setattr(api_keys, "_NEGATIVE_TTL", -1)
+    api_keys.remember("d", None)
+
+    # ---------- Assert ----------
+    assert list(api_keys._cache) == ["c", "d"]  # pylint: disable=protected-access
+    assert api_keys.cached("d") == (False, None)
+    assert list(api_keys._cache) == ["c"]  # pylint: disable=protected-access
@@ -65,3 +65,28 @@ def test_create_article_delegates_to_repo(monkeypatch):
     # ---------- Assert ----------
     assert created["id"] == 123
     assert created["title"] == "t"
+
+
+def test_create_article_survives_redis_failures_after_commit(monkeypatch):
+    # ---------- Arrange ----------
+    import redis
+    from types import SimpleNamespace
+    from app.services import articles as svc
+
+    created = SimpleNamespace(id=7, title="t", author="me", tags="dev")
+    monkeypatch.setattr("app.repositories.articles.create_article", lambda db, data: created)
+    monkeypatch.setattr(svc, "_serialize_for_cache", lambda article: {"id": article.id})
+    indexed = []
+
+    def _down(*_args, **_kwargs):
+        raise redis.ConnectionError("down")
+
+    monkeypatch.setattr(svc.typeahead, "index_article", _down)
+    monkeypatch.setattr(svc.existence, "add", indexed.append)
+
+    # ---------- Act ----------
+    result = svc.create_article(None, {"title": "t"})
+
+    # ---------- Assert ----------
+    assert result is created
+    assert indexed == [7]
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+ARTICLE = {"id": 7, "title": "t", "body": "lorem ipsum " * 500, "tags": "a;b", "author": "me",
+           "published_at": None, "created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"}
+
+
+def test_round_trip_compresses_large_payloads():
+    from app import cache_codec
+
+    raw = cache_codec.encode(ARTICLE)
+
+    assert raw[0] == cache_codec.VERSION
+    assert raw[1] & cache_codec.FLAG_ZLIB
+    assert len(raw) < len(json.dumps(ARTICLE)) / 10
+    assert cache_codec.decode(raw) == ARTICLE
+    assert not cache_codec.encode({"id": 1})[1] & cache_codec.FLAG_ZLIB
+
+
+def test_reads_legacy_json_and_skips_unknown_versions():
+    from app import cache_codec
+
+    assert cache_codec.decode(json.dumps(ARTICLE)) == ARTICLE
+    assert cache_codec.decode(bytes((99, 0)) + b"whatever") is None
+
+
+def test_split_body_keeps_metadata_reads_small(monkeypatch):
+    # ---------- Arrange ----------
+    from app import cache
+    monkeypatch.setattr(cache, "_SPLIT_BODY", True)
+
+    # ---------- Act ----------
+    cache.set_cached_articles({7: ARTICLE, 8: {**ARTICLE, "id": 8}})
+
+    # ---------- Assert ----------
+    assert cache.get_cached_article(7) == ARTICLE
+    assert "body" not in cache.get_cached_article(7, include_body=False)
+    cache.redis_client().delete(cache.body_key(8))
+    assert set(cache.get_cached_articles([7, 8])) == {7}
+    cache.invalidate_article(7)
+    assert cache.get_cached_article(7, include_body=False) is None
+
+
+def test_unusable_entries_are_dropped_and_reloaded(client, monkeypatch):
+    # ---------- Arrange ----------
+    from app import cache, cache_codec
+    headers = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+    ids = [client.post("/articles", headers=headers,
+                       json={"title": f"U{i}", "body": "kept in the DB", "author": "me"}).json()["id"]
+           for i in range(2)]
+    monkeypatch.setattr(cache, "_SPLIT_BODY", True)
+    cache.set_cached_article(ids[0], client.get(f"/articles/{ids[0]}", headers=headers).json())
+    monkeypatch.setattr(cache, "_SPLIT_BODY", False)  # metadata-only entry left behind
+    corrupt = bytes((cache_codec.VERSION, cache_codec.FLAG_ZLIB)) + b"not zlib"
+    cache.redis_client().set(cache.cache_key(ids[1]), corrupt)
+
+    # ---------- Act ----------
+    responses = [client.get(f"/articles/{aid}", headers=headers) for aid in ids]
+
+    # ---------- Assert ----------
+    assert cache_codec.decode(corrupt) is None
+    assert [r.status_code for r in responses] == [200, 200]
+    assert [r.json()["body"] for r in responses] == ["kept in the DB"] * 2
+    assert cache.get_cached_article(ids[0])["body"] == "kept in the DB"
+    assert cache.get_cached_article(ids[1])["title"] == "U1"
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def test_notification_wakes_every_waiter():
+    from app import change_feed
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        change_feed._loop = loop  # pylint: disable=protected-access
+        waiters = [asyncio.create_task(change_feed.wait_for_change(5)) for _ in range(3)]
+        await asyncio.sleep(0)
+        # As the subscriber thread would on a published change
+        await loop.run_in_executor(None, change_feed._on_message, {"data": "1"})  # pylint: disable=protected-access
+        return await asyncio.wait_for(asyncio.gather(*waiters), 1)
+
+    assert asyncio.run(scenario()) == [True, True, True]
+    assert asyncio.run(change_feed.wait_for_change(0.01)) is False
+
+
+def test_stale_transactions_do_not_hold_the_horizon_back(db_session, monkeypatch):
+    from datetime import timedelta
+    from sqlalchemy import text
+    from app.db.db import engine
+    from app.repositories import articles as repo
+
+    # ---------- Arrange ----------
+    with engine.connect() as other:
+        other_start = other.execute(text("SELECT now()::timestamp")).scalar_one()  # opens a transaction
+
+        # ---------- Act ----------
+        held = repo.write_horizon(db_session)
+        monkeypatch.setattr(repo, "HORIZON_MAX_TRANSACTION_AGE", timedelta(0))
+        released = repo.write_horizon(db_session)
+
+    # ---------- Assert ----------
+    now = db_session.execute(text("SELECT now()::timestamp")).scalar_one()
+    assert held == other_start
+    assert released > now
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.unit
+
+
+def test_freed_slots_go_to_cheap_reads_first():
+    from app.concurrency import ConcurrencyLimiter
+
+    async def scenario():
+        limiter = ConcurrencyLimiter({"read": 2, "search": 2}, total=1, deadline=1.0)
+        running = await limiter.acquire("search")
+        order = []
+
+        async def call(lane):
+            acquired = await limiter.acquire(lane)
+            order.append(lane)
+            limiter.release(acquired, 0.0)
+
+        tasks = [asyncio.create_task(call(lane)) for lane in ("search", "read", "search", "read")]
+        await asyncio.sleep(0)
+        limiter.release(running, 0.0)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["read", "read", "search", "search"]
+
+
+def test_sheds_when_the_expected_wait_exceeds_the_deadline():
+    from app.concurrency import ConcurrencyLimiter
+
+    async def scenario():
+        limiter = ConcurrencyLimiter({"search": 1}, total=4, deadline=0.05)
+        running = await limiter.acquire("search")
+        # ---------- Queued past the deadline ----------
+        with pytest.raises(HTTPException) as waited:
+            await limiter.acquire("search")
+        # ---------- Known slow lane: shed without queueing ----------
+        limiter.lanes["search"].service_time = 2.0
+        with pytest.raises(HTTPException) as predicted:
+            await limiter.acquire("search")
+        # ---------- Other lanes are unaffected ----------
+        read = await limiter.acquire("read")
+        limiter.release(read, 0.0)
+        limiter.release(running, 0.0)
+        return waited.value, predicted.value, limiter.stats()["search"]
+
+    waited, predicted, stats = asyncio.run(scenario())
+    assert waited.status_code == predicted.status_code == 503
+    assert predicted.headers["Retry-After"] == "2"
+    assert stats["shed"] == 2 and stats["active"] == 0 and stats["queued"] == 0
+
+
+def test_waiters_held_by_their_own_lane_limit_do_not_block_other_lanes():
+    from app.concurrency import ConcurrencyLimiter
+
+    async def scenario():
+        limiter = ConcurrencyLimiter({"write": 1, "list": 2}, total=4, deadline=1.0)
+        running = await limiter.acquire("write")
+        queued = asyncio.create_task(limiter.acquire("write"))
+        await asyncio.sleep(0)
+        # ---------- Free slots left: list runs without waiting behind write ----------
+        listing = await asyncio.wait_for(limiter.acquire("list"), 0.01)
+        limiter.release(listing, 0.0)
+        limiter.release(running, 0.0)
+        limiter.release(await queued, 0.0)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["write"]["active"] == stats["list"]["active"] == 0
+
+
+def test_health_responds_while_lanes_and_default_pool_are_busy(monkeypatch):
+    import threading
+    import httpx
+    from fastapi.concurrency import run_in_threadpool
+    from app import concurrency
+    from app.config import Settings
+    from app.main import create_app
+
+    # Restored afterwards, so later tests size the pools again
+    for name in ("_limiter", "_lane_threads", "_probe_threads"):
+        monkeypatch.setattr(concurrency, name, None)
+    release = threading.Event()
+
+    async def scenario():
+        concurrency.install(Settings(THREADPOOL_SIZE=3, THREADPOOL_RESERVED=1,
+                                     CONCURRENCY_LIMITS="read=2"))
+        # ---------- Arrange: every lane thread and default thread is taken ----------
+        busy = [asyncio.create_task(concurrency.run_limited("read", release.wait)) for _ in range(2)]
+        busy.append(asyncio.create_task(run_in_threadpool(release.wait)))
+        await asyncio.sleep(0.05)
+        try:
+            # ---------- Act ----------
+            transport = httpx.ASGITransport(app=create_app())
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.wait_for(client.get("/health"), 5)
+        finally:
+            release.set()
+            await asyncio.gather(*busy)
+
+    # ---------- Assert ----------
+    r = asyncio.run(scenario())
+    assert r.status_code == 200
+    assert r.json()["db"] is True
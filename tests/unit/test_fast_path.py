@@ -0,0 +1,116 @@
+import pytest
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+def _counter():
+    from app import api_keys
+    from app.cache import redis_client
+
+    return int(redis_client().get(f"rl:{api_keys.static_key().prefix}") or 0)
+
+
+@pytest.fixture
+def block_route(client, monkeypatch):
+    """
+    Return a function making any later use of the regular route machinery fail loudly.
+    """
+    from app import concurrency
+    from app.db.db import get_db, get_session_factory
+
+    def _boom(*_args, **_kwargs):
+        raise AssertionError("regular route used")
+
+    def _no_session():
+        raise AssertionError("DB session opened")
+
+    def _block():
+        monkeypatch.setattr(concurrency, "run_in_limiter", _boom)
+        monkeypatch.setitem(client.app.dependency_overrides, get_db, _no_session)
+        monkeypatch.setitem(client.app.dependency_overrides, get_session_factory, lambda: _no_session)
+    return _block
+
+
+def test_cache_hit_is_served_on_the_event_loop(client, block_route):
+    # ---------- Arrange ----------
+    created = client.post("/articles", headers=HEADERS,
+                          json={"title": "Fast", "body": "Body", "author": "me", "tags": ["a", "b"],
+                                "published_at": "2024-05-01T10:00:00"}).json()
+    before = _counter()
+    block_route()
+
+    # ---------- Act ----------
+    r = client.get(f"/articles/{created['id']}", headers=HEADERS)
+
+    # ---------- Assert ----------
+    assert r.status_code == 200, r.text
+    assert r.json() == created
+    assert _counter() == before + 1
+
+
+def test_cached_not_found_and_rate_limit_are_answered_directly(client, block_route):
+    from app import api_keys, rate_limit
+    from app.cache import redis_client, set_missing
+
+    # ---------- Arrange ----------
+    set_missing([987654])
+    block_route()
+
+    # ---------- Act / Assert ----------
+    assert client.get("/articles/987654", headers=HEADERS).status_code == 404
+    redis_client().set(f"rl:{api_keys.static_key().prefix}", rate_limit.LIMIT, ex=30)
+    r = client.get("/articles/987654", headers=HEADERS)
+    assert r.status_code == 429
+    assert "Try again in" in r.json()["detail"]
+
+
+def test_miss_falls_through_and_is_counted_once(client):
+    from app.cache import cache_key, redis_client
+
+    # ---------- Arrange ----------
+    aid = client.post("/articles", headers=HEADERS, json={"title": "Slow", "body": "B", "author": "me"}).json()["id"]
+    redis_client().delete(cache_key(aid))
+    before = _counter()
+
+    # ---------- Act ----------
+    r = client.get(f"/articles/{aid}", headers=HEADERS)
+
+    # ---------- Assert ----------
+    assert r.status_code == 200, r.text
+    assert _counter() == before + 1
+    assert redis_client().exists(cache_key(aid))  # the route filled the cache
+
+
+def test_unauthenticated_requests_go_to_the_route(client, block_route):
+    # ---------- Act / Assert ----------
+    block_route()
+    with pytest.raises(AssertionError, match="DB session opened"):
+        client.get("/articles/1", headers={"x-api-key": "rk_deadbeef_unknown"})
+
+
+def test_scoring_a_hit_cannot_fail_its_response(client, block_route, monkeypatch):
+    import fakeredis
+    from redis.exceptions import ConnectionError as RedisConnectionError
+    from app import access_stats
+
+    # ---------- Arrange ----------
+    created = client.post("/articles", headers=HEADERS, json={"title": "Scored", "body": "B", "author": "me"}).json()
+    monkeypatch.setattr(access_stats, "_SAMPLE_RATE", 1.0)
+    calls = []
+
+    async def _down(self, *args, **_kwargs):
+        calls.append(args)
+        raise RedisConnectionError("down")
+
+    monkeypatch.setattr(fakeredis.FakeAsyncRedis, "zincrby", _down, raising=False)
+    block_route()
+
+    # ---------- Act ----------
+    r = client.get(f"/articles/{created['id']}", headers=HEADERS)
+
+    # ---------- Assert ----------
+    assert r.status_code == 200, r.text
+    assert r.json() == created
+    assert calls == [(access_stats.HOT_KEY, 1.0, str(created["id"]))]
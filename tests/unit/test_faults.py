@@ -0,0 +1,65 @@
+import pytest
+import redis
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+@pytest.fixture
+def injector(monkeypatch):
+    from app import faults
+    from app.config import Settings
+    from app.db.db import engine
+
+    # Restored to None afterwards, which turns the hooks back into no-ops
+    monkeypatch.setattr(faults, "_injector", None)
+    return faults.install(engine, settings=Settings(FAULT_INJECTION_ENABLED=True))
+
+
+def test_parse_rules():
+    from app.faults import parse_rules
+
+    # ---------- Act ----------
+    rules = parse_rules("redis:get=delay:200@0.05, sql:SELECT=delay:5-10,sql:connect=delay:~300,redis:*=drop")
+
+    # ---------- Assert ----------
+    assert [rule.describe() for rule in rules] == [
+        "redis:GET=delay:200@0.05", "sql:select=delay:5-10@1", "sql:connect=delay:~300@1", "redis:*=drop@1"]
+    for bad in ("mongo:get=error", "redis:GET=explode", "redis:GET=delay", "sql:*=error@2"):
+        with pytest.raises(ValueError):
+            parse_rules(bad)
+
+
+def test_admin_endpoint_is_off_by_default(client):
+    # ---------- Act / Assert ----------
+    assert client.get("/admin/faults", headers=HEADERS).status_code == 404
+
+
+def test_redis_faults_raise_driver_errors(client, injector):
+    from app.cache import redis_client
+
+    # ---------- Arrange ----------
+    r = client.put("/admin/faults", headers=HEADERS, json={"rules": "redis:GET=timeout,redis:SET=delay:20"})
+    assert r.status_code == 200, r.text
+
+    # ---------- Act / Assert ----------
+    with pytest.raises(redis.TimeoutError):
+        redis_client().get("k")
+    redis_client().set("k", "v")
+    assert {s["rule"]: s["hits"] for s in client.get("/admin/faults", headers=HEADERS).json()} == {
+        "redis:GET=timeout@1": 1, "redis:SET=delay:20@1": 1}
+
+
+def test_sql_timeout_fault_maps_to_504(client, injector):
+    # ---------- Arrange ----------
+    assert client.put("/admin/faults", headers=HEADERS, json={"rules": "sql:nope"}).status_code == 422
+    client.put("/admin/faults", headers=HEADERS, json={"rules": "sql:select=timeout"})
+
+    # ---------- Act ----------
+    r = client.get("/articles", headers=HEADERS)
+
+    # ---------- Assert ----------
+    assert r.status_code == 504, r.text
+    injector.set_rules([])
+    assert client.get("/articles", headers=HEADERS).status_code == 200
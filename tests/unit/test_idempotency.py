@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+@pytest.fixture
+def count_repo_creates(monkeypatch):
+    from app.repositories import articles as repo
+
+    calls = []
+    real_create = repo.create_article
+
+    def _create(db, payload):
+        calls.append(payload.title)
+        return real_create(db, payload)
+
+    monkeypatch.setattr(repo, "create_article", _create)
+    return calls
+
+
+def test_retry_replays_the_first_response(client, count_repo_creates):
+    # ---------- Arrange ----------
+    headers = {**HEADERS, "Idempotency-Key": "create-1"}
+    payload = {"title": "Idem", "body": "b", "author": "retry"}
+    first = client.post("/articles", headers=headers, json=payload)
+
+    # ---------- Act ----------
+    retries = [client.post("/articles", headers=headers, json=payload) for _ in range(3)]
+
+    # ---------- Assert ----------
+    assert first.status_code == 201, first.text
+    assert "idempotent-replayed" not in first.headers
+    for r in retries:
+        assert r.status_code == 201
+        assert r.json() == first.json()
+        assert r.headers["idempotent-replayed"] == "true"
+    assert count_repo_creates == ["Idem"]
+
+
+def test_reusing_a_key_with_another_body_is_rejected(client):
+    # ---------- Arrange ----------
+    headers = {**HEADERS, "Idempotency-Key": "create-2"}
+    client.post("/articles", headers=headers, json={"title": "A", "body": "b", "author": "x"})
+
+    # ---------- Act ----------
+    r = client.post("/articles", headers=headers, json={"title": "B", "body": "b", "author": "x"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 422
+
+
+def test_duplicate_of_an_in_flight_request_gets_409_after_waiting(client, monkeypatch):
+    # ---------- Arrange ----------
+    from app import cache, idempotency
+    body = json.dumps({"title": "Slow", "body": "b", "author": "x"}).encode()
+    scope = {"method": "POST", "path": "/articles"}
+    key = idempotency.storage_key(
+        idempotency._scope_hash(scope, HEADERS["x-api-key"].encode()), "create-3")  # pylint: disable=protected-access
+    cache.redis_client().set(key, json.dumps({"state": "pending", "fp": idempotency._fingerprint(body)}))  # pylint: disable=protected-access
+    from fastapi.testclient import TestClient
+    from app.config import Settings
+    from app.main import create_app
+    monkeypatch.setattr(idempotency, "get_settings", lambda: Settings(IDEMPOTENCY_WAIT_SECONDS=0.1))
+
+    # ---------- Act ----------
+    r = TestClient(create_app()).post("/articles", content=body,
+                                      headers={**HEADERS, "Idempotency-Key": "create-3",
+                                               "content-type": "application/json"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 409
+    assert r.headers["retry-after"] == "1"
+
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.unit
+
+
+def test_after_fork_drops_inherited_pools_and_engine_still_works():
+    # ---------- Arrange ----------
+    from app import lifecycle
+    from app.db.db import engine
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    pool_before = engine.pool
+
+    # ---------- Act ----------
+    lifecycle.after_fork()
+
+    # ---------- Assert ----------
+    assert engine.pool is not pool_before
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar_one() == 1
+
+
+def test_workers_skip_create_all_once_the_master_prepared_the_schema(monkeypatch):
+    # ---------- Arrange ----------
+    from fastapi.testclient import TestClient
+    from app import lifecycle
+    from app.db.db import Base
+    from app.main import create_app
+
+    calls = []
+    monkeypatch.setattr(lifecycle, "_schema_ready", type(lifecycle._schema_ready)())
+    monkeypatch.setattr(Base.metadata, "create_all", lambda *a, **kw: calls.append(a))
+    monkeypatch.setattr(lifecycle.engine, "dispose", lambda *a, **kw: None)
+
+    # ---------- Act ----------
+    lifecycle.prepare_master()
+    with TestClient(create_app()):
+        pass
+
+    # ---------- Assert ----------
+    assert len(calls) == 1
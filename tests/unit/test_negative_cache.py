@@ -0,0 +1,108 @@
+import pytest
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+@pytest.fixture
+def count_repo_gets(monkeypatch):
+    from app.repositories import articles as repo
+
+    calls = []
+    real_get = repo.get_article
+
+    def _get(db, article_id):
+        calls.append(article_id)
+        return real_get(db, article_id)
+
+    monkeypatch.setattr(repo, "get_article", _get)
+    return calls
+
+
+def test_unknown_id_is_negatively_cached(client, count_repo_gets):
+    for _ in range(3):
+        assert client.get("/articles/987654", headers=HEADERS).status_code == 404
+
+    assert count_repo_gets == [987654]
+
+
+def test_delete_leaves_a_negative_entry(client, count_repo_gets):
+    # ---------- Arrange ----------
+    from app import cache
+    aid = client.post("/articles", headers=HEADERS,
+                      json={"title": "Neg", "body": "b", "author": "nc"}).json()["id"]
+
+    # ---------- Act ----------
+    client.delete(f"/articles/{aid}", headers=HEADERS)
+    count_repo_gets.clear()
+
+    # ---------- Assert ----------
+    assert cache.get_cached_article(aid) is cache.MISSING
+    assert client.get(f"/articles/{aid}", headers=HEADERS).status_code == 404
+    r = client.get("/articles/batch", headers=HEADERS, params={"ids": str(aid)})
+    assert r.json() == [{"id": aid, "found": False, "article": None}]
+    assert count_repo_gets == []
+
+
+def test_existence_filter_answers_without_db(client, db_session, monkeypatch, count_repo_gets):
+    # ---------- Arrange ----------
+    from app import existence
+    from app.services import articles as svc
+    monkeypatch.setattr(existence, "_ENABLED", True)
+    aid = client.post("/articles", headers=HEADERS,
+                      json={"title": "Exists", "body": "b", "author": "ef"}).json()["id"]
+    assert existence.might_exist([aid + 1]) == {aid + 1: True}  # not ready yet
+
+    # ---------- Act ----------
+    assert svc.rebuild_existence_filter(db_session) >= aid
+
+    # ---------- Assert ----------
+    assert existence.might_exist([aid, aid + 1]) == {aid: True, aid + 1: False}
+    assert client.get(f"/articles/{aid + 1}", headers=HEADERS).status_code == 404
+    assert count_repo_gets == []
+
+
+def test_out_of_range_ids_do_not_exist(client, db_session, monkeypatch):
+    # ---------- Arrange ----------
+    from app import existence
+    from app.services import articles as svc
+    monkeypatch.setattr(existence, "_ENABLED", True)
+    svc.rebuild_existence_filter(db_session)
+
+    # ---------- Act / Assert ----------
+    assert existence.might_exist([-1, 2 ** 32]) == {-1: False, 2 ** 32: False}
+    for aid in (-1, 99999999999):
+        assert client.get(f"/articles/{aid}", headers=HEADERS).status_code == 404
+    r = client.get("/articles/batch", headers=HEADERS, params={"ids": "99999999999"})
+    assert r.status_code == 200, r.text
+    assert [item["found"] for item in r.json()] == [False]
+
+
+def test_rebuild_keeps_ids_committed_during_the_scan(client, db_session, monkeypatch):
+    # ---------- Arrange ----------
+    from sqlalchemy import text
+    from app import existence
+    from app.services import articles as svc
+    monkeypatch.setattr(existence, "_ENABLED", True)
+    late, other = (client.post("/articles", headers=HEADERS,
+                               json={"title": f"Late {i}", "body": "b", "author": "ef"}).json()["id"]
+                   for i in range(2))
+    # A transaction that commits after the scan started: newer than the
+    # horizon and invisible to the scan, though its id is below the scan's max
+    db_session.execute(text("UPDATE articles SET updated_at = now() + interval '1 second' WHERE id = :id"),
+                       {"id": late})
+    real_iter_ids = svc.repo.iter_ids
+
+    def _iter_ids(db, **kwargs):
+        ids = real_iter_ids(db, **kwargs)
+        return ids if kwargs else (aid for aid in ids if aid != late)
+
+    monkeypatch.setattr(svc.repo, "iter_ids", _iter_ids)
+
+    # ---------- Act ----------
+    max_id = svc.rebuild_existence_filter(db_session)
+
+    # ---------- Assert ----------
+    assert max_id >= other > late
+    assert existence.might_exist([late, other]) == {late: True, other: True}
@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+@pytest.fixture
+def profiled_client(db_session, tmp_path):
+    from app import profiling
+    from app.config import Settings
+    from app.db.db import engine, get_db
+    from app.main import create_app
+
+    application = create_app()
+    application.dependency_overrides[get_db] = lambda: db_session
+    settings = Settings(
+        PROFILING_ENABLED=True,
+        PROFILE_TOKEN="let-me-see",
+        PROFILE_DIR=str(tmp_path),
+        SQL_COUNT_THRESHOLD=0,
+    )
+    profiling.install(application, engine, settings=settings)
+    return TestClient(application)
+
+
+def test_counts_sql_and_redis_per_request(profiled_client, tmp_path):
+    # ---------- Act ----------
+    r = profiled_client.post("/articles", headers=HEADERS,
+                             json={"title": "Prof", "body": "B", "author": "me"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 201, r.text
+    assert int(r.headers["x-sql-count"]) >= 1
+    assert int(r.headers["x-redis-count"]) >= 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_privileged_header_writes_folded_profile(profiled_client, tmp_path):
+    # ---------- Arrange ----------
+    r = profiled_client.post("/articles", headers=HEADERS,
+                             json={"title": "Prof2", "body": "B", "author": "me"})
+    aid = r.json()["id"]
+
+    # ---------- Act ----------
+    r = profiled_client.get(f"/articles/{aid}", headers={**HEADERS, "x-profile": "let-me-see"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 200, r.text
+    files = list(tmp_path.glob("*.folded"))
+    assert len(files) == 1
+    for line in files[0].read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+
+def test_event_loop_thread_is_not_sampled(profiled_client, monkeypatch):
+    from app import profiling
+
+    # ---------- Arrange ----------
+    seen = []
+    monkeypatch.setattr(profiling, "_write_profile",
+                        lambda _dir, _method, _path, samples: seen.append(samples) or "mem")
+
+    # ---------- Act ----------
+    r = profiled_client.get("/articles", headers={**HEADERS, "x-profile": "let-me-see"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 200, r.text
+    (samples,) = seen
+    # The loop thread interleaves every in-flight request; only this request's workers count
+    assert not any("base_events" in stack for stack in samples)
@@ -0,0 +1,127 @@
+import contextvars
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+def test_statement_over_budget_maps_to_504(client, db_session, monkeypatch):
+    # ---------- Arrange ----------
+    from app.query_guard import TIMEOUT_INFO_KEY
+    from app.repositories import articles as repo
+    db_session.info[TIMEOUT_INFO_KEY] = 50
+    monkeypatch.setattr(repo, "search_articles",
+                        lambda db, *_args: db.execute(text("SELECT pg_sleep(2)")).all())
+
+    # ---------- Act ----------
+    started = time.monotonic()
+    r = client.get("/articles/search", headers=HEADERS, params={"q": "a"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 504, r.text
+    assert time.monotonic() - started < 1.5
+
+
+def test_disconnect_cancels_running_statements():
+    # ---------- Arrange ----------
+    from app import query_guard
+    from app.db.db import engine
+    queries = query_guard.RequestQueries()
+    errors = []
+
+    def _run() -> None:
+        query_guard._current.set(queries)  # pylint: disable=protected-access
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT pg_sleep(5)"))
+        except OperationalError as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=contextvars.copy_context().run, args=(_run,))
+    started = time.monotonic()
+    worker.start()
+    while not queries.running and time.monotonic() - started < 2:
+        time.sleep(0.01)
+
+    # ---------- Act ----------
+    cancelled = queries.cancel_all()
+    worker.join(5)
+
+    # ---------- Assert ----------
+    assert cancelled == 1
+    assert errors and errors[0].orig.pgcode == query_guard.QUERY_CANCELED
+    assert time.monotonic() - started < 2
+    assert not queries.running
+
+
+def test_oversized_body_is_rejected_before_buffering():
+    # ---------- Arrange ----------
+    from fastapi.testclient import TestClient
+    from app.config import Settings
+    from app.main import create_app
+    from app.query_guard import DisconnectMiddleware
+    application = create_app()
+    middleware = next(m for m in application.user_middleware if m.cls is DisconnectMiddleware)
+    middleware.kwargs["settings"] = Settings(MAX_REQUEST_BODY_BYTES=64)
+    client = TestClient(application)
+
+    # ---------- Act ----------
+    r = client.post("/articles", headers=HEADERS, json={"title": "Big", "body": "x" * 100, "author": "me"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 413, r.text
+
+
+@pytest.mark.parametrize("respond_first", [False, True])
+def test_disconnect_cancels_off_the_loop_unless_the_response_is_complete(monkeypatch, respond_first):
+    import asyncio
+    from app import query_guard
+    from app.config import Settings
+
+    # ---------- Arrange ----------
+    cancel_threads = []
+
+    def _cancel_all(self):
+        cancel_threads.append(threading.get_ident())
+        return 0
+
+    monkeypatch.setattr(query_guard.RequestQueries, "cancel_all", _cancel_all)
+
+    async def route(_scope, receive, send):
+        await receive()
+        if respond_first:
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+        await receive()  # returns once the client is gone
+        await asyncio.sleep(0.05)
+
+    async def scenario():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def send(_message):
+            pass
+
+        middleware = query_guard.DisconnectMiddleware(route, settings=Settings())
+        await middleware({"type": "http", "method": "GET", "path": "/x"}, receive, send)
+        return threading.get_ident()
+
+    # ---------- Act ----------
+    loop_thread = asyncio.run(scenario())
+
+    # ---------- Assert ----------
+    if respond_first:
+        assert not cancel_threads
+    else:
+        assert cancel_threads and cancel_threads[0] != loop_thread
@@ -0,0 +1,57 @@
+import pytest
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+
+
+@pytest.fixture
+def slow_log():
+    from app import slow_query_log
+    from app.config import Settings
+    from app.db.db import engine
+
+    log = slow_query_log.install(engine, Settings(
+        SLOW_QUERY_MS=0.001,
+        SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1.0,
+        SLOW_QUERY_LOG_PATH=None,
+    ))
+    yield log
+    slow_query_log.install(engine)
+
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    from app.slow_query_log import normalize_sql
+
+    sql = normalize_sql("SELECT *\n  FROM articles WHERE id IN (1, 2, 3) AND title = 'x' LIMIT 10")
+
+    assert sql == "SELECT * FROM articles WHERE id IN (...) AND title = ? LIMIT ?"
+
+
+def test_records_caller_redacted_params_and_plan(slow_log, db_session, client):
+    # ---------- Arrange ----------
+    from app.services import articles as svc
+
+    # ---------- Act ----------
+    svc.list_articles(db_session, author="nobody", tag="t")
+
+    # ---------- Assert ----------
+    entry = next(e for e in slow_log.recent() if "count(*)" not in e["sql"])
+    assert entry["caller"] == "app.services.articles:list_articles"
+    assert set(entry["parameters"].values()) == {"?"}
+    assert entry["plan"] and entry["plan"][0]
+
+    r = client.get("/admin/slow-queries", headers=HEADERS, params={"limit": 1})
+    assert r.status_code == 200, r.text
+    assert len(r.json()) == 1
+
+
+def test_statement_started_before_attach_is_ignored(slow_log):
+    # ---------- Arrange ----------
+    conn = type("Conn", (), {"info": {}})()
+
+    # ---------- Act ----------
+    slow_log._after(conn, None, "SELECT 1", {}, None, False)  # pylint: disable=protected-access
+
+    # ---------- Assert ----------
+    assert not slow_log.recent()
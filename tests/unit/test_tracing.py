@@ -0,0 +1,113 @@
+import pytest
+from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.unit
+
+HEADERS = {"x-api-key": "47da9ef4-0a22-4625-89f3-ef7025a64192"}
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+
+@pytest.fixture
+def traced_client(db_session, monkeypatch):
+    from app import tracing
+    from app.config import Settings
+    from app.db.db import engine, get_db
+    from app.main import create_app
+
+    exporter = CollectingExporter()
+    # Export inline instead of through the background thread
+    monkeypatch.setattr(tracing, "_exporter", type("Inline", (), {
+        "submit": staticmethod(lambda spans: exporter.export([s.to_dict() for s in spans]))})())
+    application = create_app()
+    application.dependency_overrides[get_db] = lambda: db_session
+    tracing.install(application, engine, settings=Settings(TRACING_ENABLED=True, TRACE_SAMPLE_RATE=0.0))
+    return TestClient(application), exporter
+
+
+def test_incoming_traceparent_records_layer_sql_and_redis_spans(traced_client):
+    from app.cache import cache_key, redis_client
+
+    # ---------- Arrange ----------
+    client, exporter = traced_client
+    r = client.post("/articles", headers=HEADERS, json={"title": "Traced", "body": "B", "author": "me"})
+    aid = r.json()["id"]
+    assert not exporter.traces  # not sampled at rate 0
+    redis_client().delete(cache_key(aid))  # a hit would be answered by the fast path
+
+    # ---------- Act ----------
+    r = client.get(f"/articles/{aid}",
+                   headers={**HEADERS, "traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 200, r.text
+    assert r.headers["x-trace-id"] == TRACE_ID
+    (spans,) = exporter.traces
+    by_id = {span["span_id"]: span for span in spans}
+    root = next(span for span in spans if span["layer"] == "router")
+    assert root["name"] == "GET /articles/{article_id}"
+    assert root["parent_id"] == "00f067aa0ba902b7"
+    assert {span["layer"] for span in spans} >= {"router", "service", "repository", "cache", "redis", "sql"}
+    assert all(span["trace_id"] == TRACE_ID for span in spans)
+    assert all(span["parent_id"] in by_id for span in spans if span is not root)
+    service = next(span for span in spans if span["name"] == "services.articles.get_article")
+    assert service["layer"] == "service"
+
+
+def test_unsampled_traceparent_is_not_recorded(traced_client):
+    # ---------- Act ----------
+    client, exporter = traced_client
+    r = client.get("/articles", headers={**HEADERS, "traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-00"})
+
+    # ---------- Assert ----------
+    assert r.status_code == 200, r.text
+    assert "x-trace-id" not in r.headers
+    assert not exporter.traces
+
+
+def test_waterfall_renders_nested_spans():
+    from app.scripts.trace_waterfall import render
+
+    # ---------- Arrange ----------
+    spans = [
+        {"span_id": "a", "parent_id": None, "name": "GET /x", "layer": "router",
+         "start_ns": 0, "end_ns": 10_000_000, "duration_ms": 10.0},
+        {"span_id": "b", "parent_id": "a", "name": "sql", "layer": "sql",
+         "start_ns": 5_000_000, "end_ns": 10_000_000, "duration_ms": 5.0, "error": "boom"},
+    ]
+
+    # ---------- Act ----------
+    lines = render(spans).splitlines()
+
+    # ---------- Assert ----------
+    assert lines[0].startswith("[router] GET /x")
+    assert lines[1].startswith("  [sql] sql") and lines[1].endswith("!")
+
+
+def test_export_thread_is_started_by_the_process_that_submits():
+    import threading
+    import time
+    from app import tracing
+
+    # ---------- Arrange ----------
+    exporter = CollectingExporter()
+    threads = {t.ident for t in threading.enumerate()}
+    background = tracing._BackgroundExporter(exporter)  # pylint: disable=protected-access
+    assert {t.ident for t in threading.enumerate()} == threads  # nothing started yet
+    background._pid = -1  # pylint: disable=protected-access  # as inherited from a forking master
+
+    # ---------- Act ----------
+    background.submit([tracing.Span(TRACE_ID, "00f067aa0ba902b7", None, "GET /x", "router")])
+    deadline = time.monotonic() + 2
+    while not exporter.traces and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # ---------- Assert ----------
+    assert [[span["name"] for span in spans] for spans in exporter.traces] == [["GET /x"]]